@@ -1,12 +1,19 @@
-from fastapi import APIRouter, Request, HTTPException, status, Depends
+from typing import Optional
+from fastapi import APIRouter, Body, Request, HTTPException, status, Depends
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
 
 from ... import db
+from ...db import get_async_session
 from ...models import User
-from ...core.security import get_password_hash, verify_password, create_access_token
-from ...core.rate_limiter import check_rate
+from ...core.revocation import revocations
+from ...core.security import (
+    REFRESH, TokenError, create_access_token, create_refresh_token, hash_password_async,
+    verify_and_update_async, verify_token,
+)
+from ...core.rate_limiter import check_rate_async
+from ...core.user_cache import cache_user, decode_token, get_cached_user
 from ...core.config import settings
 
 router = APIRouter(prefix="/auth", tags=["auth"])
@@ -16,24 +23,35 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 # --- Utils para obtener usuario desde el token ---
 def get_current_user(token: str = Depends(oauth2_scheme)):
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        payload = decode_token(token)
         user_id: str = payload.get("sub")
         if user_id is None:
             raise HTTPException(status_code=401, detail="Invalid authentication credentials")
-    except JWTError:
+    except TokenError:
         raise HTTPException(status_code=401, detail="Invalid authentication credentials")
 
+    jti = payload.get("jti")
+    if revocations.needs_db(jti):
+        with Session(db.engine) as session:
+            if revocations.is_revoked(session, jti):
+                raise HTTPException(status_code=401, detail="Token revoked")
+
+    user = get_cached_user(user_id)
+    if user is not None:
+        return user
+
     with Session(db.engine) as session:
         user = session.get(User, int(user_id))
         if not user:
             raise HTTPException(status_code=401, detail="User not found")
+        cache_user(user)
         return user
 
 # --- Registro ---
 @router.post("/register")
-def register(payload: dict, request: Request):
+async def register(payload: dict, request: Request, session: AsyncSession = Depends(get_async_session)):
     ip = request.client.host
-    check_rate(f"auth_register:{ip}", settings.RATE_LIMIT_AUTH_PER_MIN)
+    await check_rate_async(f"auth_register:{ip}", settings.RATE_LIMIT_AUTH_PER_MIN)
 
     email = payload.get("email")
     password = payload.get("password")
@@ -42,27 +60,26 @@ def register(payload: dict, request: Request):
     if not email or not password:
         raise HTTPException(status_code=400, detail="Email and password required")
 
-    with Session(db.engine) as session:
-        user = session.exec(select(User).where(User.email == email)).first()
-        if user:
-            raise HTTPException(status_code=400, detail="Email already registered")
-
-        new_user = User(
-            email=email,
-            full_name=full_name or "",
-            hashed_password=get_password_hash(password),
-        )
-        session.add(new_user)
-        session.commit()
-        session.refresh(new_user)
+    user = (await session.exec(select(User).where(User.email == email))).first()
+    if user:
+        raise HTTPException(status_code=400, detail="Email already registered")
 
-        return {"id": new_user.id, "email": new_user.email}
+    new_user = User(
+        email=email,
+        full_name=full_name or "",
+        hashed_password=await hash_password_async(password),
+    )
+    session.add(new_user)
+    await session.commit()
+    await session.refresh(new_user)
+
+    return {"id": new_user.id, "email": new_user.email}
 
 # --- Login ---
 @router.post("/login")
-def login(payload: dict, request: Request):
+async def login(payload: dict, request: Request, session: AsyncSession = Depends(get_async_session)):
     ip = request.client.host
-    check_rate(f"auth_login:{ip}", settings.RATE_LIMIT_AUTH_PER_MIN)
+    await check_rate_async(f"auth_login:{ip}", settings.RATE_LIMIT_AUTH_PER_MIN)
 
     email = payload.get("email")
     password = payload.get("password")
@@ -70,16 +87,78 @@ def login(payload: dict, request: Request):
     if not email or not password:
         raise HTTPException(status_code=400, detail="Email and password required")
 
-    with Session(db.engine) as session:
-        user = session.exec(select(User).where(User.email == email)).first()
-        if not user or not verify_password(password, user.hashed_password):
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid credentials",
-            )
-
-        token, expires_in = create_access_token(subject=str(user.id))
-        return {"access_token": token, "token_type": "bearer", "expires_in": expires_in}
+    user = (await session.exec(select(User).where(User.email == email))).first()
+    valid, new_hash = await verify_and_update_async(password, user.hashed_password) if user else (False, None)
+    if not valid:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid credentials",
+        )
+
+    # rehash transparente si cambió el coste configurado
+    if new_hash:
+        user.hashed_password = new_hash
+        session.add(user)
+        await session.commit()
+
+    return _token_pair(user.id)
+
+def _token_pair(user_id: int) -> dict:
+    token, expires_in = create_access_token(subject=str(user_id))
+    refresh_token, refresh_expires_in = create_refresh_token(subject=str(user_id))
+    return {
+        "access_token": token,
+        "token_type": "bearer",
+        "expires_in": expires_in,
+        "refresh_token": refresh_token,
+        "refresh_expires_in": refresh_expires_in,
+    }
+
+def _refresh_claims(token: str) -> dict:
+    try:
+        claims = verify_token(token, REFRESH)
+        int(claims.get("sub"))
+    except (TokenError, TypeError, ValueError):
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+    return claims
+
+# --- Renovar ---
+# Rotación: cada refresh token sirve una sola vez; el usado queda revocado y un
+# segundo uso (token robado o reintento duplicado) responde 401.
+@router.post("/refresh")
+async def refresh(payload: dict, session: AsyncSession = Depends(get_async_session)):
+    token = payload.get("refresh_token")
+    if not token:
+        raise HTTPException(status_code=400, detail="refresh_token required")
+    claims = _refresh_claims(token)
+
+    user = await session.get(User, int(claims["sub"]))
+    if user is None or not user.is_active:
+        raise HTTPException(status_code=401, detail="User not found")
+    if not await revocations.revoke(session, claims):
+        raise HTTPException(status_code=401, detail="Refresh token already used")
+    return _token_pair(user.id)
+
+# --- Cerrar sesión ---
+# Revoca el token de acceso y, si viene, el refresh token del mismo usuario
+@router.post("/logout", status_code=204)
+async def logout(
+    payload: Optional[dict] = Body(None),
+    token: str = Depends(oauth2_scheme),
+    session: AsyncSession = Depends(get_async_session),
+):
+    try:
+        claims = [verify_token(token)]
+    except TokenError:
+        raise HTTPException(status_code=401, detail="Invalid authentication credentials")
+    refresh_token = (payload or {}).get("refresh_token")
+    if refresh_token:
+        refresh_claims = _refresh_claims(refresh_token)
+        if refresh_claims.get("sub") != claims[0].get("sub"):
+            raise HTTPException(status_code=403, detail="Refresh token belongs to another user")
+        claims.append(refresh_claims)
+    await revocations.revoke(session, *claims)
+    return None
 
 # --- Usuario actual ---
 @router.get("/me")
@@ -1,7 +1,46 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+from sqlmodel.ext.asyncio.session import AsyncSession
+from ...db import get_async_session
+from ...core import catalog_cache, cluster, metrics, user_cache
+from ...core.events import turno_events
+from ...core.revocation import revocations
+from ...core.security import hashing_stats
+from ...core.writer import turno_writer
 
 router = APIRouter()
 
 @router.get("/health")
 def healthcheck():
     return {"status": "ok"}
+
+@router.get("/health/cache")
+def cache_stats():
+    return {"auth": user_cache.stats(), "revocations": revocations.stats(), "catalogs": catalog_cache.stats()}
+
+@router.get("/health/hashing")
+def hashing_metrics():
+    return hashing_stats.snapshot()
+
+@router.get("/health/writer")
+def writer_metrics():
+    return turno_writer.stats()
+
+@router.get("/health/streams")
+def stream_metrics():
+    return turno_events.stats()
+
+@router.get("/health/workers")
+def worker_metrics():
+    return cluster.stats()
+
+@router.get("/health/jobs")
+async def job_metrics(session: AsyncSession = Depends(get_async_session)):
+    from ...core.jobs import jobs  # sin trabajos en este proceso no se importa al arrancar
+
+    return await jobs.stats(session)
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def prometheus_metrics():
+    # formato de texto de Prometheus; métricas de este proceso
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
\ No newline at end of file
@@ -0,0 +1,74 @@
+# app/routers/reportes.py
+from datetime import date
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.config import settings
+from app.core.fastjson import FastJSONResponse
+from app.core.ocupacion import TABLE
+from app.db import get_async_session
+from app.models import OcupacionRead
+
+router = APIRouter(prefix="/reportes", tags=["reportes"])
+
+# ---------- Ocupación ----------
+# Se lee del resumen materializado (app.core.ocupacion): una fila por día,
+# bloque horario y valor de la dimensión, en lugar de recorrer la tabla turno.
+DETALLES = {
+    "hora": [TABLE.c.fecha, TABLE.c.hora],
+    "dia": [TABLE.c.fecha],
+    "franja": [TABLE.c.hora],  # perfil por hora del día sumando todo el rango
+    "total": [],
+}
+# dimensión -> (columna del resumen, clave en la respuesta)
+AGRUPADO = {
+    "sucursal": (TABLE.c.sucursal_id, "sucursal_id"),
+    "servicio": (TABLE.c.valor, "servicio_id"),
+    "trabajador": (TABLE.c.valor, "asignadoA"),
+}
+
+def _valor(clave: str, valor):
+    # centinelas del resumen ('' / 0 = sin servicio, sin asignar, sin sucursal) -> null
+    if valor in ("", 0):
+        return None
+    return int(valor) if clave == "servicio_id" else valor
+
+@router.get("/ocupacion", response_model=List[OcupacionRead])
+async def ocupacion(
+    desde: date,
+    hasta: date,
+    por: str = Query("sucursal", regex="^(sucursal|servicio|trabajador)$"),
+    detalle: str = Query("hora", regex="^(hora|dia|franja|total)$"),
+    sucursal_id: Optional[int] = None,
+    session: AsyncSession = Depends(get_async_session),
+):
+    """Turnos entre `desde` y `hasta` (inclusive) por sucursal, servicio o trabajador (`por`),
+    con el detalle temporal pedido: por día y hora, por día, por franja horaria o total."""
+    if hasta < desde:
+        raise HTTPException(422, "hasta debe ser posterior a desde")
+    if (hasta - desde).days >= settings.REPORTE_MAX_DIAS:
+        raise HTTPException(422, f"Máximo {settings.REPORTE_MAX_DIAS} días por consulta")
+
+    dimension, clave = AGRUPADO[por]
+    columns = DETALLES[detalle] + [dimension]
+    cantidad = func.sum(TABLE.c.cantidad)
+    query = (
+        select(*columns, cantidad)
+        .where(TABLE.c.dimension == por, TABLE.c.fecha >= desde, TABLE.c.fecha <= hasta)
+        .group_by(*columns)
+        .having(cantidad > 0)
+        .order_by(*columns)
+    )
+    if sucursal_id is not None:
+        query = query.where(TABLE.c.sucursal_id == sucursal_id)
+
+    keys = [str(c.name) for c in DETALLES[detalle]]
+    result = []
+    for row in (await session.exec(query)).all():
+        item = dict(zip(keys, row))
+        item[clave] = _valor(clave, row[-2])
+        item["cantidad"] = row[-1]
+        result.append(item)
+    return FastJSONResponse(result)
@@ -0,0 +1,38 @@
+# app/routers/search.py
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core import search
+from app.core.fastjson import FastJSONResponse
+from app.db import get_async_session
+from app.models import SearchResult
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+# ---------- Búsqueda ----------
+# Sobre el índice FTS5 (app.core.search): clientes de turnos, servicios,
+# sucursales y usuarios, ordenados por relevancia.
+@router.get("", response_model=List[SearchResult])
+async def buscar(
+    q: str = Query(..., description=f"Palabras a buscar (al menos {search.MIN_TERM} caracteres cada una)"),
+    tipo: Optional[str] = Query(None, description=f"Tipos separados por coma: {', '.join(search.TIPOS)}"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    session: AsyncSession = Depends(get_async_session),
+):
+    expression = search.terms(q)
+    if expression is None:
+        raise HTTPException(422, f"La búsqueda necesita al menos una palabra de {search.MIN_TERM} caracteres")
+    tipos = search.TIPOS
+    if tipo:
+        tipos = [t.strip() for t in tipo.split(",") if t.strip()]
+        desconocidos = [t for t in tipos if t not in search.FUENTES]
+        if desconocidos:
+            raise HTTPException(422, f"tipo no válido: {', '.join(desconocidos)} (opciones: {', '.join(search.TIPOS)})")
+
+    rows = (await session.exec(search.query(expression, tipos, skip, limit))).all()
+    resultados = []
+    for rowid, titulo, detalle, puntaje in rows:
+        t, ref = search.tipo_id(rowid)
+        resultados.append({"tipo": t, "id": ref, "titulo": titulo, "detalle": detalle, "puntaje": puntaje})
+    return FastJSONResponse(resultados)
@@ -1,35 +1,55 @@
-from fastapi import APIRouter, HTTPException, Query, Depends
-from sqlmodel import Session, select
-from ... db import get_session
+from fastapi import APIRouter, HTTPException, Query, Depends, Request
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from ... db import get_async_session
 from ...models import Servicio, ServicioRead
 from typing import List, Optional   
+from ...core import cluster, search
+from ...core.catalog_cache import catalog_response, servicios_cache
 
 router = APIRouter(prefix='/servicios', tags=['servicios'])
 
 @router.post('/', status_code=201)
-def create_servicio(payload: dict):
+async def create_servicio(payload: dict, session: AsyncSession = Depends(get_async_session)):
     nombre = payload.get('nombre')
     descripcion = payload.get('descripcion')
-    with Session(db.engine) as session:
-        s = Servicio(nombre=nombre, descripcion=descripcion)
-        session.add(s)
-        session.commit()
-        session.refresh(s)
-        return s
+    s = Servicio(
+        nombre=nombre,
+        descripcion=descripcion,
+        duracion_min=payload.get('duracion_min', 30),
+        capacidad=payload.get('capacidad'),
+    )
+    session.add(s)
+    await session.commit()
+    await session.refresh(s)
+    servicios_cache.invalidate()
+    return s
 
 @router.get("/servicios", response_model=List[ServicioRead])
-def listar_servicios(
+async def listar_servicios(
+    request: Request,
     skip: int = 0,
     limit: int = Query(10, le=100),  # máximo 100 por página
     order_by: Optional[str] = Query(None, regex="^(nombre|id)$"),
     nombre: Optional[str] = None,
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
+    # catálogo cacheado ya serializado; con If-None-Match vigente responde 304
+    return await catalog_response(
+        request, servicios_cache, (skip, limit, order_by, nombre),
+        lambda: _listar_servicios(session, skip, limit, order_by, nombre),
+    )
+
+async def _listar_servicios(session: AsyncSession, skip: int, limit: int, order_by: Optional[str], nombre: Optional[str]):
     query = select(Servicio)
 
     # Filtrar por nombre
     if nombre:
-        query = query.where(Servicio.nombre.contains(nombre))
+        expression = search.phrase(nombre)
+        if expression:
+            query = query.where(Servicio.id.in_(search.ids("servicio", expression)))
+        else:
+            query = query.where(Servicio.nombre.contains(nombre))
 
     # Orden dinámico
     if order_by:
@@ -38,35 +58,42 @@ def listar_servicios(
     # Paginación
     query = query.offset(skip).limit(limit)
 
-    return session.exec(query).all()
+    return [ServicioRead.from_orm(s) for s in (await session.exec(query)).all()]
 
 @router.get('/{servicio_id}')
-def get_servicio(servicio_id: int):
-    with Session(db.engine) as session:
-        s = session.get(Servicio, servicio_id)
-        if not s:
-            raise HTTPException(status_code=404, detail='Servicio not found')
-        return s
+async def get_servicio(servicio_id: int, session: AsyncSession = Depends(get_async_session)):
+    s = await session.get(Servicio, servicio_id)
+    if not s:
+        raise HTTPException(status_code=404, detail='Servicio not found')
+    return s
 
 @router.put('/{servicio_id}')
-def update_servicio(servicio_id: int, payload: dict):
-    with Session(db.engine) as session:
-        s = session.get(Servicio, servicio_id)
-        if not s:
-            raise HTTPException(status_code=404, detail='Servicio not found')
-        s.nombre = payload.get('nombre', s.nombre)
-        s.descripcion = payload.get('descripcion', s.descripcion)
-        session.add(s)
-        session.commit()
-        session.refresh(s)
-        return s
+async def update_servicio(servicio_id: int, payload: dict, session: AsyncSession = Depends(get_async_session)):
+    s = await session.get(Servicio, servicio_id)
+    if not s:
+        raise HTTPException(status_code=404, detail='Servicio not found')
+    antes = (s.duracion_min, s.capacidad)
+    s.nombre = payload.get('nombre', s.nombre)
+    s.descripcion = payload.get('descripcion', s.descripcion)
+    s.duracion_min = payload.get('duracion_min', s.duracion_min)
+    s.capacidad = payload.get('capacidad', s.capacidad)
+    cambia_ocupacion = (s.duracion_min, s.capacidad) != antes
+    session.add(s)
+    await session.commit()
+    await session.refresh(s)
+    servicios_cache.invalidate()
+    # el índice de disponibilidad guarda los turnos con la duración de su servicio
+    if cambia_ocupacion:
+        await cluster.invalidate_availability()
+    return s
 
 @router.delete('/{servicio_id}', status_code=204)
-def delete_servicio(servicio_id: int):
-    with Session(db.engine) as session:
-        s = session.get(Servicio, servicio_id)
-        if not s:
-            raise HTTPException(status_code=404, detail='Servicio not found')
-        session.delete(s)
-        session.commit()
-        return None
+async def delete_servicio(servicio_id: int, session: AsyncSession = Depends(get_async_session)):
+    s = await session.get(Servicio, servicio_id)
+    if not s:
+        raise HTTPException(status_code=404, detail='Servicio not found')
+    await session.delete(s)
+    await session.commit()
+    servicios_cache.invalidate()
+    await cluster.invalidate_availability()  # sus turnos pasan a la duración por defecto
+    return None
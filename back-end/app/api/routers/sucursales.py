@@ -1,29 +1,127 @@
 # app/routers/sucursales.py
-from fastapi import APIRouter, HTTPException
-from sqlmodel import Session, select
-from app.db import engine
-from app.models import Sucursal, SucursalCreate, SucursalRead
+import asyncio
+from datetime import date
+from typing import AsyncIterator, List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.api.routers.turnos import TURNO_READ_COLUMNS, TURNO_READ_KEYS
+from app.core import cluster
+from app.core.availability import availability
+from app.core.catalog_cache import catalog_response, sucursales_cache
+from app.core.config import settings
+from app.core.events import PING, RESYNC, Subscription, sse_frame, turno_events
+from app.core.fastjson import dumps, rows_to_dicts
+from app.db import AsyncSessionLocal, get_async_session
+from app.models import Servicio, Sucursal, SucursalCreate, SucursalRead, Turno
 
 router = APIRouter(prefix="/sucursales", tags=["sucursales"])
 
 @router.get("/", response_model=list[SucursalRead])
-def list_sucursales():
-    with Session(engine) as session:
-        return session.exec(select(Sucursal)).all()
+async def list_sucursales(request: Request, session: AsyncSession = Depends(get_async_session)):
+    async def cargar():
+        return [SucursalRead.from_orm(s) for s in (await session.exec(select(Sucursal))).all()]
+    return await catalog_response(request, sucursales_cache, "all", cargar)
 
 @router.post("/", response_model=SucursalRead)
-def create_sucursal(payload: SucursalCreate):
-    with Session(engine) as session:
-        suc = Sucursal.from_orm(payload)
-        session.add(suc)
-        session.commit()
-        session.refresh(suc)
-        return suc
+async def create_sucursal(payload: SucursalCreate, session: AsyncSession = Depends(get_async_session)):
+    suc = Sucursal.from_orm(payload)
+    session.add(suc)
+    await session.commit()
+    await session.refresh(suc)
+    sucursales_cache.invalidate()
+    return suc
 
 @router.get("/{sucursal_id}", response_model=SucursalRead)
-def get_sucursal(sucursal_id: int):
-    with Session(engine) as session:
-        s = session.get(Sucursal, sucursal_id)
-        if not s:
+async def get_sucursal(sucursal_id: int, session: AsyncSession = Depends(get_async_session)):
+    s = await session.get(Sucursal, sucursal_id)
+    if not s:
+        raise HTTPException(404, "Sucursal no encontrada")
+    return s
+
+# ---------- Disponibilidad ----------
+class SlotRead(SQLModel):
+    hora: str
+    disponibles: int
+
+@router.get("/{sucursal_id}/disponibilidad", response_model=List[SlotRead])
+async def disponibilidad(
+    sucursal_id: int,
+    fecha: date,
+    servicio_id: Optional[int] = None,
+    session: AsyncSession = Depends(get_async_session),
+):
+    s = await session.get(Sucursal, sucursal_id)
+    if not s:
+        raise HTTPException(404, "Sucursal no encontrada")
+    servicio = None
+    if servicio_id is not None:
+        servicio = await session.get(Servicio, servicio_id)
+        if not servicio:
+            raise HTTPException(404, "Servicio no encontrado")
+    await cluster.sync_availability(session)
+    return await availability.free_slots(session, s, servicio, fecha)
+
+# ---------- Pantallas en vivo ----------
+# Las pantallas de sucursal dejan de sondear GET /turnos: reciben una foto al
+# conectar y después un evento por cambio (created, assigned, moved, deleted)
+# y un `reminder` antes de cada turno (tarea recordatorio de app.core.tareas).
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+async def _eventos(request: Request, sub: Subscription, inicio: List[bytes]) -> AsyncIterator[bytes]:
+    try:
+        yield b"retry: 3000\n\n"
+        for frame in inicio:
+            yield frame
+        while True:
+            try:
+                frame = await asyncio.wait_for(sub.queue.get(), settings.STREAM_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    return
+                frame = PING
+            if frame is None:  # apagado del servidor
+                return
+            yield frame
+            if frame is RESYNC:  # al reconectar recibe lo perdido o una foto nueva
+                return
+    finally:
+        turno_events.unsubscribe(sub)
+
+@router.get("/{sucursal_id}/stream")
+async def stream_sucursal(
+    sucursal_id: int,
+    request: Request,
+    fecha: Optional[date] = None,
+    last_event_id: Optional[str] = Header(None),
+):
+    """Server-Sent Events con los cambios de turnos de la sucursal para `fecha` (hoy por defecto).
+
+    Primero llega `snapshot` con los turnos del día; tras reconectar con
+    Last-Event-ID se reenvían solo los eventos perdidos si siguen en memoria.
+    Un evento `resync` pide volver a conectar para recibir una foto nueva.
+    """
+    fecha = fecha or date.today()
+    # sesión propia y corta: el stream no retiene una conexión del pool
+    async with AsyncSessionLocal() as session:
+        if not await session.get(Sucursal, sucursal_id):
             raise HTTPException(404, "Sucursal no encontrada")
-        return s
+        # suscripto antes de leer la foto: lo que cambie mientras tanto queda en la cola
+        sub = turno_events.subscribe(sucursal_id, fecha)
+        if sub is None:
+            raise HTTPException(503, "Demasiadas pantallas conectadas", headers={"Retry-After": "30"})
+        inicio = turno_events.replay_since(sub, last_event_id) if last_event_id else None
+        if inicio is None:
+            snapshot_id = turno_events.last_id()
+            try:
+                rows = (await session.exec(
+                    select(*TURNO_READ_COLUMNS)
+                    .where(Turno.sucursal_id == sucursal_id, Turno.fecha == fecha)
+                    .order_by(Turno.hora, Turno.id)
+                )).all()
+            except BaseException:
+                turno_events.unsubscribe(sub)
+                raise
+            inicio = [sse_frame(snapshot_id, "snapshot", dumps(rows_to_dicts(TURNO_READ_KEYS, rows)))]
+    return StreamingResponse(_eventos(request, sub, inicio), media_type="text/event-stream", headers=SSE_HEADERS)
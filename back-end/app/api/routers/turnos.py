@@ -1,81 +1,618 @@
 # app/routers/turnos.py
-from fastapi import APIRouter, HTTPException
-from sqlmodel import SQLModel, Field, Session, select
-from app.db import engine
-from app.models import Turno, TurnoCreate, TurnoRead
+import csv
+import hashlib
+import io
+from datetime import date, datetime, timedelta
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Union
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import func, insert
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm.exc import StaleDataError
+from sqlmodel import SQLModel, Field, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.db import AsyncSessionLocal, get_async_session
+from app.models import (
+    IdempotencyKey, Servicio, ServicioRead, Sucursal, SucursalRead, Turno, TurnoArchivado, TurnoArchivadoRead,
+    TurnoCreate, TurnoRead, TurnoReadWithRelations, User, UserRead,
+)
+from app.core import ocupacion
+from app.core.availability import availability
+from app.core.config import settings
+from app.core.events import turno_events
+from app.core.fastjson import FastJSONResponse, dumps, rows_to_dicts
+from app.core.http_cache import not_modified, weak_etag
+from app.core.pagination import decode_cursor, encode_cursor, keyset_filter, turno_total
+from app.core.writer import WriteBatch, turno_writer
 
 router = APIRouter(prefix="/turnos", tags=["turnos"])
 
+async def _encolar_recordatorios(batch: WriteBatch, turnos: List[Tuple[int, Optional[datetime]]]):
+    # tareas (y jobs) se importan con el primer recordatorio, no al arrancar
+    from app.core.tareas import encolar_recordatorios
+
+    await encolar_recordatorios(batch, turnos)
+
+# ---------- Eventos para las pantallas (/sucursales/{id}/stream) ----------
+def _publicar(batch: WriteBatch, evento: str, t: Turno, *sucursales: Optional[int]):
+    # al confirmar: el turno ya tiene id y versión definitivos
+    def publicar():
+        data = TurnoRead.from_orm(t).dict()
+        turno_events.publish(evento, data, sucursales or (t.sucursal_id,), t.fecha)
+    batch.on_commit(publicar)
+
 # ---------- Crear ----------
+async def _sucursal_servicio(session: AsyncSession, sucursal_id: int, servicio_id: Optional[int]):
+    sucursal = await session.get(Sucursal, sucursal_id)
+    if not sucursal:
+        raise HTTPException(404, "Sucursal no encontrada")
+    servicio = await session.get(Servicio, servicio_id) if servicio_id is not None else None
+    if servicio_id is not None and not servicio:
+        raise HTTPException(404, "Servicio no encontrado")
+    return sucursal, servicio
+
+async def _guardar_con_reserva(batch: WriteBatch, turno: Turno):
+    # el escritor único serializa comprobar y guardar: es atómico en el proceso
+    session = batch.session
+    sucursal, servicio = await _sucursal_servicio(session, turno.sucursal_id, turno.servicio_id)
+    temp = availability.temp_id()
+    day = await availability.reserve(session, temp, sucursal, servicio, turno.fecha, turno.hora)
+    batch.on_rollback(lambda: day.remove(temp))
+    session.add(turno)
+    await session.flush()
+    batch.on_commit(lambda: day.rekey(temp, turno.id))
+
+async def _turno_idempotente(session: AsyncSession, key: str, fingerprint: str) -> Optional[Turno]:
+    registro = await session.get(IdempotencyKey, key)
+    if registro is None:
+        return None
+    vencida = registro.created_at < datetime.utcnow() - timedelta(hours=settings.IDEMPOTENCY_TTL_HOURS)
+    turno = await session.get(Turno, registro.turno_id) if registro.turno_id is not None else None
+    if vencida or turno is None:
+        await session.delete(registro)
+        await session.commit()
+        return None
+    if registro.fingerprint != fingerprint:
+        raise HTTPException(422, "Idempotency-Key ya usada con otro contenido")
+    return turno
+
 @router.post("/", response_model=TurnoRead)
-def create_turno(payload: TurnoCreate):
-    with Session(engine) as session:
-        turno = Turno.from_orm(payload)
-        session.add(turno)
-        session.commit()
-        session.refresh(turno)
+async def create_turno(
+    payload: TurnoCreate,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, max_length=255),
+    session: AsyncSession = Depends(get_async_session),
+):
+    # un reintento con la misma Idempotency-Key devuelve el turno ya creado
+    if idempotency_key:
+        fingerprint = hashlib.sha256(payload.json().encode()).hexdigest()
+        existing = await _turno_idempotente(session, idempotency_key, fingerprint)
+        if existing:
+            response.headers["Idempotent-Replayed"] = "true"
+            return existing
+
+    turno = Turno.from_orm(payload)
+
+    async def crear(batch: WriteBatch) -> Turno:
+        if turno.fecha is not None and turno.sucursal_id is not None:
+            await _guardar_con_reserva(batch, turno)
+        else:
+            batch.session.add(turno)
+        if idempotency_key:
+            batch.session.add(IdempotencyKey(key=idempotency_key, fingerprint=fingerprint, turno=turno))
+        if turno.inicio is not None:
+            await batch.session.flush()
+            await _encolar_recordatorios(batch, [(turno.id, turno.inicio)])
+        batch.on_commit(lambda: turno_total.add(1))
+        _publicar(batch, "created", turno)
         return turno
 
+    try:
+        return await turno_writer.submit(crear)
+    except IntegrityError:
+        if not idempotency_key:
+            raise
+        # otra solicitud con la misma clave se adelantó; se relee fuera de la lectura previa
+        await session.rollback()
+        existing = await _turno_idempotente(session, idempotency_key, fingerprint)
+        if existing is None:
+            raise
+        response.headers["Idempotent-Replayed"] = "true"
+        return existing
+
+# ---------- Carga masiva ----------
+class BulkError(SQLModel):
+    index: int
+    detail: str
+
+class TurnoBulkResult(SQLModel):
+    ids: List[int] = []
+    errors: List[BulkError] = []
+
+# FKs que se validan contra la base en una sola consulta por tabla
+_FK_MODELS = {"servicio_id": Servicio, "user_id": User, "sucursal_id": Sucursal}
+
+def _chunks(items: list, size: int):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def _check_bulk_size(rows: list):
+    if len(rows) > settings.BULK_MAX_ROWS:
+        raise HTTPException(413, f"Máximo {settings.BULK_MAX_ROWS} filas por solicitud")
+
+async def _load_by_id(session: AsyncSession, model, ids: set) -> dict:
+    if not ids:
+        return {}
+    result = await session.exec(select(model).where(model.id.in_(ids)))
+    return {obj.id: obj for obj in result.all()}
+
+async def _insert_chunk(session: AsyncSession, rows: List[dict]) -> List[int]:
+    conn = await session.connection()
+    table = Turno.__table__
+    # el insert por Core no dispara los eventos del ORM que mantienen el resumen
+    await conn.run_sync(ocupacion.add_rows, rows)
+    if conn.dialect.name != "sqlite":
+        result = await conn.execute(insert(table).values(rows).returning(table.c.id))
+        return [row[0] for row in result]
+    # SQLite sin RETURNING: executemany y, con el lock de escritura ya tomado
+    # por esta transacción, los últimos len(rows) ids son los insertados
+    await conn.execute(insert(table), rows)
+    result = await conn.execute(select(table.c.id).order_by(table.c.id.desc()).limit(len(rows)))
+    return sorted(row[0] for row in result)
+
+def _bulk_insert_job(chunk: list, loaded: dict, rechazadas: List[BulkError]):
+    async def job(batch: WriteBatch):
+        del rechazadas[:]  # el escritor puede reintentar el trabajo
+        accepted, reserved = [], {}
+        for index, t in chunk:
+            if t.fecha is not None and t.sucursal_id is not None:
+                temp = availability.temp_id()
+                try:
+                    day = await availability.reserve(
+                        batch.session, temp, loaded["sucursal_id"][t.sucursal_id],
+                        loaded["servicio_id"].get(t.servicio_id), t.fecha, t.hora,
+                    )
+                except HTTPException as exc:
+                    rechazadas.append(BulkError(index=index, detail=exc.detail))
+                    continue
+                batch.on_rollback(lambda day=day, temp=temp: day.remove(temp))
+                reserved[index] = (day, temp)
+            accepted.append((index, t))
+        if not accepted:
+            return []
+        ids = await _insert_chunk(batch.session, [t.dict() for _, t in accepted])
+        await _encolar_recordatorios(batch, [(turno_id, t.inicio) for (_, t), turno_id in zip(accepted, ids)])
+
+        def confirmar():
+            for (index, t), turno_id in zip(accepted, ids):
+                if index in reserved:
+                    day, temp = reserved[index]
+                    day.rekey(temp, turno_id)
+                data = TurnoRead(**t.dict(), id=turno_id).dict()
+                turno_events.publish("created", data, (t.sucursal_id,), t.fecha)
+            turno_total.add(len(ids))
+        batch.on_commit(confirmar)
+        return ids
+    return job
+
+@router.post("/bulk", response_model=TurnoBulkResult)
+async def create_turnos_bulk(rows: List[dict] = Body(...), session: AsyncSession = Depends(get_async_session)):
+    _check_bulk_size(rows)
+    result = TurnoBulkResult()
+
+    # 1) validación de todas las filas en una pasada
+    valid: List[tuple] = []
+    for index, row in enumerate(rows):
+        try:
+            valid.append((index, TurnoCreate.parse_obj(row)))
+        except ValidationError as exc:
+            result.errors.append(BulkError(index=index, detail=str(exc)))
+
+    # 2) FKs inexistentes, una consulta por tabla
+    loaded = {}
+    for field, model in _FK_MODELS.items():
+        wanted = {getattr(t, field) for _, t in valid if getattr(t, field) is not None}
+        loaded[field] = await _load_by_id(session, model, wanted)
+        missing = wanted - loaded[field].keys()
+        if missing:
+            for index, t in valid:
+                if getattr(t, field) in missing:
+                    result.errors.append(BulkError(index=index, detail=f"{field} {getattr(t, field)} no existe"))
+            valid = [(i, t) for i, t in valid if getattr(t, field) not in missing]
+
+    # 3) y 4) por lotes en el escritor: reserva de franjas en orden (también
+    # chocan filas del mismo lote) e inserción, un trabajo por lote
+    for chunk in _chunks(valid, settings.BULK_CHUNK_SIZE):
+        rechazadas: List[BulkError] = []
+        try:
+            ids = await turno_writer.submit(_bulk_insert_job(chunk, loaded, rechazadas))
+        except SQLAlchemyError as exc:
+            detail = str(getattr(exc, "orig", None) or exc)
+            result.errors.extend(rechazadas)
+            taken = {e.index for e in rechazadas}
+            result.errors.extend(BulkError(index=index, detail=detail) for index, _ in chunk if index not in taken)
+            continue
+        result.errors.extend(rechazadas)
+        result.ids.extend(ids)
+
+    result.errors.sort(key=lambda e: e.index)
+    return result
+
 # ---------- Listar ----------
-@router.get("/", response_model=list[TurnoRead])
-def list_turnos():
-    with Session(engine) as session:
-        return session.exec(select(Turno)).all()
+# Sin limit/cursor devuelve la tabla completa (compatibilidad); con ellos pagina
+# por keyset sobre (id) o (hora, id) y deja el siguiente cursor en X-Next-Cursor.
+KEYSET_ORDERS = {
+    "id": (Turno.id,),
+    "hora": (Turno.hora, Turno.id),
+}
+# tipo de cada valor del cursor, en el orden de las columnas
+KEYSET_TYPES = {
+    "id": (int,),
+    "hora": (str, int),
+}
+
+# Camino rápido: solo las columnas de TurnoRead como tuplas, codificadas a bytes
+# sin hidratar objetos ORM ni validar cada fila contra response_model
+TURNO_READ_KEYS = list(TurnoRead.__fields__)
+TURNO_READ_COLUMNS = [Turno.__table__.c[key] for key in TURNO_READ_KEYS]
+
+# ?include=servicio,sucursal,user: igual que selectinload, una consulta IN por
+# relación pedida (no una por turno), pero sobre tuplas con las columnas del
+# modelo de lectura anidado; user sale de UserRead, sin hashed_password.
+INCLUDES = {
+    "servicio": ("servicio_id", Servicio, ServicioRead),
+    "sucursal": ("sucursal_id", Sucursal, SucursalRead),
+    "user": ("user_id", User, UserRead),
+}
+INCLUDE_DESCRIPTION = f"Relaciones a embeber, separadas por coma: {', '.join(INCLUDES)}"
+INCLUDE_CHUNK = 500  # límite de parámetros del IN; con paginación (limit <= 500) es una sola consulta
+
+def _parse_include(include: Optional[str]) -> List[str]:
+    if not include:
+        return []
+    names = list(dict.fromkeys(n.strip() for n in include.split(",") if n.strip()))
+    desconocidas = [n for n in names if n not in INCLUDES]
+    if desconocidas:
+        raise HTTPException(422, f"include no válido: {', '.join(desconocidas)} (opciones: {', '.join(INCLUDES)})")
+    return names
+
+async def _embed(session: AsyncSession, items: List[dict], include: List[str]) -> List[dict]:
+    for name in include:
+        fk, model, read = INCLUDES[name]
+        keys = list(read.__fields__)
+        table = model.__table__
+        query = select(*[table.c[k] for k in keys])
+        ids = sorted({item[fk] for item in items if item[fk] is not None})
+        related = {}
+        for chunk in _chunks(ids, INCLUDE_CHUNK):
+            for row in (await session.exec(query.where(table.c.id.in_(chunk)))).all():
+                related[row.id] = dict(zip(keys, row))
+        for item in items:
+            item[name] = related.get(item[fk])
+    return items
+
+# ETag del cuerpo codificado: (id, version) no alcanza porque SQLite reutiliza
+# el id más alto tras un borrado y version vuelve a 1, y las relaciones
+# embebidas cambian sin tocar el turno. Un 304 ahorra los bytes, no la consulta.
+def _turnos_response(request: Request, items: List[dict], headers: dict) -> Response:
+    body = dumps(items)
+    headers["ETag"] = weak_etag("turnos", body, sorted(headers.items()))
+    return not_modified(request, headers["ETag"], headers) or FastJSONResponse(body, headers=headers)
+
+@router.get("/", response_model=list[TurnoReadWithRelations])
+async def list_turnos(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = None,
+    order_by: str = Query("id", regex="^(id|hora)$"),
+    exact_count: bool = False,
+    include: Optional[str] = Query(None, description=INCLUDE_DESCRIPTION),
+    session: AsyncSession = Depends(get_async_session),
+):
+    relaciones = _parse_include(include)
+    if limit is None and cursor is None:
+        rows = (await session.exec(select(*TURNO_READ_COLUMNS))).all()
+        items = await _embed(session, rows_to_dicts(TURNO_READ_KEYS, rows), relaciones)
+        return _turnos_response(request, items, {})
+
+    limit = limit or 50
+    columns = KEYSET_ORDERS[order_by]
+    query = select(*TURNO_READ_COLUMNS).order_by(*columns)
+    if cursor:
+        values = decode_cursor(cursor, order_by, KEYSET_TYPES[order_by])
+        query = query.where(keyset_filter(columns, values))
+
+    # se pide una fila extra para saber si hay página siguiente
+    rows = (await session.exec(query.limit(limit + 1))).all()
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        headers["X-Next-Cursor"] = encode_cursor(order_by, [getattr(last, c.key) for c in columns])
+
+    total = None if exact_count else turno_total.peek()
+    if total is None:
+        total = turno_total.store((await session.exec(select(func.count()).select_from(Turno))).one())
+    headers["X-Total-Count"] = str(total)
+    items = await _embed(session, rows_to_dicts(TURNO_READ_KEYS, rows), relaciones)
+    return _turnos_response(request, items, headers)
+
+# ---------- Exportar ----------
+# Se recorre con cursor del servidor y se emite por lotes: la memoria no depende
+# del tamaño de la tabla. La sesión es propia porque vive lo que dure el stream.
+EXPORT_COLUMNS = [str(c.name) for c in Turno.__table__.columns]  # str: orjson no acepta subclases como clave
+
+def _export_filters(
+    sucursal_id: Optional[int],
+    servicio_id: Optional[int],
+    asignadoA: Optional[str],
+    hora_desde: Optional[str],
+    hora_hasta: Optional[str],
+) -> list:
+    table = Turno.__table__
+    filters = []
+    if sucursal_id is not None:
+        filters.append(table.c.sucursal_id == sucursal_id)
+    if servicio_id is not None:
+        filters.append(table.c.servicio_id == servicio_id)
+    if asignadoA is not None:
+        filters.append(table.c.asignadoA == asignadoA)
+    if hora_desde is not None:
+        filters.append(table.c.hora >= hora_desde)
+    if hora_hasta is not None:
+        filters.append(table.c.hora <= hora_hasta)
+    return filters
+
+def _encode_ndjson(rows) -> bytes:
+    return b"".join(dumps(dict(zip(EXPORT_COLUMNS, row))) + b"\n" for row in rows)
+
+def _encode_csv(rows) -> str:
+    buf = io.StringIO()
+    csv.writer(buf).writerows(rows)
+    return buf.getvalue()
+
+async def _stream_turnos(filters: list, fmt: str) -> AsyncIterator[Union[str, bytes]]:
+    encode = _encode_csv if fmt == "csv" else _encode_ndjson
+    if fmt == "csv":
+        yield _encode_csv([EXPORT_COLUMNS])
+    table = Turno.__table__
+    query = select(*table.columns).where(*filters).order_by(table.c.id)
+    async with AsyncSessionLocal() as session:
+        result = await session.stream(
+            query.execution_options(stream_results=True, yield_per=settings.EXPORT_BATCH_SIZE)
+        )
+        async for rows in result.partitions(settings.EXPORT_BATCH_SIZE):
+            yield encode(rows)
+
+@router.get("/export")
+async def export_turnos(
+    format: str = Query("ndjson", regex="^(ndjson|csv)$"),
+    sucursal_id: Optional[int] = None,
+    servicio_id: Optional[int] = None,
+    asignadoA: Optional[str] = None,
+    hora_desde: Optional[str] = Query(None, description="HH:MM inclusive"),
+    hora_hasta: Optional[str] = Query(None, description="HH:MM inclusive"),
+):
+    filters = _export_filters(sucursal_id, servicio_id, asignadoA, hora_desde, hora_hasta)
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        _stream_turnos(filters, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="turnos.{format}"'},
+    )
+
+# ---------- Archivo ----------
+# Turnos ya pasados que app.core.archivo sacó de turno. Se pagina por keyset
+# sobre (fecha, id), el orden de los índices de turno_archivo.
+ARCHIVO_READ_KEYS = list(TurnoArchivadoRead.__fields__)
+ARCHIVO_COLUMNS = [TurnoArchivado.__table__.c[key] for key in ARCHIVO_READ_KEYS]
+ARCHIVO_ORDER = (TurnoArchivado.__table__.c.fecha, TurnoArchivado.__table__.c.id)
+
+@router.get("/archivo", response_model=List[TurnoArchivadoRead])
+async def list_archivo(
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    sucursal_id: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(get_async_session),
+):
+    table = TurnoArchivado.__table__
+    query = select(*ARCHIVO_COLUMNS).order_by(*ARCHIVO_ORDER)
+    if desde is not None:
+        query = query.where(table.c.fecha >= desde)
+    if hasta is not None:
+        query = query.where(table.c.fecha <= hasta)
+    if sucursal_id is not None:
+        query = query.where(table.c.sucursal_id == sucursal_id)
+    if cursor:
+        fecha, turno_id = decode_cursor(cursor, "archivo", (str, int))
+        try:
+            fecha = date.fromisoformat(fecha)
+        except (TypeError, ValueError):
+            raise HTTPException(400, "Cursor inválido")
+        query = query.where(keyset_filter(ARCHIVO_ORDER, (fecha, turno_id)))
+
+    rows = (await session.exec(query.limit(limit + 1))).all()
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        headers["X-Next-Cursor"] = encode_cursor("archivo", [rows[-1].fecha.isoformat(), rows[-1].id])
+    return FastJSONResponse(rows_to_dicts(ARCHIVO_READ_KEYS, rows), headers=headers)
 
 # ---------- Obtener por id ----------
-@router.get("/{turno_id}", response_model=TurnoRead)
-def get_turno(turno_id: int):
-    with Session(engine) as session:
-        t = session.get(Turno, turno_id)
-        if not t:
-            raise HTTPException(404, "Turno no encontrado")
-        return t
+@router.get("/{turno_id}", response_model=TurnoReadWithRelations)
+async def get_turno(
+    turno_id: int,
+    include: Optional[str] = Query(None, description=INCLUDE_DESCRIPTION),
+    session: AsyncSession = Depends(get_async_session),
+):
+    relaciones = _parse_include(include)
+    row = (await session.exec(select(*TURNO_READ_COLUMNS).where(Turno.id == turno_id))).first()
+    if row is None:
+        raise HTTPException(404, "Turno no encontrado")
+    items = await _embed(session, rows_to_dicts(TURNO_READ_KEYS, [row]), relaciones)
+    return FastJSONResponse(items[0])
 
 # ---------- Asignar trabajador ----------
+VERSION_CONFLICT = "El turno fue modificado por otra solicitud; vuelva a leerlo"
+
 class AsignarPayload(SQLModel):
     trabajador: str = Field(description="Nombre/ID del trabajador")
+    version: Optional[int] = Field(default=None, description="Versión leída; si ya cambió responde 409")
+
+def _check_version(t: Turno, expected: Optional[int]):
+    if expected is not None and t.version != expected:
+        raise HTTPException(409, VERSION_CONFLICT)
+
+async def _escribir(job):
+    # el UPDATE lleva WHERE version = <leída>; si no tocó filas otro proceso escribió antes
+    try:
+        return await turno_writer.submit(job)
+    except StaleDataError:
+        raise HTTPException(409, VERSION_CONFLICT)
+
+async def _turno_o_404(session: AsyncSession, turno_id: int) -> Turno:
+    t = await session.get(Turno, turno_id)
+    if not t:
+        raise HTTPException(404, "Turno no encontrado")
+    return t
+
+def _aplicar_asignacion(t: Turno, trabajador: Optional[str] = None, sucursal_id: Optional[int] = None):
+    if trabajador is not None:
+        t.asignadoA = trabajador
+    if sucursal_id is not None:
+        t.sucursal_id = sucursal_id
 
 @router.put("/{turno_id}/asignar", response_model=TurnoRead)
-def asignar_turno(turno_id: int, payload: AsignarPayload):
-    with Session(engine) as session:
-        t = session.get(Turno, turno_id)
-        if not t:
-            raise HTTPException(404, "Turno no encontrado")
-        t.asignadoA = payload.trabajador
-        session.add(t)
-        session.commit()
-        session.refresh(t)
+async def asignar_turno(turno_id: int, payload: AsignarPayload):
+    async def asignar(batch: WriteBatch) -> Turno:
+        t = await _turno_o_404(batch.session, turno_id)
+        _check_version(t, payload.version)
+        _aplicar_asignacion(t, trabajador=payload.trabajador)
+        _publicar(batch, "assigned", t)
         return t
+    return await _escribir(asignar)
 
 # ---------- Eliminar ----------
 @router.delete("/{turno_id}", status_code=204)
-def delete_turno(turno_id: int):
-    with Session(engine) as session:
-        t = session.get(Turno, turno_id)
-        if not t:
-            raise HTTPException(404, "Turno no encontrado")
-        session.delete(t)
-        session.commit()
-        return
+async def delete_turno(turno_id: int):
+    async def eliminar(batch: WriteBatch):
+        t = await _turno_o_404(batch.session, turno_id)
+        await batch.session.delete(t)
 
-from sqlmodel import SQLModel, Field
+        def confirmar():
+            turno_total.add(-1)
+            availability.discard(t.id, t.sucursal_id, t.fecha)
+        batch.on_commit(confirmar)
+        _publicar(batch, "deleted", t)
+    await turno_writer.submit(eliminar)
+    return
 
 class SucursalAssignPayload(SQLModel):
     sucursal_id: int = Field(description="ID de la sucursal a asignar")
+    version: Optional[int] = Field(default=None, description="Versión leída; si ya cambió responde 409")
 
 @router.put("/{turno_id}/sucursal", response_model=TurnoRead)
-def asignar_sucursal(turno_id: int, payload: SucursalAssignPayload):
-    with Session(engine) as session:
-        t = session.get(Turno, turno_id)
-        if not t:
-            raise HTTPException(404, "Turno no encontrado")
-        # valida que exista la sucursal (opcional pero recomendable)
-        from app.models import Sucursal
-        s = session.get(Sucursal, payload.sucursal_id)
-        if not s:
-            raise HTTPException(404, "Sucursal no encontrada")
-        t.sucursal_id = payload.sucursal_id
-        session.add(t)
-        session.commit()
-        session.refresh(t)
-        return t
\ No newline at end of file
+async def asignar_sucursal(turno_id: int, payload: SucursalAssignPayload):
+    async def mover(batch: WriteBatch) -> Turno:
+        session = batch.session
+        t = await _turno_o_404(session, turno_id)
+        _check_version(t, payload.version)
+        anterior = t.sucursal_id
+        if t.fecha is None or t.sucursal_id == payload.sucursal_id:
+            # valida que exista la sucursal (opcional pero recomendable)
+            s = await session.get(Sucursal, payload.sucursal_id)
+            if not s:
+                raise HTTPException(404, "Sucursal no encontrada")
+        else:
+            # con fecha, el cambio de sucursal ocupa franja en la nueva y la libera en la anterior
+            sucursal, servicio = await _sucursal_servicio(session, payload.sucursal_id, t.servicio_id)
+            day = await availability.reserve(session, t.id, sucursal, servicio, t.fecha, t.hora)
+            batch.on_rollback(lambda: day.remove(t.id))
+            batch.on_commit(lambda: availability.discard(t.id, anterior, t.fecha))
+        _aplicar_asignacion(t, sucursal_id=payload.sucursal_id)
+        if anterior != t.sucursal_id:
+            # la sucursal anterior también se entera: el turno sale de su cola
+            _publicar(batch, "moved", t, anterior, t.sucursal_id)
+        return t
+    return await _escribir(mover)
+
+# ---------- Asignación masiva ----------
+class AsignacionItem(SQLModel):
+    turno_id: int
+    trabajador: Optional[str] = Field(default=None, description="Nombre/ID del trabajador")
+    sucursal_id: Optional[int] = Field(default=None, description="ID de la sucursal a asignar")
+    version: Optional[int] = Field(default=None, description="Versión leída; si ya cambió se informa error")
+
+class AsignacionBulkResult(SQLModel):
+    updated: List[int] = []
+    errors: List[BulkError] = []
+
+def _asignacion_job(chunk: list, sucursales: dict, errores: List[BulkError]):
+    async def job(batch: WriteBatch) -> List[int]:
+        del errores[:]  # el escritor puede reintentar el trabajo
+        session = batch.session
+        ids = {item.turno_id for _, item in chunk}
+        turnos: Dict[int, Turno] = {
+            t.id: t for t in (await session.exec(select(Turno).where(Turno.id.in_(ids)))).all()
+        }
+        servicios = await _load_by_id(session, Servicio, {t.servicio_id for t in turnos.values() if t.servicio_id})
+        updated = []
+        for index, item in chunk:
+            t = turnos.get(item.turno_id)
+            if not t:
+                errores.append(BulkError(index=index, detail="Turno no encontrado"))
+                continue
+            if item.version is not None and t.version != item.version:
+                errores.append(BulkError(index=index, detail=VERSION_CONFLICT))
+                continue
+            if item.sucursal_id is not None and item.sucursal_id not in sucursales:
+                errores.append(BulkError(index=index, detail="Sucursal no encontrada"))
+                continue
+            if item.sucursal_id is not None and t.fecha is not None and item.sucursal_id != t.sucursal_id:
+                try:
+                    day = await availability.reserve(
+                        session, t.id, sucursales[item.sucursal_id],
+                        servicios.get(t.servicio_id), t.fecha, t.hora,
+                    )
+                except HTTPException as exc:
+                    errores.append(BulkError(index=index, detail=exc.detail))
+                    continue
+                batch.on_rollback(lambda day=day, turno_id=t.id: day.remove(turno_id))
+                batch.on_commit(lambda turno_id=t.id, anterior=t.sucursal_id, fecha=t.fecha:
+                                availability.discard(turno_id, anterior, fecha))
+            anterior = t.sucursal_id
+            _aplicar_asignacion(t, trabajador=item.trabajador, sucursal_id=item.sucursal_id)
+            if t.sucursal_id != anterior:
+                _publicar(batch, "moved", t, anterior, t.sucursal_id)
+            else:
+                _publicar(batch, "assigned", t)
+            updated.append(index)
+        return updated
+    return job
+
+@router.put("/asignar", response_model=AsignacionBulkResult)
+async def asignar_turnos_bulk(items: List[AsignacionItem], session: AsyncSession = Depends(get_async_session)):
+    _check_bulk_size(items)
+    result = AsignacionBulkResult()
+    sucursales = await _load_by_id(session, Sucursal, {i.sucursal_id for i in items if i.sucursal_id is not None})
+
+    for chunk in _chunks(list(enumerate(items)), settings.BULK_CHUNK_SIZE):
+        errores: List[BulkError] = []
+        try:
+            updated = await turno_writer.submit(_asignacion_job(chunk, sucursales, errores))
+        except StaleDataError:
+            # otro proceso tocó algún turno del lote: se descarta el lote entero
+            taken = {e.index for e in errores}
+            result.errors.extend(errores)
+            result.errors.extend(
+                BulkError(index=index, detail=VERSION_CONFLICT) for index, _ in chunk if index not in taken
+            )
+            continue
+        result.errors.extend(errores)
+        result.updated.extend(items[index].turno_id for index in updated)
+
+    result.errors.sort(key=lambda e: e.index)
+    return result
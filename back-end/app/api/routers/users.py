@@ -1,5 +1,8 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request
+from ...core import search as busqueda
 from ...core.auth_dependency import get_current_user
+from ...core.fastjson import FastJSONResponse, dumps, rows_to_dicts
+from ...core.http_cache import not_modified, weak_etag
 from ... models import User, UserRead
 from typing import List, Optional
 from sqlmodel import Session, select
@@ -8,18 +11,17 @@ from ... db import get_session
 
 router = APIRouter()
 
+USER_READ_KEYS = list(UserRead.__fields__)
+USER_READ_COLUMNS = [User.__table__.c[key] for key in USER_READ_KEYS]
+
 @router.get('/me')
 def me(user = Depends(get_current_user)):
-    user_id = user.id
-    with Session(db.engine) as session:
-        u = session.get(User, user_id)
-        if not u:
-            from fastapi import HTTPException, status
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='User not found')
-        return {"id": u.id, "email": u.email, "full_name": u.full_name}
+    # get_current_user ya cargó (o sacó de caché) el usuario; no se vuelve a leer
+    return {"id": user.id, "email": user.email, "full_name": user.full_name}
 
 @router.get("/users", response_model=List[UserRead])
 def list_users(
+    request: Request,
     session: Session = Depends(get_session),
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1),
@@ -27,11 +29,19 @@ def list_users(
     order_by: str = Query("id"),
     order_dir: str = Query("asc")
 ):
-    query = select(User)
+    # Solo las columnas de UserRead (sin hashed_password); el ETag sale del
+    # cuerpo ya codificado: los usuarios cambian (rehash en el login, baja) y
+    # un id borrado se reutiliza, así que nada más chico identifica la página
+    query = select(*USER_READ_COLUMNS)
 
     # Filtrado
     if search:
-        query = query.where(User.email.contains(search))
+        # subcadena de 3+ caracteres: por el índice FTS5; más corta, LIKE
+        expression = busqueda.phrase(search)
+        if expression:
+            query = query.where(User.id.in_(busqueda.ids("user", expression)))
+        else:
+            query = query.where(User.email.contains(search))
 
     # Orden
     if order_by not in User.__table__.columns.keys():
@@ -44,5 +54,6 @@ def list_users(
     # Paginación
     query = query.offset(skip).limit(limit)
 
-    results = session.exec(query).all()
-    return results
\ No newline at end of file
+    body = dumps(rows_to_dicts(USER_READ_KEYS, session.exec(query).all()))
+    etag = weak_etag("users", body)
+    return not_modified(request, etag) or FastJSONResponse(body, headers={"ETag": etag})
\ No newline at end of file
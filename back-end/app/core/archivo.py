@@ -0,0 +1,64 @@
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import DateTime, delete, insert, literal, select
+
+from app.core.availability import availability
+from app.core.config import settings
+from app.core.pagination import turno_total
+from app.core.writer import WriteBatch, turno_writer
+from app.models import IdempotencyKey, Turno, TurnoArchivado
+
+# Partición por fecha: los turnos que empezaron hace más de ARCHIVE_AFTER_DAYS
+# pasan de turno a turno_archivo y listados, conteos, exportación y búsqueda
+# recorren solo los vigentes. Es una tabla de la misma base y no un archivo
+# aparte: mover filas es una sola transacción (en WAL, un ATTACH no da
+# atomicidad entre archivos). El resumen de ocupación no cambia: el DELETE va
+# por Core, sin los eventos del ORM que lo descuentan, y al recalcularlo se
+# suman los archivados. El histórico se consulta en GET /turnos/archivo.
+TURNO = Turno.__table__
+TABLE = TurnoArchivado.__table__
+IDEMPOTENCY = IdempotencyKey.__table__
+COLUMNS = [c.name for c in TURNO.columns]
+# turno_archivo tiene las mismas (el id como turno_id, con clave propia) y archivado_at
+DESTINO = ["turno_id" if c == "id" else c for c in COLUMNS]
+
+
+def limite(dias: int) -> datetime:
+    """Se archivan los turnos que empiezan antes de este instante."""
+    return datetime.combine(date.today() - timedelta(days=dias), time.min)
+
+
+def _lote(antes: datetime, size: int):
+    async def job(batch: WriteBatch) -> int:
+        conn = await batch.session.connection()
+        rows = (await conn.execute(
+            select(TURNO.c.id, TURNO.c.sucursal_id, TURNO.c.fecha)
+            .where(TURNO.c.inicio < antes).order_by(TURNO.c.inicio).limit(size)
+        )).all()
+        if not rows:
+            return 0
+        ids = [row.id for row in rows]
+        copia = select(*[TURNO.c[c] for c in COLUMNS], literal(datetime.utcnow(), DateTime)).where(TURNO.c.id.in_(ids))
+        await conn.execute(insert(TABLE).from_select([*DESTINO, "archivado_at"], copia))
+        await conn.execute(delete(IDEMPOTENCY).where(IDEMPOTENCY.c.turno_id.in_(ids)))
+        await conn.execute(delete(TURNO).where(TURNO.c.id.in_(ids)))
+
+        def confirmar():
+            turno_total.add(-len(ids))
+            for row in rows:
+                availability.discard(row.id, row.sucursal_id, row.fecha)
+        batch.on_commit(confirmar)
+        return len(ids)
+    return job
+
+
+async def archivar(dias: int = settings.ARCHIVE_AFTER_DAYS, size: int = settings.ARCHIVE_BATCH_SIZE) -> int:
+    """Mueve los turnos vencidos por lotes, un trabajo del escritor por lote
+    (las altas se intercalan); devuelve cuántos se movieron."""
+    antes = limite(dias)
+    total = 0
+    while True:
+        movidos = await turno_writer.submit(_lote(antes, size))
+        total += movidos
+        if movidos < size:
+            return total
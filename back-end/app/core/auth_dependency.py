@@ -1,23 +1,32 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import jwt, JWTError
-from app.core.config import settings
 from sqlmodel import select
-from app.db import get_session           
+from app.db import get_async_session
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models import User
+from app.core.revocation import revocations
+from app.core.security import TokenError
+from app.core.user_cache import cache_user, decode_token, get_cached_user
 
 security = HTTPBearer()
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), session: AsyncSession = Depends(get_session)):
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), session: AsyncSession = Depends(get_async_session)):
     token = credentials.credentials
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
+        payload = decode_token(token)
         user_id = int(payload.get("sub"))
-    except JWTError:
+    except (TokenError, TypeError, ValueError):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+    # el filtro en memoria resuelve casi todos los tokens sin tocar la base
+    jti = payload.get("jti")
+    if revocations.needs_db(jti) and await session.run_sync(revocations.is_revoked, jti):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token revoked")
+    user = get_cached_user(user_id)
+    if user is not None:
+        return user
     result = await session.execute(select(User).where(User.id == user_id))
     user = result.scalar_one_or_none()
     if user is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    cache_user(user)
     return user
@@ -0,0 +1,219 @@
+import itertools
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.models import Servicio, Sucursal, Turno
+
+
+def parse_hora(hora: str) -> int:
+    try:
+        hh, mm = hora.split(":")
+        minutes = int(hh) * 60 + int(mm)
+    except (AttributeError, ValueError):
+        minutes = -1
+    if not 0 <= minutes < 24 * 60:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Hora inválida: {hora!r} (HH:MM)")
+    return minutes
+
+
+def format_hora(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def duracion(servicio: Optional[Servicio]) -> int:
+    return servicio.duracion_min if servicio and servicio.duracion_min else settings.SLOT_MINUTES
+
+
+class _Intervals:
+    """Inicios y finales en dos arrays ordenados: solapes con dos bisect."""
+
+    __slots__ = ("starts", "ends")
+
+    def __init__(self):
+        self.starts: List[int] = []
+        self.ends: List[int] = []
+
+    def add(self, start: int, end: int):
+        insort(self.starts, start)
+        insort(self.ends, end)
+
+    def remove(self, start: int, end: int):
+        del self.starts[bisect_left(self.starts, start)]
+        del self.ends[bisect_left(self.ends, end)]
+
+    def peak(self, start: int, end: int) -> int:
+        """Máximo de intervalos simultáneos en [start, end): barrido de inicios y
+        finales (dos intervalos que solapan con la franja pueden no solaparse entre sí)."""
+        # activos en start: empezaron a más tardar en start y todavía no terminaron
+        active = bisect_right(self.starts, start) - bisect_right(self.ends, start)
+        peak = active
+        s, s_stop = bisect_right(self.starts, start), bisect_left(self.starts, end)
+        e, e_stop = bisect_right(self.ends, start), bisect_left(self.ends, end)
+        while s < s_stop:
+            # a igual minuto primero el final: [start, end) no se pisa con el siguiente
+            if e < e_stop and self.ends[e] <= self.starts[s]:
+                active -= 1
+                e += 1
+            else:
+                active += 1
+                s += 1
+                peak = max(peak, active)
+        return peak
+
+
+class DayIndex:
+    """Turnos de una sucursal en un día, en total y por servicio."""
+
+    def __init__(self):
+        self.total = _Intervals()
+        self.by_servicio: Dict[Optional[int], _Intervals] = {}
+        self.turnos: Dict[int, Tuple[int, int, Optional[int]]] = {}
+
+    def add(self, turno_id: int, start: int, end: int, servicio_id: Optional[int]):
+        self.remove(turno_id)
+        self.turnos[turno_id] = (start, end, servicio_id)
+        self.total.add(start, end)
+        self.by_servicio.setdefault(servicio_id, _Intervals()).add(start, end)
+
+    def remove(self, turno_id: int):
+        item = self.turnos.pop(turno_id, None)
+        if item is not None:
+            start, end, servicio_id = item
+            self.total.remove(start, end)
+            self.by_servicio[servicio_id].remove(start, end)
+
+    def rekey(self, old_id: int, new_id: int):
+        item = self.turnos.pop(old_id, None)
+        if item is not None:
+            self.turnos[new_id] = item
+
+    def libres(self, start: int, end: int, sucursal: Sucursal, servicio: Optional[Servicio]) -> int:
+        free = sucursal.capacidad - self.total.peak(start, end)
+        if servicio is not None and servicio.capacidad is not None:
+            per = self.by_servicio.get(servicio.id)
+            free = min(free, servicio.capacidad - (per.peak(start, end) if per else 0))
+        return free
+
+
+class AvailabilityIndex:
+    """Índice en memoria por (sucursal, fecha), cargado bajo demanda y mantenido
+    en cada alta, asignación y baja. Las reservas las hace solo el escritor de
+    turnos (app.core.writer), que serializa comprobar y guardar. Es por proceso:
+    con varios workers cada uno lleva el suyo y lo descarta cuando el epoch de
+    escrituras (app.core.cluster) muestra que escribió otro proceso."""
+
+    def __init__(self, max_days: int):
+        self.max_days = max_days
+        self._days: "OrderedDict[Tuple[int, date], DayIndex]" = OrderedDict()
+        self._temp_ids = itertools.count(-1, -1)
+        self.epoch = 0
+        self._writing = False
+        self.invalidations = 0
+
+    def invalidate(self):
+        """Descarta los días cargados (p. ej. cambió la duración de un servicio)."""
+        self._days.clear()
+        self.invalidations += 1
+
+    def begin_write(self, epoch: int):
+        """Al abrir un lote con el lock de escritura tomado: si el epoch saltó, otro proceso escribió."""
+        self._writing = True
+        if epoch != self.epoch + 1:
+            self.invalidate()
+
+    def end_write(self, epoch: Optional[int]):
+        """Fin del lote; epoch None si se deshizo."""
+        self._writing = False
+        if epoch is not None:
+            self.epoch = epoch
+
+    def observe(self, epoch: int):
+        """Epoch confirmado leído antes de usar el índice para consultas."""
+        # con un lote propio en curso el índice ya se validó al tomar el lock
+        if self._writing or epoch == self.epoch:
+            return
+        self.invalidate()
+        self.epoch = epoch
+
+    def temp_id(self) -> int:
+        """Id provisional (negativo) para reservar antes de conocer el id real."""
+        return next(self._temp_ids)
+
+    async def day(self, session: AsyncSession, sucursal_id: int, fecha: date) -> DayIndex:
+        key = (sucursal_id, fecha)
+        day = self._days.get(key)
+        if day is not None:
+            self._days.move_to_end(key)
+            return day
+
+        day = DayIndex()
+        # sin autoflush: lo pendiente en la sesión entra al índice por reserve, no por la carga
+        with session.sync_session.no_autoflush:
+            rows = await session.exec(
+                select(Turno.id, Turno.hora, Turno.servicio_id, Servicio.duracion_min)
+                .outerjoin(Servicio, Turno.servicio_id == Servicio.id)
+                .where(Turno.sucursal_id == sucursal_id, Turno.fecha == fecha)
+            )
+        for turno_id, hora, servicio_id, minutos in rows.all():
+            try:
+                start = parse_hora(hora)
+            except HTTPException:
+                continue  # turnos antiguos con hora libre no ocupan franja
+            day.add(turno_id, start, start + (minutos or settings.SLOT_MINUTES), servicio_id)
+
+        # otra corrutina pudo cargar el mismo día mientras se esperaba la consulta:
+        # se conserva el primero, que es el que ya recibe las reservas
+        if key in self._days:
+            return self._days[key]
+        self._days[key] = day
+        while len(self._days) > self.max_days:
+            self._days.popitem(last=False)
+        return day
+
+    def discard(self, turno_id: int, sucursal_id: Optional[int], fecha: Optional[date]):
+        day = self._days.get((sucursal_id, fecha))
+        if day is not None:
+            day.remove(turno_id)
+
+    async def reserve(
+        self,
+        session: AsyncSession,
+        turno_id: int,
+        sucursal: Sucursal,
+        servicio: Optional[Servicio],
+        fecha: date,
+        hora: str,
+    ) -> DayIndex:
+        """Valida horario y capacidad y deja el turno en el índice; 409 si no hay lugar."""
+        start = parse_hora(hora)
+        end = start + duracion(servicio)
+        if start < parse_hora(sucursal.hora_apertura) or end > parse_hora(sucursal.hora_cierre):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Fuera del horario de la sucursal")
+        day = await self.day(session, sucursal.id, fecha)
+        if day.libres(start, end, sucursal, servicio) <= 0:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Horario no disponible")
+        day.add(turno_id, start, end, servicio.id if servicio else None)
+        return day
+
+    async def free_slots(
+        self, session: AsyncSession, sucursal: Sucursal, servicio: Optional[Servicio], fecha: date
+    ) -> List[dict]:
+        day = await self.day(session, sucursal.id, fecha)
+        minutos = duracion(servicio)
+        apertura, cierre = parse_hora(sucursal.hora_apertura), parse_hora(sucursal.hora_cierre)
+        slots = []
+        for start in range(apertura, cierre - minutos + 1, settings.SLOT_MINUTES):
+            libres = day.libres(start, start + minutos, sucursal, servicio)
+            if libres > 0:
+                slots.append({"hora": format_hora(start), "disponibles": libres})
+        return slots
+
+
+availability = AvailabilityIndex(settings.AVAILABILITY_MAX_DAYS)
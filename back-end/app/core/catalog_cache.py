@@ -0,0 +1,107 @@
+import hashlib
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Awaitable, Callable, Hashable, List, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.fastjson import dumps
+from app.core.http_cache import etag_matches
+
+
+class CatalogEntry:
+    __slots__ = ("body", "etag", "last_modified")
+
+    def __init__(self, body: bytes, etag: str, last_modified: datetime):
+        self.body = body
+        self.etag = etag
+        self.last_modified = format_datetime(last_modified, usegmt=True)
+
+
+class CatalogCache:
+    """Respuestas ya serializadas de un catálogo (una por combinación de filtros).
+
+    Las escrituras llaman a invalidate() tras el commit; el TTL cubre cambios
+    hechos por otros procesos. Una carga que empezó antes de una invalidación
+    no se guarda, así no vuelve a entrar un catálogo viejo.
+
+    Last-Modified es por entrada y avanza solo cuando el cuerpo recargado
+    cambia: un worker que ve el cambio recién al vencer el TTL no responde 304
+    a un If-Modified-Since posterior a su arranque.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.version = 0
+        self.not_modified = 0
+        self._entries = TTLCache(settings.CATALOG_CACHE_MAX_ENTRIES, settings.CATALOG_CACHE_TTL_SECONDS)
+        # última versión vista por clave (etag, fecha): sobrevive a invalidate() y al TTL
+        self._modified: "OrderedDict[Hashable, Tuple[str, datetime]]" = OrderedDict()
+
+    def invalidate(self):
+        self.version += 1
+        self._entries.clear()
+
+    def _last_modified(self, key: Hashable, etag: str) -> datetime:
+        previous = self._modified.get(key)
+        if previous is not None and previous[0] == etag:
+            modified = previous[1]
+        else:
+            modified = datetime.now(timezone.utc).replace(microsecond=0)
+        self._modified[key] = (etag, modified)
+        self._modified.move_to_end(key)
+        while len(self._modified) > settings.CATALOG_CACHE_MAX_ENTRIES:
+            self._modified.popitem(last=False)
+        return modified
+
+    async def entry(self, key: Hashable, loader: Callable[[], Awaitable[list]]) -> CatalogEntry:
+        entry = self._entries.get(key)
+        if entry is None:
+            version = self.version
+            data = jsonable_encoder(await loader())
+            body = dumps(data)
+            # ETag por contenido: igual en todos los workers para los mismos datos
+            etag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+            entry = CatalogEntry(body, etag, self._last_modified(key, etag))
+            if version == self.version:
+                self._entries.set(key, entry)
+        return entry
+
+    def stats(self) -> dict:
+        return {**self._entries.stats(), "version": self.version, "not_modified": self.not_modified}
+
+
+def _not_modified_since(header: Optional[str], last_modified: str) -> bool:
+    try:
+        return header is not None and parsedate_to_datetime(last_modified) <= parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+
+
+async def catalog_response(
+    request: Request, cache: CatalogCache, key: Hashable, loader: Callable[[], Awaitable[list]]
+) -> Response:
+    """200 con el cuerpo cacheado o 304 si el cliente ya lo tiene (sin DB ni serializar)."""
+    entry = await cache.entry(key, loader)
+    headers = {"ETag": entry.etag, "Last-Modified": entry.last_modified, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        fresh = etag_matches(if_none_match, entry.etag)
+    else:
+        fresh = _not_modified_since(request.headers.get("if-modified-since"), entry.last_modified)
+    if fresh:
+        cache.not_modified += 1
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+
+servicios_cache = CatalogCache("servicios")
+sucursales_cache = CatalogCache("sucursales")
+
+
+def stats() -> List[dict]:
+    return [{"catalog": c.name, **c.stats()} for c in (servicios_cache, sucursales_cache)]
@@ -0,0 +1,159 @@
+import asyncio
+import contextvars
+import logging
+import time
+import uuid
+from typing import Optional
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.availability import availability
+from app.core.config import settings
+from app.core.events import turno_events
+from app.core.writer import WriteBatch, turno_writer
+from app.db import AsyncSessionLocal
+from app.models import TurnoEvento, WriteEpoch
+
+logger = logging.getLogger(__name__)
+
+# Modo de varios workers (python -m app.serve, WEB_CONCURRENCY > 1). Lo que era
+# de un solo proceso se coordina por la base:
+#   - disponibilidad: epoch de escrituras (write_epoch) que cada lote del
+#     escritor incrementa con el lock de escritura tomado;
+#   - pantallas (SSE): los eventos pasan de un worker a otro por turno_evento.
+# Rate limiting (backend sqlite), revocaciones y resumen de ocupación ya
+# viven en la base; las cachés con TTL toleran que cada worker tenga la suya.
+MULTI_WORKER = settings.WEB_CONCURRENCY > 1
+
+EPOCH = WriteEpoch.__table__
+OUTBOX = TurnoEvento.__table__
+PURGE_EVERY = 100  # pasos del relay entre purgas de turno_evento
+
+
+# ---------- Disponibilidad ----------
+async def _epoch_lote(batch: WriteBatch):
+    # primera sentencia del lote: el UPDATE toma el lock de escritura de SQLite,
+    # así comprobar capacidad y guardar sigue siendo atómico entre procesos
+    session = batch.session
+    await session.execute(update(EPOCH).where(EPOCH.c.id == 1).values(n=EPOCH.c.n + 1))
+    epoch = (await session.execute(select(EPOCH.c.n).where(EPOCH.c.id == 1))).scalar_one()
+    availability.begin_write(epoch)
+    batch.on_commit(lambda: availability.end_write(epoch))
+    batch.on_rollback(lambda: availability.end_write(None))
+
+
+async def _nada(batch: WriteBatch):
+    return None
+
+
+async def invalidate_availability():
+    """Tras cambiar duración o capacidad de un servicio: descarta el índice de
+    este proceso y, con varios workers, pasa un lote vacío por el escritor para
+    que el epoch avance y los demás descarten el suyo."""
+    availability.invalidate()
+    if MULTI_WORKER:
+        await turno_writer.submit(_nada)
+
+
+async def sync_availability(session: AsyncSession):
+    """Antes de responder desde el índice: lo descarta si otro worker escribió turnos."""
+    if MULTI_WORKER:
+        availability.observe((await session.execute(select(EPOCH.c.n).where(EPOCH.c.id == 1))).scalar_one())
+
+
+# ---------- Eventos para las pantallas ----------
+class EventRelay:
+    """Cada STREAM_RELAY_MS guarda en turno_evento los eventos de este worker y
+    publica a sus pantallas los que dejaron los demás (ids crecientes: SQLite
+    serializa las escrituras). Las filas viejas se purgan cada tanto."""
+
+    def __init__(self, interval_ms: float, keep_seconds: int):
+        self.interval = interval_ms / 1000
+        self.keep_seconds = keep_seconds
+        self.origin = uuid.uuid4().hex[:12]
+        self.relayed = 0
+        self.received = 0
+        self._last_id = 0
+        self._steps = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        turno_events.outbox = []
+        async with AsyncSessionLocal() as session:
+            self._last_id = (await session.execute(select(func.max(OUTBOX.c.id)))).scalar() or 0
+        # contexto vacío: sus consultas no son de ninguna solicitud
+        self._task = asyncio.get_running_loop().create_task(self._run(), context=contextvars.Context())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            await self.step()  # lo que quedó pendiente para los demás workers
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.step()
+            except Exception:
+                logger.exception("Relay de eventos entre workers")
+
+    async def step(self):
+        pending, turno_events.outbox = turno_events.outbox or [], []
+        now = time.time()
+        self._steps += 1
+        async with AsyncSessionLocal() as session:
+            if pending:
+                await session.execute(insert(OUTBOX), [
+                    {"origen": self.origin, "evento": evento, "data": payload.decode(), "fecha": fecha,
+                     "sucursales": ",".join(map(str, sucursales)), "created_at": now}
+                    for evento, payload, sucursales, fecha in pending
+                ])
+            rows = (await session.execute(
+                select(OUTBOX.c.id, OUTBOX.c.origen, OUTBOX.c.evento, OUTBOX.c.data, OUTBOX.c.sucursales,
+                       OUTBOX.c.fecha)
+                .where(OUTBOX.c.id > self._last_id).order_by(OUTBOX.c.id)
+            )).all()
+            if self._steps % PURGE_EVERY == 0:
+                await session.execute(delete(OUTBOX).where(OUTBOX.c.created_at < now - self.keep_seconds))
+            await session.commit()
+        self.relayed += len(pending)
+        for row_id, origen, evento, data, sucursales, fecha in rows:
+            self._last_id = row_id
+            if origen != self.origin:
+                self.received += 1
+                turno_events.publish_remote(evento, data.encode(), map(int, sucursales.split(",")), fecha)
+
+    def stats(self) -> dict:
+        return {"origin": self.origin, "relayed": self.relayed, "received": self.received}
+
+
+relay = EventRelay(settings.STREAM_RELAY_MS, settings.STREAM_RELAY_KEEP_SECONDS)
+
+if MULTI_WORKER:
+    turno_writer.before_batch(_epoch_lote)
+
+
+# ---------- Arranque y apagado ----------
+async def start():
+    if MULTI_WORKER:
+        await relay.start()
+
+
+async def stop():
+    if MULTI_WORKER:
+        await relay.stop()
+
+
+def stats() -> dict:
+    return {
+        "workers": settings.WEB_CONCURRENCY,
+        "availability_epoch": availability.epoch,
+        "availability_invalidations": availability.invalidations,
+        **(relay.stats() if MULTI_WORKER else {}),
+    }
@@ -0,0 +1,128 @@
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:  # brotli: opcional, comprime mejor que gzip el JSON de los listados
+    import brotli
+except ImportError:  # pragma: no cover - sin brotli se ofrece solo gzip
+    brotli = None
+
+COMPRESSIBLE = ("application/json", "application/x-ndjson", "text/csv", "text/plain", "text/html")
+# SSE: cada evento tiene que llegar apenas se publica, sin pasar por un compresor
+EXCLUDED = ("text/event-stream",)
+
+
+def negotiate(accept_encoding: str, allow_br: bool = True) -> Optional[str]:
+    """br, gzip o None según Accept-Encoding (respeta q=0)."""
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            accepted[name] = q
+    wildcard = accepted.get("*", 0.0)
+    if allow_br and brotli is not None and accepted.get("br", wildcard) > 0:
+        return "br"
+    if accepted.get("gzip", wildcard) > 0:
+        return "gzip"
+    return None
+
+
+class _Compressor:
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        if encoding == "br":
+            self._br = brotli.Compressor(quality=brotli_quality)
+            self._zlib = None
+        else:
+            self._br = None
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)  # 31: cabecera gzip
+
+    def chunk(self, data: bytes) -> bytes:
+        """Comprime y vacía el compresor: el cliente puede decodificar lo recibido hasta acá."""
+        if self._br is not None:
+            return self._br.process(data) + self._br.flush()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        if self._br is not None:
+            return self._br.process(data) + self._br.finish()
+        return self._zlib.compress(data) + self._zlib.flush()
+
+
+class CompressionMiddleware:
+    """gzip/brotli para respuestas JSON, NDJSON y CSV desde minimum_size bytes.
+
+    Una respuesta de un solo cuerpo se comprime entera (con Content-Length);
+    una en streaming (exportaciones) se comprime por partes, vaciando el
+    compresor en cada una para no retener datos. Un ETag fuerte pasa a débil:
+    los bytes ya no son los que lo originaron.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        compressor: Optional[_Compressor] = None
+        passthrough = False
+
+        async def send_compressed(message: Message):
+            nonlocal start, compressor, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+            body, more = message.get("body", b""), message.get("more_body", False)
+            if compressor is None:
+                headers = MutableHeaders(scope=start)
+                media = headers.get("content-type", "").split(";")[0].strip()
+                if (
+                    "content-encoding" in headers
+                    or media in EXCLUDED
+                    or not media.startswith(COMPRESSIBLE)
+                    or (not more and len(body) < self.minimum_size)
+                ):
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+                compressor = _Compressor(encoding, self.gzip_level, self.brotli_quality)
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    headers["ETag"] = "W/" + etag
+                if more:
+                    del headers["content-length"]
+                else:
+                    body = compressor.finish(body)
+                    headers["Content-Length"] = str(len(body))
+                    await send(start)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                await send(start)
+            body = compressor.chunk(body) if more else compressor.finish(body)
+            await send({"type": "http.response.body", "body": body, "more_body": more})
+
+        await self.app(scope, receive, send_compressed)
@@ -2,11 +2,74 @@ from pydantic import BaseSettings
 
 class Settings(BaseSettings):
     SECRET_KEY: str
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
-    DATABASE_URL: str
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    DATABASE_URL: str = ""  # vacío = sqlite en back-end/turnos.db
+    SQLITE_PATH: str = ""  # si se da, manda sobre DATABASE_URL (benchmarks, herramientas, tests)
     CORS_ORIGINS: str = "http://localhost:5173"
     RATE_LIMIT_AUTH_PER_MIN: int = 5
     RATE_LIMIT_API_PER_MIN: int = 60
+    RATE_LIMIT_BACKEND: str = ""  # memory | sqlite | redis ("" = memory con un worker, sqlite con varios)
+    RATE_LIMIT_MEMORY_MAX_KEYS: int = 100000
+    RATE_LIMIT_SQLITE_PATH: str = ""
+    RATE_LIMIT_REDIS_URL: str = "redis://localhost:6379/0"
+    USER_CACHE_TTL_SECONDS: int = 60
+    USER_CACHE_MAX_ENTRIES: int = 10000
+    BCRYPT_ROUNDS: int = 12
+    HASH_EXECUTOR: str = "thread"  # thread | process
+    HASH_WORKERS: int = 0  # 0 = número de CPUs
+    HASH_MAX_PENDING: int = 64
+    SLOT_MINUTES: int = 30
+    AVAILABILITY_MAX_DAYS: int = 2048
+    IDEMPOTENCY_TTL_HOURS: int = 24
+    TOTAL_COUNT_TTL_SECONDS: int = 30
+    CATALOG_CACHE_TTL_SECONDS: int = 300
+    CATALOG_CACHE_MAX_ENTRIES: int = 256
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_PRE_PING: bool = True
+    BULK_CHUNK_SIZE: int = 500
+    BULK_MAX_ROWS: int = 10000
+    EXPORT_BATCH_SIZE: int = 1000
+    DEBUG: bool = False  # también activa el echo de SQL
+    SLOW_REQUEST_MS: int = 500
+    SLOW_REQUEST_MAX_STATEMENTS: int = 100  # sentencias guardadas por solicitud para el log
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_MMAP_SIZE: int = 268435456  # 256 MiB
+    SQLITE_CACHE_SIZE_KB: int = 65536
+    WRITE_BATCH_MAX: int = 128  # escrituras de turno por commit
+    WRITE_BATCH_WAIT_MS: float = 0  # espera extra para juntar lote (0 = lo que ya esté en cola)
+    STREAM_QUEUE_SIZE: int = 256  # eventos pendientes por pantalla antes de pedirle resync
+    STREAM_REPLAY_EVENTS: int = 512  # historial por sucursal para reanudar con Last-Event-ID
+    STREAM_MAX_SUBSCRIBERS: int = 1000
+    STREAM_HEARTBEAT_SECONDS: float = 15
+    REPORTE_MAX_DIAS: int = 366
+    REVOCATION_CAPACITY: int = 100000  # jti vigentes que entran en el filtro antes de agrandarlo
+    REVOCATION_FP_RATE: float = 0.001  # falsos positivos (cada uno cuesta una lectura por clave)
+    REVOCATION_SYNC_SECONDS: float = 5  # cada cuánto se traen las revocaciones de otros procesos
+    WEB_CONCURRENCY: int = 1  # procesos de la API; python -m app.serve lo fija en cada worker
+    STREAM_RELAY_MS: float = 100  # con varios workers: cada cuánto se pasan los eventos entre procesos
+    STREAM_RELAY_KEEP_SECONDS: int = 300  # antigüedad máxima de la tabla turno_evento
+    SHUTDOWN_TIMEOUT_SECONDS: float = 30  # espera a las solicitudes en curso tras SIGTERM
+    JOBS_ENABLED: bool = True  # trabajos en segundo plano (app.core.jobs) en este proceso
+    JOBS_CONCURRENCY: int = 4  # trabajos corriendo a la vez por proceso
+    JOBS_POLL_SECONDS: float = 1  # cada cuánto se buscan trabajos (los encolados aquí despiertan antes)
+    JOBS_TIMEOUT_SECONDS: float = 300  # por intento, salvo que la tarea indique otro
+    JOBS_MAX_ATTEMPTS: int = 5
+    JOBS_BACKOFF_SECONDS: float = 10  # espera antes del 2.º intento; se duplica en cada fallo
+    JOBS_BACKOFF_MAX_SECONDS: float = 3600
+    JOBS_SHUTDOWN_SECONDS: float = 10  # al apagar, espera a los que corren; los demás vuelven a la cola
+    JOBS_KEEP_HOURS: int = 72  # trabajos terminados que se conservan para consultar
+    COMPRESSION_MIN_BYTES: int = 1024  # respuestas más chicas van sin comprimir (0 = comprimir todo)
+    COMPRESSION_ENABLED: bool = True  # gzip/brotli en la app; False si ya comprime el proxy
+    GZIP_LEVEL: int = 6
+    BROTLI_QUALITY: int = 4  # 0-11; arriba de 5 cuesta mucho más CPU por poco
+    ARCHIVE_AFTER_DAYS: int = 90  # turnos que pasan a turno_archivo tras esta antigüedad (0 = no archivar)
+    ARCHIVE_BATCH_SIZE: int = 500  # turnos por trabajo del escritor al archivar
+    REMINDER_MINUTES_BEFORE: int = 60  # recordatorio antes de cada turno con fecha (0 = sin recordatorios)
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,164 @@
+import asyncio
+import os
+import time
+from collections import defaultdict, deque
+from datetime import date
+from typing import Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.fastjson import dumps
+
+metrics.registry.gauge("stream_subscribers", "Pantallas conectadas a /sucursales/{id}/stream")
+metrics.registry.counter("stream_events_total", "Eventos de turno publicados por sucursal")
+metrics.registry.counter("stream_resyncs_total", "Suscriptores lentos a los que se les pidió resincronizar")
+
+# Prefijo de los ids de evento: otro proceso (o un reinicio) tiene otra secuencia
+_EPOCH = f"{os.getpid():x}{int(time.time()):x}"
+
+RESYNC = b"event: resync\ndata: {}\n\n"
+PING = b": ping\n\n"
+
+
+def sse_frame(event_id: str, event: str, data: bytes) -> bytes:
+    return b"id: %s\nevent: %s\ndata: %s\n\n" % (event_id.encode(), event.encode(), data)
+
+
+class Subscription:
+    """Cola acotada de una pantalla. Si se llena (cliente lento) se vacía y
+    queda un único evento resync: el cliente vuelve a pedir la foto en lugar
+    de que el publicador espere o la memoria crezca."""
+
+    __slots__ = ("sucursal_id", "fecha", "queue", "lagging")
+
+    def __init__(self, sucursal_id: int, fecha: Optional[date], size: int):
+        self.sucursal_id = sucursal_id
+        self.fecha = fecha
+        self.queue: asyncio.Queue = asyncio.Queue(size)
+        self.lagging = False
+
+    def push(self, frame: Optional[bytes]) -> bool:
+        """False solo cuando este push lo deja rezagado (el stream termina tras el resync)."""
+        if self.lagging and frame is not None:
+            return True
+        try:
+            self.queue.put_nowait(frame)
+            return True
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC if frame is not None else None)
+            self.lagging = True
+            return frame is None
+
+    def wants(self, fecha: Optional[date]) -> bool:
+        return self.fecha is None or self.fecha == fecha
+
+
+class TurnoEventBus:
+    """Pub/sub en proceso de cambios de turnos, con fan-out por sucursal.
+
+    publish() se llama desde los callbacks on_commit del escritor: el evento se
+    serializa una sola vez y se deja en la cola de cada suscriptor sin esperar.
+    Se guardan los últimos eventos de cada sucursal para reanudar con
+    Last-Event-ID tras una reconexión corta (en el mismo proceso: los ids
+    llevan el prefijo del worker). Con varios workers los eventos de los demás
+    llegan por app.core.cluster.
+    """
+
+    def __init__(self, queue_size: int, replay: int, max_subscribers: int):
+        self.queue_size = queue_size
+        self.replay = replay
+        self.max_subscribers = max_subscribers
+        self._subscribers: Dict[int, Set[Subscription]] = defaultdict(set)
+        self._history: Dict[int, Deque[Tuple[int, Optional[date], bytes]]] = {}
+        self._seq = 0
+        self.published = 0
+        self.resyncs = 0
+        self.closed = False
+        # con varios workers (app.core.cluster): eventos propios a reenviar a los demás
+        self.outbox: Optional[List[Tuple[str, bytes, List[int], Optional[date]]]] = None
+
+    @property
+    def subscribers(self) -> int:
+        return sum(len(subs) for subs in self._subscribers.values())
+
+    def last_id(self) -> str:
+        return f"{_EPOCH}-{self._seq}"
+
+    def subscribe(self, sucursal_id: int, fecha: Optional[date]) -> Optional[Subscription]:
+        if self.closed or self.subscribers >= self.max_subscribers:
+            return None
+        sub = Subscription(sucursal_id, fecha, self.queue_size)
+        self._subscribers[sucursal_id].add(sub)
+        metrics.registry.inc("stream_subscribers", 1)
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        subs = self._subscribers.get(sub.sucursal_id)
+        if subs is not None and sub in subs:
+            subs.discard(sub)
+            if not subs:
+                del self._subscribers[sub.sucursal_id]
+            metrics.registry.inc("stream_subscribers", -1)
+
+    def replay_since(self, sub: Subscription, last_event_id: str) -> Optional[List[bytes]]:
+        """Eventos posteriores a last_event_id, o None si ya no están (hay que resincronizar)."""
+        epoch, _, seq = last_event_id.partition("-")
+        if epoch != _EPOCH or not seq.isdigit() or int(seq) > self._seq:
+            return None
+        seq = int(seq)
+        history = self._history.get(sub.sucursal_id, ())
+        # solo falta algo si el historial de la sucursal ya descartó eventos posteriores a seq
+        if len(history) == self.replay and history[0][0] > seq + 1:
+            return None
+        return [frame for n, fecha, frame in history if n > seq and sub.wants(fecha)]
+
+    def publish(self, event: str, data: dict, sucursales: Iterable[Optional[int]], fecha: Optional[date]):
+        targets = {s for s in sucursales if s is not None}
+        if not targets:
+            return
+        payload = dumps(data)
+        if self.outbox is not None:
+            self.outbox.append((event, payload, sorted(targets), fecha))
+        self._fanout(event, payload, targets, fecha)
+
+    def publish_remote(self, event: str, payload: bytes, sucursales: Iterable[int], fecha: Optional[date]):
+        """Evento ya serializado que publicó otro worker: solo a los suscriptores de este proceso."""
+        self._fanout(event, payload, set(sucursales), fecha)
+
+    def _fanout(self, event: str, payload: bytes, targets: Set[int], fecha: Optional[date]):
+        self._seq += 1
+        frame = sse_frame(self.last_id(), event, payload)
+        self.published += 1
+        for sucursal_id in targets:
+            metrics.registry.inc("stream_events_total", sucursal=str(sucursal_id))
+            history = self._history.get(sucursal_id)
+            if history is None:
+                history = self._history[sucursal_id] = deque(maxlen=self.replay)
+            history.append((self._seq, fecha, frame))
+            for sub in self._subscribers.get(sucursal_id, ()):
+                if sub.wants(fecha) and not sub.push(frame):
+                    self.resyncs += 1
+                    metrics.registry.inc("stream_resyncs_total")
+
+    def close(self):
+        """Cierra todos los streams (None al final de cada cola) para no demorar el apagado."""
+        self.closed = True
+        for subs in list(self._subscribers.values()):
+            for sub in list(subs):
+                sub.push(None)
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": self.subscribers,
+            "sucursales": len(self._subscribers),
+            "published": self.published,
+            "resyncs": self.resyncs,
+            "last_id": self.last_id(),
+        }
+
+
+turno_events = TurnoEventBus(
+    settings.STREAM_QUEUE_SIZE, settings.STREAM_REPLAY_EVENTS, settings.STREAM_MAX_SUBSCRIBERS
+)
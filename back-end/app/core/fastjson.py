@@ -0,0 +1,40 @@
+import json
+from datetime import date, datetime
+from typing import Any, Iterable, List, Sequence
+
+from fastapi import Response
+
+try:  # orjson: encoder en C, maneja date/datetime sin default
+    import orjson
+except ImportError:  # pragma: no cover - sin orjson se usa json de la stdlib
+    orjson = None
+
+
+def _default(value: Any):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {value.__class__.__name__} is not JSON serializable")
+
+
+def dumps(data: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+def rows_to_dicts(keys: Sequence[str], rows: Iterable[Sequence[Any]]) -> List[dict]:
+    """Filas (tuplas) a dicts con las claves del modelo de lectura, sin hidratar ORM."""
+    return [dict(zip(keys, row)) for row in rows]
+
+
+class FastJSONResponse(Response):
+    """Respuesta JSON que codifica directo a bytes (orjson si está instalado).
+
+    Devolverla desde el handler salta la validación de response_model: úsese solo
+    con datos que ya tienen la forma del modelo de lectura.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return content if isinstance(content, bytes) else dumps(content)
@@ -0,0 +1,68 @@
+import hashlib
+from typing import Any, Dict, Optional
+
+from fastapi import Request, Response
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+# ---------- ETag y GET condicional ----------
+def weak_etag(*parts: Any) -> str:
+    """ETag débil a partir de lo que identifica la representación: el cuerpo ya
+    codificado (bytes) y, si hace falta, valores que lo acompañan (cabeceras)."""
+    digest = hashlib.blake2b(digest_size=12)
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else repr(part).encode())
+        digest.update(b"\0")
+    return f'W/"{digest.hexdigest()}"'
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    # If-None-Match admite lista y comparación débil (W/"...")
+    if not header:
+        return False
+    tags = {t.strip() for t in header.split(",")}
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    return "*" in tags or opaque in tags or f"W/{opaque}" in tags
+
+
+def not_modified(request: Request, etag: str, headers: Optional[Dict[str, str]] = None) -> Optional[Response]:
+    """304 si el cliente ya tiene esta versión; None si hay que responder."""
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={**(headers or {}), "ETag": etag})
+    return None
+
+
+# ---------- Cache-Control por router ----------
+class CacheControlMiddleware:
+    """Pone Cache-Control en las respuestas GET/HEAD exitosas según el prefijo
+    de la ruta (el más largo que coincida), salvo que el handler ya fijó uno."""
+
+    def __init__(self, app: ASGIApp, policies: Dict[str, str]):
+        self.app = app
+        # más largos primero: /turnos/archivo antes que /turnos
+        self.policies = sorted(policies.items(), key=lambda item: len(item[0]), reverse=True)
+
+    def policy(self, path: str) -> Optional[str]:
+        for prefix, value in self.policies:
+            if path == prefix or path.startswith(prefix.rstrip("/") + "/"):
+                return value
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+        value = self.policy(scope["path"])
+        if value is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_policy(message: Message):
+            if message["type"] == "http.response.start" and message["status"] in (200, 203, 304):
+                headers = MutableHeaders(scope=message)
+                if "cache-control" not in headers:
+                    headers["Cache-Control"] = value
+            await send(message)
+
+        await self.app(scope, receive, send_with_policy)
@@ -0,0 +1,366 @@
+import asyncio
+import contextvars
+import itertools
+import json
+import logging
+import random
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Set, Tuple
+
+from sqlalchemy import and_, delete, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core import metrics
+from app.core.config import settings
+from app.db import AsyncSessionLocal
+from app.models import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+TABLE = BackgroundJob.__table__
+_INSERTS = {"sqlite": sqlite_insert, "postgresql": pg_insert}
+PENDIENTE, EN_CURSO, HECHO, FALLIDO = "pendiente", "en_curso", "hecho", "fallido"
+LEASE_GRACE_SECONDS = 60  # la reserva dura el timeout de la tarea más este margen
+ERROR_MAX_CHARS = 2000
+
+metrics.registry.counter("jobs_total", "Intentos de trabajos en segundo plano por tarea y resultado")
+
+
+# ---------- Cron ----------
+def _cron_field(spec: str, lo: int, hi: int) -> Set[int]:
+    values = set()
+    for part in spec.split(","):
+        rango, _, paso = part.partition("/")
+        if rango == "*":
+            start, end = lo, hi
+        elif "-" in rango:
+            start, end = map(int, rango.split("-"))
+        else:
+            start = end = int(rango)
+            if paso:
+                end = hi
+        if not lo <= start <= end <= hi:
+            raise ValueError(f"cron: {part!r} fuera de {lo}-{hi}")
+        values.update(range(start, end + 1, int(paso or 1)))
+    return values
+
+
+class Cron:
+    """Expresión de cron de cinco campos (minuto hora día mes día-de-semana,
+    0 = domingo) con *, listas, rangos y pasos; en hora local."""
+
+    def __init__(self, expr: str):
+        fields = expr.split()
+        if len(fields) != 5:
+            raise ValueError(f"cron: se esperaban 5 campos en {expr!r}")
+        self.expr = expr
+        self.minutes = _cron_field(fields[0], 0, 59)
+        self.hours = _cron_field(fields[1], 0, 23)
+        self.days = _cron_field(fields[2], 1, 31)
+        self.months = _cron_field(fields[3], 1, 12)
+        self.weekdays = {d % 7 for d in _cron_field(fields[4], 0, 7)}
+        # como en cron: si se restringen día del mes y de la semana, basta con uno
+        self._any_day = fields[2] != "*" and fields[4] != "*"
+
+    def _day_matches(self, dt: datetime) -> bool:
+        if dt.month not in self.months:
+            return False
+        day, weekday = dt.day in self.days, (dt.weekday() + 1) % 7 in self.weekdays
+        return (day or weekday) if self._any_day else (day and weekday)
+
+    def next_after(self, ts: float) -> float:
+        """Primer minuto que coincide, estrictamente después de ts."""
+        dt = datetime.fromtimestamp(ts).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limite = dt + timedelta(days=366 * 5)
+        while dt < limite:
+            if not self._day_matches(dt):
+                dt = dt.replace(hour=0, minute=0) + timedelta(days=1)
+            elif dt.hour not in self.hours:
+                dt = dt.replace(minute=0) + timedelta(hours=1)
+            elif dt.minute not in self.minutes:
+                dt += timedelta(minutes=1)
+            else:
+                return dt.timestamp()
+        raise ValueError(f"cron: {self.expr!r} nunca coincide")
+
+
+# ---------- Tareas ----------
+Handler = Callable[[dict], Awaitable[Any]]
+
+
+class Tarea:
+    def __init__(self, nombre: str, fn: Handler, concurrency: int, max_intentos: int, timeout: float,
+                 cron: Optional[Cron]):
+        self.nombre = nombre
+        self.fn = fn
+        self.concurrency = concurrency
+        self.max_intentos = max_intentos
+        self.timeout = timeout
+        self.cron = cron
+        self.next_run: Optional[float] = None  # próximo disparo del cron
+        self.running = 0
+
+
+def job_row(tarea: str, payload: Optional[dict] = None, run_at: Optional[float] = None,
+            clave: Optional[str] = None, max_intentos: Optional[int] = None) -> dict:
+    now = time.time()
+    return {
+        "tarea": tarea, "payload": json.dumps(payload or {}), "clave": clave, "estado": PENDIENTE,
+        "intentos": 0, "max_intentos": max_intentos,
+        "run_at": now if run_at is None else run_at, "created_at": now,
+    }
+
+
+def backoff(intento: int) -> float:
+    """Espera antes del próximo intento: exponencial con tope y jitter (50-100 %)."""
+    delay = min(settings.JOBS_BACKOFF_MAX_SECONDS, settings.JOBS_BACKOFF_SECONDS * 2 ** (intento - 1))
+    return delay * random.uniform(0.5, 1)
+
+
+class JobQueue:
+    """Trabajos en segundo plano sobre la tabla background_job.
+
+    Se encolan en la transacción de quien los pide (enqueue con la sesión del
+    lote del escritor: si el turno no se guarda, el trabajo tampoco) y los corre
+    un bucle en cada proceso, con un tope global y otro por tarea. Tomar
+    trabajos es un UPDATE con una reserva propia (locked_by), así varios workers
+    comparten la cola sin correr dos veces lo mismo; una reserva vencida (el
+    proceso murió) se retoma. Los fallos se reintentan con backoff exponencial
+    hasta max_intentos y después quedan como fallidos. Las tareas con cron se
+    encolan con clave por disparo: aunque todos los workers lo calculen, entra una vez.
+    """
+
+    def __init__(self, concurrency: int, poll_seconds: float):
+        self.concurrency = concurrency
+        self.poll = poll_seconds
+        self.origin = uuid.uuid4().hex[:12]
+        self.tareas: Dict[str, Tarea] = {}
+        self._claims = itertools.count(1)
+        self._running: Dict[asyncio.Task, Tuple[int, str]] = {}
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.counts: Counter = Counter()
+
+    def tarea(self, nombre: str, *, concurrency: int = 1, max_intentos: Optional[int] = None,
+              timeout: Optional[float] = None, cron: Optional[str] = None):
+        """Registra fn(payload) como tarea; con cron además se encola sola."""
+        def register(fn: Handler) -> Handler:
+            self.tareas[nombre] = Tarea(
+                nombre, fn, concurrency, max_intentos or settings.JOBS_MAX_ATTEMPTS,
+                timeout or settings.JOBS_TIMEOUT_SECONDS, Cron(cron) if cron else None,
+            )
+            return fn
+        return register
+
+    # ---------- Encolar ----------
+    async def enqueue(self, session: AsyncSession, rows: Iterable[dict]) -> int:
+        """Inserta filas de job_row en la transacción de session (no confirma).
+        Las que repiten una clave existente se ignoran; devuelve las insertadas."""
+        rows = list(rows)
+        if not rows:
+            return 0
+        for row in rows:
+            if row["max_intentos"] is None:
+                tarea = self.tareas.get(row["tarea"])
+                row["max_intentos"] = tarea.max_intentos if tarea else settings.JOBS_MAX_ATTEMPTS
+        conn = await session.connection()
+        stmt = _INSERTS[conn.dialect.name](TABLE).on_conflict_do_nothing(index_elements=[TABLE.c.clave])
+        result = await session.execute(stmt, rows)
+        return result.rowcount
+
+    async def defer(self, tarea: str, payload: Optional[dict] = None, *, delay: float = 0,
+                    clave: Optional[str] = None) -> bool:
+        """Encola en una transacción propia; False si la clave ya existía."""
+        async with AsyncSessionLocal() as session:
+            inserted = await self.enqueue(session, [job_row(tarea, payload, time.time() + delay, clave)])
+            await session.commit()
+        self.wake()
+        return bool(inserted)
+
+    def wake(self):
+        """Busca trabajos ya, sin esperar al próximo sondeo (p. ej. en on_commit)."""
+        if self._wake is not None:
+            self._wake.set()
+
+    # ---------- Bucle ----------
+    async def start(self):
+        if self._task is not None:
+            return
+        now = time.time()
+        for tarea in self.tareas.values():
+            if tarea.cron:
+                tarea.next_run = tarea.cron.next_after(now)
+        self._wake = asyncio.Event()
+        # contexto vacío: sus consultas no son de ninguna solicitud
+        self._task = asyncio.get_running_loop().create_task(self._run(), context=contextvars.Context())
+
+    async def stop(self, timeout: float = settings.JOBS_SHUTDOWN_SECONDS):
+        """Deja de tomar trabajos, espera los que corren hasta timeout y
+        devuelve a la cola (sin contar el intento) los que no terminaron."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        if self._running:
+            _, pending = await asyncio.wait(list(self._running), timeout=timeout)
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.wait(pending)
+
+    async def _run(self):
+        while True:
+            self._wake.clear()
+            try:
+                await self._schedule_cron()
+                await self._claim_and_start()
+            except Exception:
+                logger.exception("Cola de trabajos")
+            timeout = self.poll
+            crons = [t.next_run for t in self.tareas.values() if t.next_run is not None]
+            if crons:
+                timeout = max(0, min(timeout, min(crons) - time.time()))
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _schedule_cron(self):
+        now = time.time()
+        rows = []
+        for tarea in self.tareas.values():
+            if tarea.next_run is not None and tarea.next_run <= now:
+                rows.append(job_row(tarea.nombre, run_at=tarea.next_run, clave=f"cron:{tarea.nombre}:{int(tarea.next_run)}"))
+                tarea.next_run = tarea.cron.next_after(now)
+        if rows:
+            async with AsyncSessionLocal() as session:
+                await self.enqueue(session, rows)
+                await session.commit()
+
+    async def _claim_and_start(self):
+        while len(self._running) < self.concurrency:
+            jobs = await self._claim(self.concurrency - len(self._running))
+            if not jobs:
+                return
+            for job in jobs:
+                tarea = self.tareas[job[1]]
+                tarea.running += 1
+                task = asyncio.get_running_loop().create_task(self._execute(tarea, *job), context=contextvars.Context())
+                self._running[task] = (job[0], tarea.nombre)
+                task.add_done_callback(self._finished)
+
+    def _finished(self, task: asyncio.Task):
+        _, nombre = self._running.pop(task)
+        self.tareas[nombre].running -= 1
+
+    @staticmethod
+    def _listos(now: float):
+        return or_(
+            and_(TABLE.c.estado == PENDIENTE, TABLE.c.run_at <= now),
+            and_(TABLE.c.estado == EN_CURSO, TABLE.c.locked_until < now),
+        )
+
+    async def _claim(self, free: int) -> list:
+        libres = {n: t.concurrency - t.running for n, t in self.tareas.items() if t.concurrency > t.running}
+        if not libres:
+            return []
+        now = time.time()
+        token = f"{self.origin}:{next(self._claims)}"
+        async with AsyncSessionLocal() as session:
+            candidatos = (await session.execute(
+                select(TABLE.c.id, TABLE.c.tarea)
+                .where(self._listos(now), TABLE.c.tarea.in_(libres))
+                .order_by(TABLE.c.run_at, TABLE.c.id).limit(free * 4)
+            )).all()
+            elegidos, por_tarea = [], Counter()
+            for job_id, nombre in candidatos:
+                if len(elegidos) < free and por_tarea[nombre] < libres[nombre]:
+                    elegidos.append(job_id)
+                    por_tarea[nombre] += 1
+            if not elegidos:
+                return []
+            # la lectura va en su propia transacción: en SQLite una que leyó y
+            # después escribe no espera el lock (busy_timeout), falla si otro escribió
+            await session.commit()
+            # el WHERE se repite: si otro proceso los tomó entre medio, no se pisan
+            for nombre in por_tarea:
+                lease = now + self.tareas[nombre].timeout + LEASE_GRACE_SECONDS
+                await session.execute(
+                    update(TABLE)
+                    .where(TABLE.c.id.in_(elegidos), TABLE.c.tarea == nombre, self._listos(now))
+                    .values(estado=EN_CURSO, locked_by=token, locked_until=lease, intentos=TABLE.c.intentos + 1)
+                )
+            rows = (await session.execute(
+                select(TABLE.c.id, TABLE.c.tarea, TABLE.c.payload, TABLE.c.intentos, TABLE.c.max_intentos)
+                .where(TABLE.c.id.in_(elegidos), TABLE.c.locked_by == token)
+            )).all()
+            await session.commit()
+        return [(*row, token) for row in rows]
+
+    async def _execute(self, tarea: Tarea, job_id: int, nombre: str, payload: str, intentos: int,
+                       max_intentos: int, token: str):
+        mine = and_(TABLE.c.id == job_id, TABLE.c.locked_by == token)
+        try:
+            await asyncio.wait_for(tarea.fn(json.loads(payload)), tarea.timeout)
+        except asyncio.CancelledError:
+            # apagado: vuelve a la cola sin gastar el intento
+            await self._update(mine, estado=PENDIENTE, intentos=intentos - 1, locked_by=None, locked_until=None)
+            raise
+        except Exception as exc:
+            error = f"{type(exc).__name__}: {exc}"[:ERROR_MAX_CHARS]
+            if intentos < max_intentos:
+                resultado = "retry"
+                await self._update(mine, estado=PENDIENTE, run_at=time.time() + backoff(intentos),
+                                   locked_by=None, locked_until=None, error=error)
+            else:
+                resultado = FALLIDO
+                logger.exception("Trabajo %s #%s falló tras %s intentos", nombre, job_id, intentos)
+                await self._update(mine, estado=FALLIDO, finished_at=time.time(), locked_by=None,
+                                   locked_until=None, error=error)
+        else:
+            resultado = HECHO
+            await self._update(mine, estado=HECHO, finished_at=time.time(), locked_by=None, locked_until=None)
+        self.counts[resultado] += 1
+        metrics.registry.inc("jobs_total", tarea=nombre, resultado=resultado)
+
+    @staticmethod
+    async def _update(where, **values):
+        async with AsyncSessionLocal() as session:
+            await session.execute(update(TABLE).where(where).values(**values))
+            await session.commit()
+
+    # ---------- Mantenimiento y estado ----------
+    async def purge(self, session: AsyncSession, keep_hours: int) -> int:
+        """Borra los trabajos terminados hace más de keep_hours."""
+        limite = time.time() - keep_hours * 3600
+        result = await session.execute(
+            delete(TABLE).where(TABLE.c.estado.in_((HECHO, FALLIDO)), TABLE.c.finished_at < limite)
+        )
+        return result.rowcount
+
+    async def stats(self, session: AsyncSession) -> dict:
+        por_estado = dict((await session.execute(
+            select(TABLE.c.estado, func.count()).group_by(TABLE.c.estado)
+        )).all())
+        return {
+            "origin": self.origin,
+            "running": {n: t.running for n, t in self.tareas.items() if t.running},
+            "processed": dict(self.counts),
+            "queue": por_estado,
+            "cron": {
+                n: datetime.fromtimestamp(t.next_run).isoformat(timespec="minutes")
+                for n, t in self.tareas.items() if t.next_run is not None
+            },
+        }
+
+
+jobs = JobQueue(settings.JOBS_CONCURRENCY, settings.JOBS_POLL_SECONDS)
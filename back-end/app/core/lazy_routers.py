@@ -0,0 +1,46 @@
+import importlib
+from typing import Dict
+
+from fastapi import FastAPI
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class LazyRouters:
+    """Routers de poco uso que se importan e incluyen en la app recién con la
+    primera solicitud a su prefijo (o al armar el esquema OpenAPI): ni su
+    import ni el armado de sus rutas pesan en el arranque en frío.
+
+    routers: prefijo -> módulo con un `router` que ya lleva ese prefijo."""
+
+    def __init__(self, app: FastAPI, routers: Dict[str, str]):
+        self.app = app
+        self.pending = dict(routers)
+        openapi = app.openapi
+
+        def openapi_completo():
+            self.load_all()
+            return openapi()
+
+        app.openapi = openapi_completo
+        app.add_middleware(LazyRoutersMiddleware, routers=self)
+
+    def load(self, path: str):
+        # sin awaits: dos solicitudes concurrentes no incluyen dos veces el mismo router
+        for prefix in [p for p in self.pending if path == p or path.startswith(p + "/")]:
+            module = importlib.import_module(self.pending.pop(prefix))
+            self.app.include_router(module.router)
+
+    def load_all(self):
+        for prefix in list(self.pending):
+            self.load(prefix)
+
+
+class LazyRoutersMiddleware:
+    def __init__(self, app: ASGIApp, routers: LazyRouters):
+        self.app = app
+        self.routers = routers
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if self.routers.pending and scope["type"] in ("http", "websocket"):
+            self.routers.load(scope["path"])
+        await self.app(scope, receive, send)
@@ -0,0 +1,188 @@
+import contextvars
+import logging
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+
+from app.core.config import settings
+
+slow_log = logging.getLogger("app.slow_requests")
+
+# Métricas por proceso en formato de texto de Prometheus (sin dependencias):
+# con varios workers cada uno expone las suyas.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(**labels) -> Labels:
+    return tuple(sorted(labels.items()))
+
+
+def _fmt_labels(labels: Labels, extra: str = "") -> str:
+    parts = [f'{k}="{v}"' for k, v in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help: Dict[str, Tuple[str, str]] = {}  # nombre -> (tipo, ayuda)
+        self._values: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, List[float]]] = {}  # [cubetas..., suma, cuenta]
+        self._buckets: Dict[str, Sequence[float]] = {}
+
+    def counter(self, name: str, help_text: str):
+        self._help[name] = ("counter", help_text)
+        self._values[name] = {}
+
+    def gauge(self, name: str, help_text: str):
+        self._help[name] = ("gauge", help_text)
+        self._values[name] = {}
+
+    def histogram(self, name: str, help_text: str, buckets: Sequence[float]):
+        self._help[name] = ("histogram", help_text)
+        self._histograms[name] = {}
+        self._buckets[name] = buckets
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        key = _labels(**labels)
+        with self._lock:
+            series = self._values[name]
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, **labels):
+        key = _labels(**labels)
+        buckets = self._buckets[name]
+        with self._lock:
+            series = self._histograms[name]
+            data = series.get(key)
+            if data is None:
+                data = series[key] = [0.0] * (len(buckets) + 2)
+            index = bisect_left(buckets, value)  # primera cota >= value (le es inclusivo)
+            if index < len(buckets):
+                data[index] += 1
+            data[-2] += value
+            data[-1] += 1
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            for name, (kind, help_text) in self._help.items():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                if kind != "histogram":
+                    for labels, value in self._values[name].items():
+                        lines.append(f"{name}{_fmt_labels(labels)} {value:g}")
+                    continue
+                buckets = self._buckets[name]
+                for labels, data in self._histograms[name].items():
+                    cumulative = 0
+                    for bound, count in zip(buckets, data):
+                        cumulative += count
+                        le = 'le="%g"' % bound
+                        lines.append(f"{name}_bucket{_fmt_labels(labels, le)} {cumulative:g}")
+                    le = 'le="+Inf"'
+                    lines.append(f"{name}_bucket{_fmt_labels(labels, le)} {data[-1]:g}")
+                    lines.append(f"{name}_sum{_fmt_labels(labels)} {data[-2]:g}")
+                    lines.append(f"{name}_count{_fmt_labels(labels)} {data[-1]:g}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+registry.counter("http_requests_total", "Solicitudes atendidas por ruta y código")
+registry.gauge("http_requests_in_flight", "Solicitudes en curso")
+registry.histogram("http_request_duration_seconds", "Latencia por ruta (hasta enviar cabeceras)", LATENCY_BUCKETS)
+registry.histogram("http_request_db_queries", "Consultas SQL por solicitud", QUERY_BUCKETS)
+registry.counter("db_queries_total", "Consultas SQL ejecutadas por ruta")
+registry.counter("db_query_seconds_total", "Tiempo en consultas SQL por ruta")
+registry.counter("rate_limit_rejections_total", "Solicitudes rechazadas por el rate limiting")
+registry.counter("slow_requests_total", "Solicitudes por encima de SLOW_REQUEST_MS")
+
+
+# ---------- Estadísticas por solicitud ----------
+class RequestStats:
+    __slots__ = ("queries", "query_seconds", "statements", "_started")
+
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.statements: List[str] = []
+        self._started: Optional[float] = None
+
+
+_current: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar("request_stats", default=None)
+
+
+def current_stats() -> Optional[RequestStats]:
+    return _current.get()
+
+
+def bind_stats(stats: Optional[RequestStats]):
+    """Atribuye las consultas siguientes (en este contexto) a stats; devuelve el token."""
+    return _current.set(stats)
+
+
+def unbind_stats(token):
+    _current.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is not None:
+        stats._started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is not None and stats._started is not None:
+        stats.query_seconds += time.perf_counter() - stats._started
+        stats._started = None
+        stats.queries += 1
+        if len(stats.statements) < settings.SLOW_REQUEST_MAX_STATEMENTS:
+            stats.statements.append(statement)
+
+
+def instrument_engine(sync_engine):
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# ---------- Registro de una solicitud ----------
+def request_started():
+    registry.inc("http_requests_in_flight", 1)
+
+
+def request_finished(method: str, route: str, status: int, seconds: float, stats: RequestStats, path: str):
+    registry.inc("http_requests_in_flight", -1)
+    registry.inc("http_requests_total", method=method, route=route, status=str(status))
+    registry.observe("http_request_duration_seconds", seconds, method=method, route=route)
+    registry.observe("http_request_db_queries", stats.queries, method=method, route=route)
+    if stats.queries:
+        registry.inc("db_queries_total", stats.queries, route=route)
+        registry.inc("db_query_seconds_total", stats.query_seconds, route=route)
+    if seconds * 1000 >= settings.SLOW_REQUEST_MS:
+        registry.inc("slow_requests_total", method=method, route=route)
+        _log_slow(method, path, status, seconds, stats)
+
+
+def rate_limited(scope: str):
+    registry.inc("rate_limit_rejections_total", scope=scope)
+
+
+def _log_slow(method: str, path: str, status: int, seconds: float, stats: RequestStats):
+    # sentencias agrupadas: un N+1 aparece como la misma consulta repetida N veces
+    repeated = Counter(" ".join(s.split()) for s in stats.statements)
+    detail = "\n".join(f"  x{count} {sql}" for sql, count in repeated.most_common())
+    slow_log.warning(
+        "%s %s -> %s en %.0f ms, %d consultas (%.0f ms en SQL)%s\n%s",
+        method, path, status, seconds * 1000, stats.queries, stats.query_seconds * 1000,
+        " [sentencias truncadas]" if stats.queries > len(stats.statements) else "", detail,
+    )
@@ -0,0 +1,132 @@
+from collections import Counter
+from datetime import date
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import String, cast, delete, event, func, insert, inspect, literal, select, union_all
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.models import Ocupacion, Turno, TurnoArchivado
+
+# Resumen de ocupación mantenido de forma incremental: cada alta, cambio o
+# baja de un turno suma o resta 1 en sus filas, en la misma transacción.
+# Una fila por dimensión y no por combinación: el tamaño depende de los
+# catálogos (sucursales, servicios, trabajadores), no de la cantidad de turnos.
+# rebuild() lo recalcula entero con un único INSERT ... SELECT ... GROUP BY.
+Key = Tuple[str, date, str, int, str]
+
+TABLE = Ocupacion.__table__
+KEY_COLUMNS = [TABLE.c.dimension, TABLE.c.fecha, TABLE.c.hora, TABLE.c.sucursal_id, TABLE.c.valor]
+_INSERTS = {"sqlite": sqlite_insert, "postgresql": pg_insert}
+
+
+def bloque(hora: str) -> str:
+    return hora[:2] + ":00"
+
+
+def keys(fecha: Optional[date], hora: str, sucursal_id: Optional[int], servicio_id: Optional[int],
+         asignado: Optional[str]) -> List[Key]:
+    # sin fecha el turno no cae en ningún día: no se resume
+    if fecha is None:
+        return []
+    base = (fecha, bloque(hora), sucursal_id or 0)
+    return [
+        ("sucursal", *base, ""),
+        ("servicio", *base, str(servicio_id) if servicio_id is not None else ""),
+        ("trabajador", *base, asignado or ""),
+    ]
+
+
+def apply(connection, deltas: Counter):
+    """Suma cada delta a su fila (la crea si no existe); las filas en 0 las purga rebuild()."""
+    params = [
+        {"dimension": k[0], "fecha": k[1], "hora": k[2], "sucursal_id": k[3], "valor": k[4], "cantidad": n}
+        for k, n in deltas.items() if n
+    ]
+    if not params:
+        return
+    stmt = _INSERTS[connection.dialect.name](TABLE)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=KEY_COLUMNS, set_={"cantidad": TABLE.c.cantidad + stmt.excluded.cantidad}
+    )
+    connection.execute(stmt, params)
+
+
+def add_rows(connection, rows: Iterable[dict]):
+    """Para inserciones por Core (carga masiva), que no pasan por los eventos del ORM."""
+    deltas = Counter()
+    for r in rows:
+        deltas.update(keys(r.get("fecha"), r["hora"], r.get("sucursal_id"), r.get("servicio_id"), r.get("asignadoA")))
+    apply(connection, deltas)
+
+
+def _current_keys(t: Turno) -> List[Key]:
+    return keys(t.fecha, t.hora, t.sucursal_id, t.servicio_id, t.asignadoA)
+
+
+def _previous_keys(t: Turno) -> List[Key]:
+    attrs = inspect(t).attrs
+
+    def before(name: str):
+        history = attrs[name].history
+        return history.deleted[0] if history.deleted else getattr(t, name)
+    return keys(before("fecha"), before("hora"), before("sucursal_id"), before("servicio_id"), before("asignadoA"))
+
+
+# Toda escritura de turnos por el ORM (sync o async) pasa por acá
+@event.listens_for(Turno, "after_insert")
+def _turno_insertado(mapper, connection, target: Turno):
+    apply(connection, Counter(_current_keys(target)))
+
+
+@event.listens_for(Turno, "after_update")
+def _turno_actualizado(mapper, connection, target: Turno):
+    deltas = Counter(_current_keys(target))
+    deltas.subtract(_previous_keys(target))  # lo que no cambió queda en 0 y no se escribe
+    apply(connection, deltas)
+
+
+@event.listens_for(Turno, "after_delete")
+def _turno_eliminado(mapper, connection, target: Turno):
+    deltas = Counter()
+    deltas.subtract(_previous_keys(target))
+    apply(connection, deltas)
+
+
+def _aggregate(connection):
+    # también los archivados: el resumen conserva el histórico (app.core.archivo);
+    # la migración 3 corre antes de que exista turno_archivo
+    tablas = [Turno.__table__]
+    if inspect(connection).has_table(TurnoArchivado.__tablename__):
+        tablas.append(TurnoArchivado.__table__)
+    columnas = ("fecha", "hora", "sucursal_id", "servicio_id", "asignadoA")
+    src = union_all(*(select(*[table.c[c] for c in columnas]) for table in tablas)).subquery()
+    base = [src.c.fecha, func.substr(src.c.hora, 1, 2).concat(literal(":00")), func.coalesce(src.c.sucursal_id, 0)]
+    valores = {
+        "sucursal": literal(""),
+        "servicio": func.coalesce(cast(src.c.servicio_id, String), ""),
+        "trabajador": func.coalesce(src.c.asignadoA, ""),
+    }
+    return union_all(*(
+        select(literal(dimension), *base, valor, func.count())
+        .where(src.c.fecha.isnot(None))
+        .group_by(*base, valor)
+        for dimension, valor in valores.items()
+    ))
+
+
+def rebuild(connection) -> int:
+    """Recalcula el resumen desde turno y turno_archivo; devuelve las filas escritas."""
+    connection.execute(delete(TABLE))
+    connection.execute(insert(TABLE).from_select([*KEY_COLUMNS, TABLE.c.cantidad], _aggregate(connection)))
+    return connection.execute(select(func.count()).select_from(TABLE)).scalar()
+
+
+def drift(connection) -> int:
+    """Filas en las que el resumen no coincide con los turnos (0 = consistente)."""
+    expected = {tuple(row[:5]): row[5] for row in connection.execute(_aggregate(connection))}
+    actual = {
+        tuple(row[:5]): row[5]
+        for row in connection.execute(select(*KEY_COLUMNS, TABLE.c.cantidad).where(TABLE.c.cantidad != 0))
+    }
+    return sum(1 for k in expected.keys() | actual.keys() if expected.get(k) != actual.get(k))
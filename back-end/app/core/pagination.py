@@ -0,0 +1,85 @@
+import base64
+import json
+import threading
+import time
+from typing import Any, Callable, List, Optional, Sequence
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_
+
+from app.core.config import settings
+
+
+# ---------- Cursores opacos (keyset) ----------
+def encode_cursor(order_by: str, values: Sequence[Any]) -> str:
+    raw = json.dumps({"o": order_by, "v": list(values)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, order_by: str, types: Sequence[type]) -> List[Any]:
+    """Valores del cursor, uno por columna del orden y del tipo de esa columna."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = data["v"]
+        if data["o"] != order_by or not isinstance(values, list) or len(values) != len(types):
+            raise ValueError(cursor)
+        # bool es subclase de int: true no es un id
+        if any(type(v) is bool or not isinstance(v, t) for v, t in zip(values, types)):
+            raise ValueError(cursor)
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor inválido")
+    return values
+
+
+def keyset_filter(columns: Sequence[Any], values: Sequence[Any]):
+    # (c1, c2, ...) > (v1, v2, ...) expandido, funciona en cualquier motor
+    clauses = []
+    for i, col in enumerate(columns):
+        prefix = [c == v for c, v in zip(columns[:i], values[:i])]
+        clauses.append(and_(*prefix, col > values[i]))
+    if len(columns) == 1:
+        return clauses[0]
+    # c1 >= v1 redundante: deja buscar en el índice en vez de recorrerlo desde el inicio
+    return and_(columns[0] >= values[0], or_(*clauses))
+
+
+# ---------- Conteo total cacheado ----------
+class CachedCount:
+    """Total de filas cacheado con TTL; las escrituras lo ajustan sin recontar."""
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._value: Optional[int] = None
+        self._expires = 0.0
+        self._lock = threading.Lock()
+
+    def peek(self) -> Optional[int]:
+        with self._lock:
+            if self._value is not None and time.monotonic() < self._expires:
+                return self._value
+        return None
+
+    def store(self, value: int) -> int:
+        with self._lock:
+            self._value = int(value)
+            self._expires = time.monotonic() + self.ttl_seconds
+        return self._value
+
+    def get(self, loader: Callable[[], int], exact: bool = False) -> int:
+        cached = None if exact else self.peek()
+        if cached is not None:
+            return cached
+        return self.store(loader())
+
+    def add(self, delta: int):
+        with self._lock:
+            if self._value is not None:
+                self._value = max(0, self._value + delta)
+
+    def invalidate(self):
+        with self._lock:
+            self._value = None
+
+
+turno_total = CachedCount(settings.TOTAL_COUNT_TTL_SECONDS)
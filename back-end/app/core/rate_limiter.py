@@ -1,21 +1,262 @@
+import logging
+import math
+import socket
+import sqlite3
+import threading
 import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Tuple
+from urllib.parse import urlparse
+
 from fastapi import HTTPException, status
+from starlette.concurrency import run_in_threadpool
+from app.core import metrics
 from app.core.config import settings
 
-_STORE = {}  # key -> (count, reset_ts)
+logger = logging.getLogger(__name__)
+
+
+# ---------- Backends ----------
+# Cada backend implementa hit(current, previous, ttl) de forma atómica:
+# incrementa la ventana actual y devuelve (actual, anterior).
+
+class MemoryBackend:
+    """LRU en memoria con expiración; sólo vale para un proceso."""
+
+    blocking = False
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._data: "OrderedDict[str, Tuple[int, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key: str, now: float) -> int:
+        item = self._data.get(key)
+        if item is None:
+            return 0
+        if item[1] <= now:
+            del self._data[key]
+            return 0
+        return item[0]
+
+    def hit(self, current: str, previous: str, ttl: int) -> Tuple[int, int]:
+        now = time.time()
+        with self._lock:
+            count = self._get(current, now) + 1
+            self._data[current] = (count, now + ttl)
+            self._data.move_to_end(current)
+            prev = self._get(previous, now)
+            # primero se descartan claves vencidas desde la más antigua, luego por tamaño
+            while self._data:
+                oldest_key, (_, expires) = next(iter(self._data.items()))
+                if expires > now and len(self._data) <= self.max_keys:
+                    break
+                del self._data[oldest_key]
+            return count, prev
+
+
+class SQLiteBackend:
+    """Contadores en un fichero SQLite compartido por todos los workers del host."""
+
+    blocking = True
+    CLEANUP_EVERY = 1000
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._hits = 0
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limit "
+                "(key TEXT PRIMARY KEY, count INTEGER NOT NULL, expires REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def hit(self, current: str, previous: str, ttl: int) -> Tuple[int, int]:
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT INTO rate_limit (key, count, expires) VALUES (?, 1, ?) "
+                "ON CONFLICT(key) DO UPDATE SET count = count + 1",
+                (current, now + ttl),
+            )
+            rows = dict(conn.execute(
+                "SELECT key, count FROM rate_limit WHERE key IN (?, ?) AND expires > ?",
+                (current, previous, now),
+            ).fetchall())
+            self._hits += 1
+            if self._hits % self.CLEANUP_EVERY == 0:
+                conn.execute("DELETE FROM rate_limit WHERE expires <= ?", (now,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return rows.get(current, 1), rows.get(previous, 0)
+
+
+class RedisError(RuntimeError):
+    """Respuesta de error (-ERR ...) de Redis."""
+
+
+class RedisBackend:
+    """Cliente RESP mínimo (INCR/EXPIRE/GET en pipeline) para Redis o compatibles."""
+
+    blocking = True
+
+    def __init__(self, url: str, timeout: float = 1.0):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+            conn = (sock, sock.makefile("rb"))
+            self._local.conn = conn
+            setup = []
+            if self.password:
+                setup.append(("AUTH", self.password))
+            if self.db:
+                setup.append(("SELECT", str(self.db)))
+            if setup:
+                try:
+                    self._pipeline(*setup)
+                except RedisError:
+                    self._close()  # sin AUTH/SELECT la conexión no sirve
+                    raise
+        return conn
+
+    def _close(self):
+        conn, self._local.conn = getattr(self._local, "conn", None), None
+        if conn is not None:
+            conn[0].close()
+
+    @staticmethod
+    def _encode(*args: str) -> bytes:
+        parts = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = str(arg).encode()
+            parts.append(f"${len(data)}\r\n".encode() + data + b"\r\n")
+        return b"".join(parts)
+
+    @staticmethod
+    def _read(reader):
+        line = reader.readline()
+        if not line:
+            raise ConnectionError("Redis connection closed")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"-":
+            return RedisError(payload.decode())  # se lanza tras leer el resto del pipeline
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            size = int(payload)
+            if size < 0:
+                return None
+            data = reader.read(size + 2)
+            return data[:-2].decode()
+        return payload.decode()
+
+    def _pipeline(self, *commands):
+        sock, reader = self._connect()
+        try:
+            sock.sendall(b"".join(self._encode(*cmd) for cmd in commands))
+            replies = [self._read(reader) for _ in commands]
+        except Exception:
+            # con respuestas sin leer la conexión queda desfasada: se descarta
+            self._close()
+            raise
+        for reply in replies:
+            if isinstance(reply, RedisError):
+                raise reply
+        return replies
+
+    def hit(self, current: str, previous: str, ttl: int) -> Tuple[int, int]:
+        count, _, prev = self._pipeline(
+            ("INCR", current), ("EXPIRE", current, str(ttl)), ("GET", previous)
+        )
+        return int(count), int(prev or 0)
+
+
+# ---------- Limitador ----------
+class RateLimiter:
+    """Ventana deslizante aproximada (ventana actual + anterior ponderada)."""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def hit(self, key: str, limit: int, window_seconds: int = 60) -> Tuple[bool, int]:
+        now = time.time()
+        window = int(now // window_seconds)
+        elapsed = now - window * window_seconds
+        try:
+            current, previous = self.backend.hit(
+                f"{key}:{window}", f"{key}:{window - 1}", window_seconds * 2
+            )
+        except Exception:
+            # si el backend compartido no responde se deja pasar antes que tirar la API
+            logger.exception("Rate limit backend failure")
+            return True, 0
+        estimated = previous * (1 - elapsed / window_seconds) + current
+        retry_after = max(1, math.ceil(window_seconds - elapsed))
+        return estimated <= limit, retry_after
+
+
+def build_backend(name: str):
+    if name == "memory":
+        return MemoryBackend(settings.RATE_LIMIT_MEMORY_MAX_KEYS)
+    if name == "sqlite":
+        path = settings.RATE_LIMIT_SQLITE_PATH or str(Path(__file__).resolve().parents[2] / "ratelimit.db")
+        return SQLiteBackend(path)
+    if name == "redis":
+        return RedisBackend(settings.RATE_LIMIT_REDIS_URL)
+    raise ValueError(f"Unknown rate limit backend: {name}")
+
+
+def _backend_name() -> str:
+    # con varios workers cada proceso contaría solo lo suyo: se comparte por SQLite
+    if not settings.RATE_LIMIT_BACKEND:
+        return "sqlite" if settings.WEB_CONCURRENCY > 1 else "memory"
+    if settings.RATE_LIMIT_BACKEND == "memory" and settings.WEB_CONCURRENCY > 1:
+        logger.warning("RATE_LIMIT_BACKEND=memory con %s workers: cada uno aplica el límite por separado",
+                       settings.WEB_CONCURRENCY)
+    return settings.RATE_LIMIT_BACKEND
+
+
+limiter = RateLimiter(build_backend(_backend_name()))
+
 
 def check_rate(key: str, limit: int, window_seconds: int = 60):
-    now = time.time()
-    count, reset = _STORE.get(key, (0, now + window_seconds))
-    if now > reset:
-        count = 0
-        reset = now + window_seconds
-    count += 1
-    _STORE[key] = (count, reset)
-    if count > limit:
-        retry_after = int(reset - now)
+    allowed, retry_after = limiter.hit(key, limit, window_seconds)
+    if not allowed:
+        metrics.rate_limited(key.split(":", 1)[0])
         raise HTTPException(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
             detail=f"Rate limit exceeded. Retry after {retry_after} seconds.",
             headers={"Retry-After": str(retry_after)}
         )
+
+
+async def check_rate_async(key: str, limit: int, window_seconds: int = 60):
+    """check_rate para handlers async: los backends sqlite y redis hacen I/O
+    bloqueante y van al threadpool, como en el middleware."""
+    if limiter.backend.blocking:
+        await run_in_threadpool(check_rate, key, limit, window_seconds)
+    else:
+        check_rate(key, limit, window_seconds)
@@ -0,0 +1,153 @@
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime
+from typing import Iterator, Optional
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.models import RevokedToken
+
+TABLE = RevokedToken.__table__
+_INSERTS = {"sqlite": sqlite_insert, "postgresql": pg_insert}
+
+
+class BloomFilter:
+    """Conjunto aproximado de cadenas: sin falsos negativos y con falsos
+    positivos acotados a fp_rate mientras no se superen `capacity` elementos."""
+
+    def __init__(self, capacity: int, fp_rate: float):
+        self.capacity = capacity
+        self.bits = max(64, int(-capacity * math.log(fp_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.bits / capacity * math.log(2)))
+        self.count = 0
+        self._array = bytearray((self.bits + 7) // 8)
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self._array)
+
+    def _positions(self, key: str) -> Iterator[int]:
+        # doble hashing sobre un único blake2b: k posiciones con dos enteros de 64 bits
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.bits for i in range(self.hashes))
+
+    def add(self, key: str):
+        for p in self._positions(key):
+            self._array[p >> 3] |= 1 << (p & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._array[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
+
+
+class RevocationList:
+    """jti revocados, de este proceso y de los demás (tabla revoked_token).
+
+    El filtro descarta sin ir a la base casi todos los tokens; un positivo
+    (revocado o falso positivo) se confirma leyendo por jti. Cada sync_seconds
+    se traen las revocaciones nuevas; al llenarse el filtro se rearma solo
+    con las que no vencieron. Las lecturas van por una Session sync: la del
+    router o la que entrega AsyncSession.run_sync.
+    """
+
+    def __init__(self, capacity: int, fp_rate: float, sync_seconds: float):
+        self.fp_rate = fp_rate
+        self.sync_seconds = sync_seconds
+        self._filter = BloomFilter(capacity, fp_rate)
+        self._last_id = 0
+        self._synced_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._syncing = False
+        self.lookups = 0
+        self.rejected = 0
+
+    def _stale(self) -> bool:
+        return self._synced_at is None or time.monotonic() - self._synced_at >= self.sync_seconds
+
+    def needs_db(self, jti: Optional[str]) -> bool:
+        """False para casi todos los tokens: no hace falta abrir conexión."""
+        return self._stale() or (jti is not None and jti in self._filter)
+
+    def is_revoked(self, session, jti: Optional[str]) -> bool:
+        if self._stale():
+            self.sync(session)
+        if jti is None or jti not in self._filter:
+            return False
+        self.lookups += 1
+        found = session.execute(select(TABLE.c.id).where(TABLE.c.jti == jti)).first() is not None
+        self.rejected += found
+        return found
+
+    def sync(self, session):
+        # Con AsyncSession.run_sync esto corre en el event loop y la consulta le
+        # devuelve el control: el lock nunca se toma alrededor de la base (otra
+        # solicitud que lo esperara bloquearía el loop). Una sola sincronización
+        # a la vez; mientras tanto las demás usan el filtro que ya hay.
+        with self._lock:
+            if self._syncing and self._synced_at is not None:
+                return
+            self._syncing = True
+            last_id, count, capacity = self._last_id, self._filter.count, self._filter.capacity
+        try:
+            vigentes = TABLE.c.expires_at > datetime.utcnow()
+            rows = session.execute(select(TABLE.c.id, TABLE.c.jti).where(TABLE.c.id > last_id, vigentes)).all()
+            rebuild = count + len(rows) > capacity
+            if rebuild:
+                rows = session.execute(select(TABLE.c.id, TABLE.c.jti).where(vigentes)).all()
+                nuevo = BloomFilter(max(capacity, 2 * len(rows)), self.fp_rate)
+                for _, jti in rows:
+                    nuevo.add(jti)
+            with self._lock:
+                if rebuild:
+                    self._filter = nuevo
+                else:
+                    for _, jti in rows:
+                        self._filter.add(jti)
+                if rows:
+                    self._last_id = max(self._last_id, max(row_id for row_id, _ in rows))
+                # tras rearmar queda vencido: lo revocado mientras se leía entra
+                # en la próxima sincronización incremental (ids mayores)
+                self._synced_at = None if rebuild else time.monotonic()
+        finally:
+            with self._lock:
+                self._syncing = False
+
+    async def revoke(self, session: AsyncSession, *claims: dict) -> bool:
+        """Guarda los jti (con su exp) y los suma al filtro.
+        False si alguno ya estaba revocado: un refresh token reutilizado."""
+        rows = [
+            {"jti": c["jti"], "expires_at": datetime.utcfromtimestamp(c["exp"])}
+            for c in claims if c.get("jti") and c.get("exp")
+        ]
+        if not rows:
+            return True
+        conn = await session.connection()
+        stmt = _INSERTS[conn.dialect.name](TABLE).on_conflict_do_nothing(index_elements=[TABLE.c.jti])
+        result = await session.execute(stmt, rows)
+        await session.commit()
+        with self._lock:
+            for row in rows:
+                self._filter.add(row["jti"])
+        return result.rowcount == len(rows)
+
+    def stats(self) -> dict:
+        return {
+            "entries": self._filter.count,
+            "capacity": self._filter.capacity,
+            "filter_bytes": self._filter.size_bytes,
+            "lookups": self.lookups,
+            "rejected": self.rejected,
+        }
+
+
+revocations = RevocationList(
+    settings.REVOCATION_CAPACITY, settings.REVOCATION_FP_RATE, settings.REVOCATION_SYNC_SECONDS
+)
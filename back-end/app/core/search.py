@@ -0,0 +1,107 @@
+from typing import Iterable, Optional
+
+from sqlalchemy import column, func, literal_column, select, table, text
+
+# Índice de búsqueda de texto: una tabla FTS5 con tokenizador trigram, así
+# cualquier subcadena de 3 o más caracteres (sin distinguir mayúsculas) se
+# resuelve por el índice en vez de un LIKE '%x%' que recorre la tabla.
+# Lo mantienen triggers de SQLite: valen igual para el ORM y para los insert
+# por Core de la carga masiva. Cada fila lleva rowid = id * len(TIPOS) + tipo,
+# de modo que los triggers borran por rowid sin buscar.
+NAME = "busqueda"
+MIN_TERM = 3  # el tokenizador trigram no indexa términos más cortos
+
+# tipo -> (tabla, columna título, columna detalle)
+FUENTES = {
+    "turno": ("turno", "cliente", None),
+    "servicio": ("servicio", "nombre", "descripcion"),
+    "sucursal": ("sucursal", "nombre", "ciudad"),
+    "user": ("user", "email", "full_name"),
+}
+TIPOS = list(FUENTES)
+
+INDEX = table(NAME, column("rowid"), column("titulo"), column("detalle"))
+# el título pesa el doble que el detalle en el ranking
+RANK = func.bm25(literal_column(NAME), 2.0, 1.0)
+
+
+def _rowid(tipo: str, ref: str) -> str:
+    return f"{ref}.id * {len(TIPOS)} + {TIPOS.index(tipo)}"
+
+
+def _valores(tipo: str, ref: str) -> str:
+    tabla, titulo, detalle = FUENTES[tipo]
+    return f"{_rowid(tipo, ref)}, {ref}.{titulo}, {f'{ref}.{detalle}' if detalle else 'NULL'}"
+
+
+def ddl() -> list:
+    sentencias = [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {NAME} USING fts5(titulo, detalle, tokenize='trigram')"
+    ]
+    for tipo, (tabla, titulo, detalle) in FUENTES.items():
+        campos = ", ".join(c for c in (titulo, detalle) if c)
+        insertar = f"INSERT INTO {NAME}(rowid, titulo, detalle) VALUES ({_valores(tipo, 'new')});"
+        borrar = f"DELETE FROM {NAME} WHERE rowid = {_rowid(tipo, 'old')};"
+        sentencias += [
+            f'CREATE TRIGGER IF NOT EXISTS {NAME}_{tabla}_ai AFTER INSERT ON "{tabla}" BEGIN {insertar} END',
+            f'CREATE TRIGGER IF NOT EXISTS {NAME}_{tabla}_au AFTER UPDATE OF {campos} ON "{tabla}" '
+            f"BEGIN {borrar} {insertar} END",
+            f'CREATE TRIGGER IF NOT EXISTS {NAME}_{tabla}_ad AFTER DELETE ON "{tabla}" BEGIN {borrar} END',
+        ]
+    return sentencias
+
+
+def create(connection):
+    for sentencia in ddl():
+        connection.execute(text(sentencia))
+
+
+def rebuild(connection) -> int:
+    """Recarga el índice desde las tablas; devuelve las filas indexadas."""
+    connection.execute(text(f"DELETE FROM {NAME}"))
+    for tipo, (tabla, _, _) in FUENTES.items():
+        connection.execute(text(
+            f'INSERT INTO {NAME}(rowid, titulo, detalle) SELECT {_valores(tipo, "t")} FROM "{tabla}" AS t'
+        ))
+    return connection.execute(text(f"SELECT count(*) FROM {NAME}")).scalar()
+
+
+def _quote(term: str) -> str:
+    return '"' + term.replace('"', '""') + '"'
+
+
+def phrase(value: str) -> Optional[str]:
+    """La cadena entera como subcadena (lo mismo que LIKE '%value%'); None si es muy corta."""
+    return _quote(value) if len(value) >= MIN_TERM else None
+
+
+def terms(q: str) -> Optional[str]:
+    """Cada palabra de q como subcadena, todas requeridas; se ignoran las muy cortas."""
+    palabras = [_quote(p) for p in q.split() if len(p) >= MIN_TERM]
+    return " ".join(palabras) if palabras else None
+
+
+def ids(tipo: str, expression: str, campo: str = "titulo"):
+    """Subconsulta con los ids de `tipo` cuyo `campo` coincide, para usar en un IN."""
+    n = len(TIPOS)
+    return (
+        select(INDEX.c.rowid / n)
+        .where(INDEX.c[campo].match(expression), INDEX.c.rowid % n == TIPOS.index(tipo))
+    )
+
+
+def query(expression: str, tipos: Iterable[str], skip: int, limit: int):
+    """Resultados rankeados (mejor primero): rowid, titulo, detalle, puntaje."""
+    n = len(TIPOS)
+    stmt = select(INDEX.c.rowid, INDEX.c.titulo, INDEX.c.detalle, RANK.label("puntaje")).where(
+        literal_column(NAME).match(expression)
+    )
+    codigos = sorted(TIPOS.index(t) for t in tipos)
+    if len(codigos) < n:
+        stmt = stmt.where((INDEX.c.rowid % n).in_(codigos))
+    return stmt.order_by(RANK, INDEX.c.rowid).offset(skip).limit(limit)
+
+
+def tipo_id(rowid: int):
+    n = len(TIPOS)
+    return TIPOS[rowid % n], rowid // n
@@ -1,20 +1,181 @@
-from passlib.context import CryptContext
-from datetime import datetime, timedelta
-from jose import jwt
-from typing import Optional
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import timedelta
+from fastapi import HTTPException, status
+from functools import lru_cache
+from typing import Optional, Tuple
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 ALGORITHM = "HS256"
 
+@lru_cache(maxsize=None)
+def pwd_context():
+    # passlib se importa con el primer hash, no al arrancar (y en cada proceso del pool).
+    # min_rounds = rounds: los hashes con menos coste se marcan para rehash en el login
+    from passlib.context import CryptContext
+
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+        bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    )
+
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return pwd_context().hash(password)
 
 def verify_password(plain: str, hashed: str) -> bool:
-    return pwd_context.verify(plain, hashed)
+    return pwd_context().verify(plain, hashed)
+
+def verify_and_update_password(plain: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    return pwd_context().verify_and_update(plain, hashed)
+
+
+# ---------- Tokens (JWT HS256) ----------
+# Firma y verificación con la stdlib: el HMAC se prepara una vez con la clave
+# (cada token copia ese estado) y la cabecera de siempre se compara como texto,
+# sin volver a decodificarla. Mismo formato que emitía python-jose: los tokens
+# ya entregados siguen valiendo. Los de acceso duran poco; el refresh token
+# (typ=refresh) solo sirve en /auth/refresh y se rota en cada uso.
+ACCESS = "access"
+REFRESH = "refresh"
+
+class TokenError(Exception):
+    """Token mal formado, con firma inválida, vencido o de otro tipo."""
+
+def _b64encode(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+_HMAC = hmac.new(settings.SECRET_KEY.encode(), digestmod=hashlib.sha256)
+_HEADER = _b64encode(b'{"alg":"HS256","typ":"JWT"}')
+_HEADER_STR = _HEADER.decode()
+
+def _sign(signing_input: bytes) -> bytes:
+    mac = _HMAC.copy()
+    mac.update(signing_input)
+    return mac.digest()
+
+def encode_token(claims: dict) -> str:
+    signing_input = _HEADER + b"." + _b64encode(json.dumps(claims, separators=(",", ":")).encode())
+    return (signing_input + b"." + _b64encode(_sign(signing_input))).decode()
+
+def verify_token(token: str, typ: str = ACCESS) -> dict:
+    """Claims de un token válido y vigente del tipo pedido; TokenError si no."""
+    try:
+        header, payload, signature = token.split(".")
+        if header != _HEADER_STR and json.loads(_b64decode(header)).get("alg") != ALGORITHM:
+            raise TokenError("Algoritmo no soportado")
+        if not hmac.compare_digest(_sign(f"{header}.{payload}".encode()), _b64decode(signature)):
+            raise TokenError("Firma inválida")
+        claims = json.loads(_b64decode(payload))
+        exp = claims.get("exp")
+        if exp is not None and exp <= time.time():
+            raise TokenError("Token vencido")
+    except (ValueError, TypeError, AttributeError) as exc:
+        raise TokenError("Token mal formado") from exc
+    # los tokens anteriores a los refresh tokens no tienen typ: son de acceso
+    if claims.get("typ", ACCESS) != typ:
+        raise TokenError("Tipo de token incorrecto")
+    return claims
+
+def _issue(subject: str, typ: str, lifetime: timedelta) -> Tuple[str, int]:
+    now = int(time.time())
+    ttl = int(lifetime.total_seconds())
+    claims = {"sub": str(subject), "typ": typ, "jti": secrets.token_hex(16), "iat": now, "exp": now + ttl}
+    return encode_token(claims), ttl
+
+def create_access_token(subject: str, expires_delta: Optional[timedelta] = None) -> Tuple[str, int]:
+    return _issue(subject, ACCESS, expires_delta or timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES))
+
+def create_refresh_token(subject: str) -> Tuple[str, int]:
+    return _issue(subject, REFRESH, timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS))
+
+
+# ---------- bcrypt fuera del event loop ----------
+# Pool dedicado (hilos por defecto: bcrypt libera el GIL; "process" para hosts
+# multinúcleo) con un tope de trabajos pendientes: al superarlo se responde 503
+# en vez de encolar y degradar el resto de endpoints.
+class HashingStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.rejected = 0
+        self.ops = {}  # op -> [count, total_seconds, max_seconds]
+
+    def acquire(self) -> bool:
+        with self._lock:
+            if self.pending >= settings.HASH_MAX_PENDING:
+                self.rejected += 1
+                return False
+            self.pending += 1
+            return True
+
+    def release(self, op: str, elapsed: float):
+        with self._lock:
+            self.pending -= 1
+            count, total, worst = self.ops.get(op, (0, 0.0, 0.0))
+            self.ops[op] = (count + 1, total + elapsed, max(worst, elapsed))
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "pending": self.pending,
+                "rejected": self.rejected,
+                "ops": {
+                    op: {"count": c, "avg_ms": round(t / c * 1000, 2), "max_ms": round(m * 1000, 2)}
+                    for op, (c, t, m) in self.ops.items()
+                },
+            }
+
+
+hashing_stats = HashingStats()
+_executor: Optional[Executor] = None
+_executor_lock = threading.Lock()
+
+def _get_executor() -> Executor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = settings.HASH_WORKERS or os.cpu_count() or 1
+            if settings.HASH_EXECUTOR == "process":
+                _executor = ProcessPoolExecutor(max_workers=workers)
+            else:
+                _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        return _executor
+
+def shutdown_hashing():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+async def _run_hashing(op: str, fn, *args):
+    if not hashing_stats.acquire():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Servidor ocupado, reintente en unos segundos",
+            headers={"Retry-After": "1"},
+        )
+    start = time.perf_counter()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_get_executor(), fn, *args)
+    finally:
+        hashing_stats.release(op, time.perf_counter() - start)
+
+async def hash_password_async(password: str) -> str:
+    return await _run_hashing("hash", get_password_hash, password)
 
-def create_access_token(subject: str, expires_delta: Optional[timedelta] = None):
-    expire = datetime.utcnow() + (expires_delta or timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES))
-    to_encode = {"exp": expire, "sub": str(subject)}
-    encoded = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
-    return encoded, int((expire - datetime.utcnow()).total_seconds())
+async def verify_and_update_async(plain: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    return await _run_hashing("verify", verify_and_update_password, plain, hashed)
@@ -0,0 +1,98 @@
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete
+
+from app.core import archivo, ocupacion
+from app.core.config import settings
+from app.core.events import turno_events
+from app.core.jobs import job_row, jobs
+from app.core.writer import WriteBatch, turno_writer
+from app.db import AsyncSessionLocal
+from app.models import IdempotencyKey, RevokedToken, Turno, TurnoRead
+
+logger = logging.getLogger(__name__)
+
+# Tareas en segundo plano (app.core.jobs); importar este módulo las registra.
+
+
+# ---------- Recordatorios ----------
+def recordatorios(turnos: Iterable[Tuple[int, Optional[datetime]]]) -> List[dict]:
+    """Filas de background_job para (id, inicio) de turnos recién guardados:
+    REMINDER_MINUTES_BEFORE antes del turno (o ya, si falta menos)."""
+    if settings.REMINDER_MINUTES_BEFORE <= 0:
+        return []
+    now = time.time()
+    antes = timedelta(minutes=settings.REMINDER_MINUTES_BEFORE)
+    rows = []
+    for turno_id, inicio in turnos:
+        if inicio is None or inicio.timestamp() <= now:
+            continue
+        clave = f"recordatorio:{turno_id}:{inicio.isoformat(timespec='minutes')}"
+        payload = {"turno_id": turno_id, "inicio": inicio.isoformat()}
+        rows.append(job_row("recordatorio", payload, max(now, (inicio - antes).timestamp()), clave))
+    return rows
+
+
+async def encolar_recordatorios(batch: WriteBatch, turnos: Iterable[Tuple[int, Optional[datetime]]]):
+    """En el lote del escritor: se encolan solo si los turnos quedan guardados."""
+    rows = recordatorios(turnos)
+    if rows:
+        await jobs.enqueue(batch.session, rows)
+        batch.on_commit(jobs.wake)
+
+
+@jobs.tarea("recordatorio", concurrency=4)
+async def recordatorio(payload: dict):
+    async with AsyncSessionLocal() as session:
+        t = await session.get(Turno, payload["turno_id"])
+    if t is None or t.inicio != datetime.fromisoformat(payload["inicio"]):
+        return  # borrado, archivado o reprogramado: el turno nuevo tiene su propio recordatorio
+    logger.info("Recordatorio: turno %s de %s el %s a las %s", t.id, t.cliente, t.fecha, t.hora)
+    # las pantallas de la sucursal lo reciben como evento `reminder`
+    turno_events.publish("reminder", TurnoRead.from_orm(t).dict(), (t.sucursal_id,), t.fecha)
+
+
+# ---------- Limpieza ----------
+@jobs.tarea("limpieza", cron="7 * * * *")
+async def limpieza(payload: dict):
+    """Borra lo vencido: claves de idempotencia, tokens revocados ya expirados y trabajos terminados."""
+    ahora = datetime.utcnow()
+    async with AsyncSessionLocal() as session:
+        claves = await session.execute(delete(IdempotencyKey).where(
+            IdempotencyKey.created_at < ahora - timedelta(hours=settings.IDEMPOTENCY_TTL_HOURS)
+        ))
+        tokens = await session.execute(delete(RevokedToken).where(RevokedToken.expires_at < ahora))
+        trabajos = await jobs.purge(session, settings.JOBS_KEEP_HOURS)
+        await session.commit()
+    logger.info("Limpieza: %s claves de idempotencia, %s tokens revocados, %s trabajos",
+                claves.rowcount, tokens.rowcount, trabajos)
+
+
+# ---------- Archivo ----------
+@jobs.tarea("archivo", cron="15 3 * * *", timeout=3600)
+async def archivar_turnos(payload: dict):
+    """Pasa a turno_archivo los turnos con más de ARCHIVE_AFTER_DAYS."""
+    if settings.ARCHIVE_AFTER_DAYS <= 0:
+        return
+    movidos = await archivo.archivar(payload.get("dias", settings.ARCHIVE_AFTER_DAYS))
+    logger.info("Archivo: %s turnos movidos a turno_archivo", movidos)
+
+
+# ---------- Resumen de ocupación ----------
+@jobs.tarea("ocupacion", cron="30 3 * * *", timeout=1800)
+async def reconciliar_ocupacion(payload: dict):
+    """Compara el resumen con turno y lo recalcula si se desvió (p. ej. por
+    cambios hechos a mano en la base). Va por el escritor: ningún turno se
+    guarda mientras tanto."""
+    async def job(batch: WriteBatch) -> int:
+        conn = await batch.session.connection()
+        diferencias = await conn.run_sync(ocupacion.drift)
+        if diferencias:
+            await conn.run_sync(ocupacion.rebuild)
+        return diferencias
+    diferencias = await turno_writer.submit(job)
+    if diferencias:
+        logger.warning("Resumen de ocupación recalculado: %s filas no coincidían", diferencias)
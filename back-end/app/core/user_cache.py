@@ -0,0 +1,41 @@
+import time
+from typing import Optional
+
+from sqlalchemy import event
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.security import verify_token
+from app.models import User
+
+# claims por token (nunca más allá de su exp) y filas de usuario por sub
+claims_cache = TTLCache(settings.USER_CACHE_MAX_ENTRIES, settings.USER_CACHE_TTL_SECONDS)
+user_cache = TTLCache(settings.USER_CACHE_MAX_ENTRIES, settings.USER_CACHE_TTL_SECONDS)
+
+
+def decode_token(token: str) -> dict:
+    claims = claims_cache.get(token)
+    if claims is None:
+        claims = verify_token(token)
+        exp = claims.get("exp")
+        claims_cache.set(token, claims, exp - time.time() if exp else None)
+    return claims
+
+
+def get_cached_user(sub: str) -> Optional[User]:
+    return user_cache.get(str(sub))
+
+
+def cache_user(user: User):
+    user_cache.set(str(user.id), user)
+
+
+# Cualquier UPDATE/DELETE de un usuario por el ORM (sync o async) lo saca de la caché
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_user(mapper, connection, target: User):
+    user_cache.pop(str(target.id))
+
+
+def stats() -> dict:
+    return {"claims": claims_cache.stats(), "users": user_cache.stats()}
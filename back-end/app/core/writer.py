@@ -0,0 +1,181 @@
+import asyncio
+import contextvars
+import logging
+import time
+from typing import Any, Awaitable, Callable, List, Optional
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core import metrics
+from app.core.config import settings
+from app.db import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+def _run_callbacks(fns: List[Callable[[], Any]]):
+    # uno que falla no debe impedir los demás ni llegar a _run: tras el COMMIT,
+    # reintentar el lote aplicaría de nuevo escrituras ya confirmadas
+    for fn in fns:
+        try:
+            fn()
+        except Exception:
+            logger.exception("Callback del escritor de turnos")
+
+
+class WriteBatch:
+    """Lo que ve cada trabajo: la sesión del lote y callbacks para el resultado
+    del commit (p. ej. ajustar índices en memoria solo si quedó persistido)."""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        self._on_commit: List[Callable[[], Any]] = []
+        self._on_rollback: List[Callable[[], Any]] = []
+
+    def on_commit(self, fn: Callable[[], Any]):
+        self._on_commit.append(fn)
+
+    def on_rollback(self, fn: Callable[[], Any]):
+        self._on_rollback.append(fn)
+
+
+Job = Callable[[WriteBatch], Awaitable[Any]]
+
+
+class WriteQueue:
+    """Escritor único de turnos con commit agrupado.
+
+    Las escrituras se encolan y una sola tarea las aplica: cada trabajo corre en
+    su propio SAVEPOINT (si falla, solo se deshace lo suyo) y el lote entero se
+    confirma con un único COMMIT. Sin competir por el lock de SQLite, el
+    rendimiento crece con la carga: cuanto más se encola, más grande el lote.
+    Si el COMMIT falla se deshace el lote y se reintenta cada trabajo por separado.
+    """
+
+    def __init__(self, max_batch: int, max_wait_ms: float):
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._before_batch: List[Job] = []
+        self.batches = 0
+        self.jobs = 0
+        self.retried = 0
+
+    def _ensure_started(self):
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            # contexto vacío: la tarea no debe heredar el de la solicitud que la arrancó
+            self._task = asyncio.get_running_loop().create_task(self._run(), context=contextvars.Context())
+
+    def before_batch(self, hook: Job):
+        """hook(batch) corre al abrir cada lote, antes de los trabajos y en la misma transacción."""
+        self._before_batch.append(hook)
+
+    async def submit(self, job: Job) -> Any:
+        """Encola job(batch) y devuelve su resultado una vez confirmado el commit."""
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((job, future, metrics.current_stats()))
+        return await future
+
+    async def close(self):
+        """Termina cuando se aplicó todo lo encolado hasta ahora."""
+        if self._task is not None and not self._task.done():
+            await self._queue.put(None)
+            await self._task
+        self._task = None
+
+    async def _collect(self) -> list:
+        # None (de close) cierra el lote y detiene al escritor
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch and batch[-1] is not None:
+            try:
+                batch.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+        return batch
+
+    async def _run(self):
+        while True:
+            items = await self._collect()
+            stop = items[-1] is None
+            if stop:
+                items.pop()
+            if not items:
+                return
+            try:
+                await self._apply(items)
+            except Exception:
+                # el lote no se pudo confirmar: cada trabajo en su propia transacción
+                self.retried += len(items)
+                for item in items:
+                    if not item[1].done():
+                        try:
+                            await self._apply([item])
+                        except Exception as exc:
+                            if not item[1].done():
+                                item[1].set_exception(exc)
+            if stop:
+                return
+
+    async def _apply(self, items: list):
+        async with AsyncSessionLocal() as session:
+            batch = WriteBatch(session)
+            for hook in self._before_batch:
+                await hook(batch)
+            results = []
+            for job, future, stats in items:
+                if future.cancelled():
+                    results.append(None)
+                    continue
+                # los callbacks de un trabajo que falla no deben correr con el lote
+                on_commit, on_rollback = len(batch._on_commit), len(batch._on_rollback)
+                token = metrics.bind_stats(stats)  # sus consultas cuentan para la solicitud
+                try:
+                    async with session.begin_nested():
+                        result = await job(batch)
+                except Exception as exc:
+                    _run_callbacks(batch._on_rollback[on_rollback:])
+                    del batch._on_commit[on_commit:], batch._on_rollback[on_rollback:]
+                    results.append(exc)
+                else:
+                    results.append(result)
+                finally:
+                    metrics.unbind_stats(token)
+            try:
+                await session.commit()
+            except Exception:
+                await session.rollback()
+                _run_callbacks(batch._on_rollback)
+                raise
+        # desde acá el lote ya está confirmado: solo un fallo del COMMIT se reintenta
+        self.batches += 1
+        self.jobs += len(items)
+        _run_callbacks(batch._on_commit)
+        for (_, future, _), result in zip(items, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "jobs": self.jobs,
+            "avg_batch": round(self.jobs / self.batches, 2) if self.batches else 0,
+            "retried": self.retried,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+        }
+
+
+turno_writer = WriteQueue(settings.WRITE_BATCH_MAX, settings.WRITE_BATCH_WAIT_MS)
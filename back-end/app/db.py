@@ -1,32 +1,151 @@
 # app/db.py
+import logging
+from contextlib import contextmanager
 from sqlmodel import SQLModel, create_engine, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from pathlib import Path
-from sqlalchemy import text
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from app.core.config import settings
+from app.core.metrics import instrument_engine
+from app.migrations import LATEST_VERSION, migrate, stored_version
 
-DB_FILE = Path(__file__).resolve().parents[1] / "turnos.db"
-DATABASE_URL = f"sqlite:///{DB_FILE}"
+logger = logging.getLogger(__name__)
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+DEFAULT_DB_FILE = Path(__file__).resolve().parents[1] / "turnos.db"
+if settings.SQLITE_PATH:
+    DATABASE_URL = f"sqlite:///{settings.SQLITE_PATH}"
+else:
+    DATABASE_URL = settings.DATABASE_URL or f"sqlite:///{DEFAULT_DB_FILE}"
+IS_SQLITE = make_url(DATABASE_URL).get_backend_name() == "sqlite"
+# archivo de la base (o el local por defecto): junto a él va el lock del arranque
+DB_FILE = Path((IS_SQLITE and make_url(DATABASE_URL).database) or DEFAULT_DB_FILE)
+
+# isolation_level=None: la transacción la abre el evento "begin" (ver _sqlite_profile);
+# así pysqlite/aiosqlite respetan los SAVEPOINT del escritor de turnos
+SQLITE_CONNECT_ARGS = {"isolation_level": None} if IS_SQLITE else {}
 
 # Para SQLite en local no hace falta check_same_thread si no usas async
-engine = create_engine(DATABASE_URL, echo=True)
+engine = create_engine(DATABASE_URL, echo=settings.DEBUG, connect_args=SQLITE_CONNECT_ARGS)
+
+# ---- Motor async ----
+# Mismo DATABASE_URL con el driver async de su dialecto
+_ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgres": "postgresql+asyncpg",
+    "postgresql": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
+
+def to_async_url(url: str) -> str:
+    scheme, sep, rest = url.partition("://")
+    return _ASYNC_DRIVERS.get(scheme.split("+")[0], scheme) + sep + rest
+
+ASYNC_DATABASE_URL = to_async_url(DATABASE_URL)
+
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    poolclass=AsyncAdaptedQueuePool,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+    echo=settings.DEBUG,
+    connect_args=SQLITE_CONNECT_ARGS,
+)
+
+# ---- Perfil de producción de SQLite ----
+# WAL: lectores y el escritor no se bloquean entre sí; synchronous=NORMAL es
+# seguro con WAL (se puede perder la última transacción ante un corte de luz,
+# no corromper la base); busy_timeout espera el lock en vez de fallar al instante.
+def _sqlite_pragmas() -> list:
+    return [
+        f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}",
+        f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}",
+        f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}",
+        f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}",
+        f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_KB}",  # negativo = KiB
+    ]
+
+def _sqlite_profile(sync_engine):
+    @event.listens_for(sync_engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in _sqlite_pragmas():
+            cursor.execute(pragma)
+        cursor.close()
+
+    @event.listens_for(sync_engine, "begin")
+    def _begin(conn):
+        conn.exec_driver_sql("BEGIN")
 
-def create_db_and_tables():
+if IS_SQLITE:
+    _sqlite_profile(engine)
+    _sqlite_profile(async_engine.sync_engine)
+
+# consultas y tiempo en SQL por solicitud (/metrics y log de solicitudes lentas)
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+
+# expire_on_commit=False: los handlers devuelven el objeto tras el commit sin recargarlo
+AsyncSessionLocal = sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
+@contextmanager
+def startup_lock():
+    """Con varios workers, uno solo a la vez crea el esquema y migra; el resto espera."""
+    if fcntl is None:  # Windows: sin workers múltiples
+        yield
+        return
+    with open(f"{DB_FILE}.lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _schema_ready() -> bool:
+    with engine.connect() as conn:
+        return stored_version(conn) == LATEST_VERSION
+
+def create_db_and_tables() -> bool:
+    """Deja el esquema al día; False si ya lo estaba y no hubo que tocar nada."""
     # Importa modelos para registrar metadata
     from . import models  # noqa: F401
 
-    # 1) Crea tablas que no existan (user, servicio, sucursal, turno)
-    SQLModel.metadata.create_all(engine)
+    # 0) Base en la última migración: se evita create_all, que inspecciona cada tabla
+    if _schema_ready():
+        return False
 
-    # 2) Asegura que la tabla 'turno' tenga la columna 'sucursal_id'
-    with engine.begin() as conn:
-        # Si la tabla 'turno' no existe, create_all ya la debió crear.
-        cols = conn.execute(text("PRAGMA table_info('turno')")).fetchall()
-        nombres = [c[1] for c in cols]  # [name for each column]
-        if "sucursal_id" not in nombres:
-            conn.execute(text("ALTER TABLE turno ADD COLUMN sucursal_id INTEGER"))
-            # (En SQLite no añadimos FK con ALTER TABLE; no es necesario para operar)
+    with startup_lock():
+        # otro worker pudo terminar de migrar mientras se esperaba el lock
+        if _schema_ready():
+            return False
+
+        logger.info("Creando tablas en la base de datos si no existen...")
+        # 1) Crea tablas que no existan (user, servicio, sucursal, turno)
+        SQLModel.metadata.create_all(engine)
+
+        # 2) Aplica las migraciones pendientes sobre bases ya existentes
+        with engine.begin() as conn:
+            applied = migrate(conn)
+            if applied:
+                logger.info("Migraciones aplicadas: %s", applied)
+    return True
 
 def get_session():
     with Session(engine) as session:
         yield session
 
+async def get_async_session():
+    async with AsyncSessionLocal() as session:
+        yield session
+
 
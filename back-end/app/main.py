@@ -1,53 +1,165 @@
 # app/main.py
-from fastapi import FastAPI
+# create_app() arma la aplicación e importa routers, base y demás dentro de la
+# fábrica: importar este módulo es barato. `app` se construye al pedirla
+# (uvicorn app.main:app) o con uvicorn --factory app.main:create_app.
+import logging
+import time
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from .db import create_db_and_tables
-from .api.routers import auth, users, turnos, servicios, health, sucursales
-from .core.errors import register_exception_handlers
-from .core.config import settings
-from slowapi import Limiter
-from slowapi.util import get_remote_address
-from fastapi import Request
-from slowapi.errors import RateLimitExceeded
-from slowapi.middleware import SlowAPIMiddleware
 from fastapi.responses import JSONResponse
+from .core.config import Settings, settings
 
-app = FastAPI(title="Sistema de Turnos", version="0.2.0", debug=True)
-
-# ✅✅✅ CORS DEBE IR PRIMERO - INMEDIATAMENTE DESPUÉS DE CREAR LA APP ✅✅✅
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # Permite todo
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# ✅ LUEGO el rate limiting
-limiter = Limiter(key_func=get_remote_address)
-app.state.limiter = limiter
-app.add_middleware(SlowAPIMiddleware)
-
-@app.exception_handler(RateLimitExceeded)
-def rate_limit_handler(request: Request, exc: RateLimitExceeded):
-    return JSONResponse(status_code=429, content={"detail": "Límite de solicitudes excedido!"})
-
-register_exception_handlers(app)
-
-@app.get("/")
-def root():
-    return {"message": "API Sistema de Turnos funcionando"}
-
-# ---- Routers ----
-app.include_router(auth.router, prefix="/auth", tags=["auth"])
-app.include_router(turnos.router)       
-app.include_router(servicios.router)         
-app.include_router(users.router)             
-app.include_router(health.router)
-app.include_router(sucursales.router)        
-
-# ---- Startup ----
-@app.on_event("startup")
-def on_startup():
-    print("Creando tablas en la base de datos si no existen...")
-    create_db_and_tables()
\ No newline at end of file
+logger = logging.getLogger(__name__)
+
+# ✅ Rutas sin rate limiting general
+RATE_LIMIT_EXEMPT = {"/", "/health", "/metrics", "/docs", "/redoc", "/openapi.json"}
+
+# ✅ Cache-Control por router para GET exitosos (el prefijo más largo gana; si
+# el handler fija uno, se respeta: catálogos y SSE ponen el suyo). no-cache =
+# el cliente guarda la respuesta pero revalida con If-None-Match (ETag).
+CACHE_CONTROL = {
+    "/turnos": "private, no-cache",
+    "/turnos/archivo": "private, max-age=300",  # histórico: cambia una vez por día
+    "/users": "private, no-cache",
+    "/me": "private, no-store",
+    "/auth": "no-store",
+    "/servicios": "no-cache",
+    "/sucursales": "no-cache",
+    "/reportes": "private, max-age=60",
+    "/search": "private, max-age=30",
+    "/health": "no-store",
+    "/metrics": "no-store",
+}
+
+def create_app(app_settings: Settings = settings) -> FastAPI:
+    from starlette.concurrency import run_in_threadpool
+    from .db import create_db_and_tables, async_engine
+    from .api.routers import auth, users, turnos, servicios, health, sucursales
+    from .core import cluster
+    from .core.compression import CompressionMiddleware
+    from .core.errors import register_exception_handlers
+    from .core.http_cache import CacheControlMiddleware
+    from .core.events import turno_events
+    from .core.lazy_routers import LazyRouters
+    from .core import metrics
+    from .core.rate_limiter import limiter
+    from .core.security import shutdown_hashing
+    from .core.writer import turno_writer
+
+    app = FastAPI(title="Sistema de Turnos", version="0.2.0", debug=app_settings.DEBUG)
+
+    # ✅✅✅ CORS DEBE IR PRIMERO - INMEDIATAMENTE DESPUÉS DE CREAR LA APP ✅✅✅
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],  # Permite todo
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=["X-Total-Count", "X-Next-Cursor", "ETag", "Last-Modified"],
+    )
+
+    # ✅ Compresión y Cache-Control: envuelven a los routers, por dentro del rate limiting
+    app.add_middleware(CacheControlMiddleware, policies=CACHE_CONTROL)
+    if app_settings.COMPRESSION_ENABLED:
+        app.add_middleware(
+            CompressionMiddleware,
+            minimum_size=app_settings.COMPRESSION_MIN_BYTES,
+            gzip_level=app_settings.GZIP_LEVEL,
+            brotli_quality=app_settings.BROTLI_QUALITY,
+        )
+
+    # ✅ LUEGO el rate limiting (mismo limitador que check_rate, límite general por IP)
+    @app.middleware("http")
+    async def api_rate_limit(request: Request, call_next):
+        if request.method == "OPTIONS" or request.url.path in RATE_LIMIT_EXEMPT:
+            return await call_next(request)
+        key = f"api:{request.client.host}"
+        if limiter.backend.blocking:
+            allowed, retry_after = await run_in_threadpool(limiter.hit, key, app_settings.RATE_LIMIT_API_PER_MIN)
+        else:
+            allowed, retry_after = limiter.hit(key, app_settings.RATE_LIMIT_API_PER_MIN)
+        if not allowed:
+            metrics.rate_limited("api")
+            return JSONResponse(
+                status_code=429,
+                content={"detail": "Límite de solicitudes excedido!"},
+                headers={"Retry-After": str(retry_after)},
+            )
+        return await call_next(request)
+
+    # ✅ Métricas por solicitud (va última: envuelve a las demás y cuenta también los 429)
+    @app.middleware("http")
+    async def request_metrics(request: Request, call_next):
+        stats = metrics.RequestStats()
+        token = metrics.bind_stats(stats)
+        metrics.request_started()
+        start = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            route = request.scope.get("route")
+            metrics.request_finished(
+                request.method, route.path if route else "unmatched", status,
+                time.perf_counter() - start, stats, request.url.path,
+            )
+            metrics.unbind_stats(token)
+
+    register_exception_handlers(app)
+
+    @app.get("/")
+    def root():
+        return {"message": "API Sistema de Turnos funcionando"}
+
+    # ---- Routers ----
+    app.include_router(auth.router, prefix="/auth", tags=["auth"])
+    app.include_router(turnos.router)
+    app.include_router(servicios.router)
+    app.include_router(users.router)
+    app.include_router(health.router)
+    app.include_router(sucursales.router)
+    # reportes y búsqueda: se importan con su primera solicitud (o con /openapi.json)
+    LazyRouters(app, {"/reportes": "app.api.routers.reportes", "/search": "app.api.routers.search"})
+
+    # ---- Startup ----
+    @app.on_event("startup")
+    def on_startup():
+        start = time.perf_counter()
+        create_db_and_tables()
+        logger.info("Base lista en %.0f ms", (time.perf_counter() - start) * 1000)
+
+    @app.on_event("startup")
+    async def start_workers():
+        turno_events.closed = False
+        await cluster.start()
+        if app_settings.JOBS_ENABLED:
+            # jobs y tareas se importan sólo en los procesos que corren los trabajos
+            from .core.jobs import jobs
+            from .core import tareas  # noqa: F401  registra las tareas en segundo plano
+            await jobs.start()
+
+    @app.on_event("shutdown")
+    async def on_shutdown():
+        turno_events.close()
+        if app_settings.JOBS_ENABLED:
+            from .core.jobs import jobs
+            await jobs.stop()  # antes que el escritor: una tarea puede estar esperándolo
+        await turno_writer.close()
+        await cluster.stop()
+        shutdown_hashing()
+        await async_engine.dispose()
+
+    return app
+
+_app = None
+
+def __getattr__(name: str):
+    # `from app.main import app` / uvicorn app.main:app: una sola instancia, creada al pedirla
+    global _app
+    if name == "app":
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
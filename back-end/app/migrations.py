@@ -0,0 +1,169 @@
+# app/migrations.py
+# Migraciones versionadas del esquema. create_all crea lo que falta en bases
+# nuevas; aquí va lo que hay que aplicar sobre bases ya existentes, en orden.
+# El arranque omite create_all si la base ya está en LATEST_VERSION: una tabla
+# o índice nuevo necesita también su migración.
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+# Columnas agregadas a tablas que ya existían en bases creadas antes
+ADDED_COLUMNS = {
+    "turno": [
+        ("sucursal_id", "INTEGER"),
+        ("fecha", "DATE"),
+        ("version", "INTEGER NOT NULL DEFAULT 1"),
+    ],
+    "sucursal": [
+        ("hora_apertura", "VARCHAR NOT NULL DEFAULT '08:00'"),
+        ("hora_cierre", "VARCHAR NOT NULL DEFAULT '18:00'"),
+        ("capacidad", "INTEGER NOT NULL DEFAULT 1"),
+    ],
+    "servicio": [
+        ("duracion_min", "INTEGER NOT NULL DEFAULT 30"),
+        ("capacidad", "INTEGER"),
+    ],
+}
+
+def _m1_added_columns(conn):
+    for table, columns in ADDED_COLUMNS.items():
+        cols = conn.execute(text(f"PRAGMA table_info('{table}')")).fetchall()
+        nombres = [c[1] for c in cols]  # [name for each column]
+        for name, ddl in columns:
+            if name not in nombres:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}"))
+                # (En SQLite no añadimos FK con ALTER TABLE; no es necesario para operar)
+
+def _create_indexes(conn, table: str, indexes):
+    # Lista fija por migración: los índices del modelo actual pueden usar
+    # columnas que en una base vieja recién agrega una migración posterior
+    for name, columns in indexes:
+        cols = ", ".join(f'"{c}"' for c in columns)
+        conn.execute(text(f'CREATE INDEX IF NOT EXISTS {name} ON "{table}" ({cols})'))
+
+def _m2_turno_indexes(conn):
+    _create_indexes(conn, "turno", [
+        ("ix_turno_sucursal_hora", ("sucursal_id", "hora")),
+        ("ix_turno_sucursal_fecha", ("sucursal_id", "fecha")),
+        ("ix_turno_asignado_hora", ("asignadoA", "hora")),
+        ("ix_turno_hora", ("hora",)),
+        ("ix_turno_user_id", ("user_id",)),
+        ("ix_turno_servicio_id", ("servicio_id",)),
+    ])
+
+def _m3_ocupacion(conn):
+    from .core import ocupacion
+    ocupacion.TABLE.create(conn, checkfirst=True)
+    for index in ocupacion.TABLE.indexes:
+        index.create(conn, checkfirst=True)
+    ocupacion.rebuild(conn)
+
+def _m4_busqueda(conn):
+    from .core import search
+    search.create(conn)
+    search.rebuild(conn)
+
+def _m5_revoked_token(conn):
+    from .models import RevokedToken
+    RevokedToken.__table__.create(conn, checkfirst=True)
+    for index in RevokedToken.__table__.indexes:
+        index.create(conn, checkfirst=True)
+
+def _m6_workers(conn):
+    from .models import TurnoEvento, WriteEpoch
+    for table in (WriteEpoch.__table__, TurnoEvento.__table__):
+        table.create(conn, checkfirst=True)
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+    conn.execute(text("INSERT INTO write_epoch (id, n) SELECT 1, 0 WHERE NOT EXISTS (SELECT 1 FROM write_epoch)"))
+
+def _m7_background_job(conn):
+    from .models import BackgroundJob
+    BackgroundJob.__table__.create(conn, checkfirst=True)
+    for index in BackgroundJob.__table__.indexes:
+        index.create(conn, checkfirst=True)
+
+# inicio = fecha + hora, en el formato con que SQLAlchemy guarda DateTime en SQLite
+# (\\: es un ':' literal para text(), no un parámetro)
+INICIO_BACKFILL = """
+UPDATE turno SET inicio = fecha || ' ' || hora || '\\:00.000000'
+WHERE inicio IS NULL AND fecha IS NOT NULL
+  AND (hora GLOB '[01][0-9]:[0-5][0-9]' OR hora GLOB '2[0-3]:[0-5][0-9]')
+"""
+
+def _m8_inicio_archivo(conn):
+    from .models import TurnoArchivado
+    nombres = [c[1] for c in conn.execute(text("PRAGMA table_info('turno')")).fetchall()]
+    if "inicio" not in nombres:
+        conn.execute(text("ALTER TABLE turno ADD COLUMN inicio DATETIME"))
+    conn.execute(text(INICIO_BACKFILL))
+    _create_indexes(conn, "turno", [("ix_turno_inicio", ("inicio",))])
+    TurnoArchivado.__table__.create(conn, checkfirst=True)
+    for index in TurnoArchivado.__table__.indexes:
+        index.create(conn, checkfirst=True)
+
+# turno_archivo con clave propia: el id de turno se reutiliza tras archivarlo
+ARCHIVO_TABLE_M9 = """
+CREATE TABLE turno_archivo (
+    cliente VARCHAR NOT NULL, tipo VARCHAR NOT NULL, hora VARCHAR NOT NULL, fecha DATE,
+    "asignadoA" VARCHAR, inicio DATETIME, id INTEGER NOT NULL, turno_id INTEGER NOT NULL,
+    version INTEGER NOT NULL, servicio_id INTEGER, user_id INTEGER, sucursal_id INTEGER,
+    archivado_at DATETIME NOT NULL, PRIMARY KEY (id)
+)
+"""
+ARCHIVO_COLUMNS_M9 = (
+    'cliente, tipo, hora, fecha, "asignadoA", inicio, version, servicio_id, user_id, sucursal_id, archivado_at'
+)
+
+def _m9_archivo_id(conn):
+    nombres = [c[1] for c in conn.execute(text("PRAGMA table_info('turno_archivo')")).fetchall()]
+    if "turno_id" not in nombres:
+        conn.execute(text("ALTER TABLE turno_archivo RENAME TO turno_archivo_m8"))
+        for name in ("ix_turno_archivo_cliente", "ix_turno_archivo_sucursal_fecha", "ix_turno_archivo_fecha"):
+            conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        conn.execute(text(ARCHIVO_TABLE_M9))
+        conn.execute(text(
+            f"INSERT INTO turno_archivo (id, turno_id, {ARCHIVO_COLUMNS_M9})"
+            f" SELECT id, id, {ARCHIVO_COLUMNS_M9} FROM turno_archivo_m8"
+        ))
+        conn.execute(text("DROP TABLE turno_archivo_m8"))
+    _create_indexes(conn, "turno_archivo", [
+        ("ix_turno_archivo_cliente", ("cliente",)),
+        ("ix_turno_archivo_turno_id", ("turno_id",)),
+        ("ix_turno_archivo_sucursal_fecha", ("sucursal_id", "fecha")),
+        ("ix_turno_archivo_fecha", ("fecha",)),
+    ])
+
+MIGRATIONS = [
+    (1, "columnas agregadas antes de versionar el esquema", _m1_added_columns),
+    (2, "índices compuestos de turno", _m2_turno_indexes),
+    (3, "resumen de ocupación, cargado desde los turnos existentes", _m3_ocupacion),
+    (4, "índice FTS5 de búsqueda con sus triggers, cargado desde las tablas", _m4_busqueda),
+    (5, "tokens revocados", _m5_revoked_token),
+    (6, "coordinación entre workers (epoch de escrituras y eventos)", _m6_workers),
+    (7, "trabajos en segundo plano", _m7_background_job),
+    (8, "inicio (fecha y hora) de cada turno y tabla de archivo", _m8_inicio_archivo),
+    (9, "clave propia en turno_archivo (turno_id puede repetirse)", _m9_archivo_id),
+]
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+def stored_version(conn) -> int:
+    """Versión registrada sin crear nada (0 si la base es nueva); para el arranque rápido."""
+    try:
+        return conn.execute(text("SELECT COALESCE(MAX(version), 0) FROM schema_version")).scalar()
+    except DBAPIError:
+        return 0
+
+def current_version(conn) -> int:
+    conn.execute(text("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)"))
+    return conn.execute(text("SELECT COALESCE(MAX(version), 0) FROM schema_version")).scalar()
+
+def migrate(conn) -> list:
+    """Aplica en orden las migraciones pendientes; devuelve las versiones aplicadas."""
+    applied = []
+    version = current_version(conn)
+    for number, _, apply in MIGRATIONS:
+        if number > version:
+            apply(conn)
+            conn.execute(text("INSERT INTO schema_version (version) VALUES (:v)"), {"v": number})
+            applied.append(number)
+    return applied
@@ -1,5 +1,9 @@
 # app/models.py
+from datetime import date, datetime
 from typing import Optional, List
+from sqlalchemy import Column, Index, Integer, text
+from pydantic import root_validator
+from pydantic.datetime_parse import parse_datetime
 from sqlmodel import SQLModel, Field, Relationship
 
 # -------- User --------
@@ -26,6 +30,8 @@ class UserRead(UserBase):
 class ServicioBase(SQLModel):
     nombre: str
     descripcion: Optional[str] = None
+    duracion_min: int = Field(default=30, description="Duración de cada turno en minutos")
+    capacidad: Optional[int] = Field(default=None, description="Turnos simultáneos por sucursal (sin límite propio si es nulo)")
 
 class Servicio(ServicioBase, table=True):
     __tablename__ = "servicio"
@@ -46,6 +52,9 @@ class SucursalBase(SQLModel):
     direccion: Optional[str] = Field(default=None, description="Dirección exacta")
     ciudad: Optional[str] = Field(default=None, description="Ciudad donde se ubica la sucursal")
     activa: bool = Field(default=True, description="Indica si la sucursal está activa")
+    hora_apertura: str = Field(default="08:00", description="Hora de apertura (HH:MM)")
+    hora_cierre: str = Field(default="18:00", description="Hora de cierre (HH:MM)")
+    capacidad: int = Field(default=1, description="Turnos que se atienden en simultáneo")
 
 class Sucursal(SucursalBase, table=True):
     __tablename__ = "sucursal"
@@ -61,15 +70,41 @@ class SucursalRead(SucursalBase):
         orm_mode = True
 
 # -------- Turno --------
+def turno_inicio(fecha: Optional[date], hora: Optional[str]) -> Optional[datetime]:
+    """fecha + hora como datetime; None sin fecha o si la hora no es HH:MM."""
+    if fecha is None or not hora:
+        return None
+    try:
+        return datetime.combine(fecha, datetime.strptime(hora, "%H:%M").time())
+    except ValueError:
+        return None
+
 class TurnoBase(SQLModel):
     cliente: str = Field(index=True, description="Nombre del cliente que solicita el turno")
     tipo: str = Field(description="Tipo de atención o trámite")
     hora: str = Field(description="Hora asignada al turno (HH:MM)")
+    fecha: Optional[date] = Field(default=None, description="Día del turno")
     asignadoA: Optional[str] = Field(default=None, description="Empleado asignado, si aplica")
+    inicio: Optional[datetime] = Field(default=None, description="Fecha y hora de inicio (fecha + hora)")
+
+# Bloqueo optimista: el ORM actualiza con WHERE version = <leída> y la incrementa
+_turno_version = Column("version", Integer, nullable=False, default=1, server_default=text("1"))
 
 class Turno(TurnoBase, table=True):
     __tablename__ = "turno"
+    __mapper_args__ = {"version_id_col": _turno_version}
+    # Índices para los filtros y órdenes de los routers (ver tools/query_plans.py)
+    __table_args__ = (
+        Index("ix_turno_sucursal_hora", "sucursal_id", "hora"),
+        Index("ix_turno_sucursal_fecha", "sucursal_id", "fecha"),
+        Index("ix_turno_asignado_hora", "asignadoA", "hora"),
+        Index("ix_turno_hora", "hora"),
+        Index("ix_turno_user_id", "user_id"),
+        Index("ix_turno_servicio_id", "servicio_id"),
+        Index("ix_turno_inicio", "inicio"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
+    version: int = Field(default=1, sa_column=_turno_version)
 
     servicio_id: Optional[int] = Field(default=None, foreign_key="servicio.id")
     servicio: Optional["Servicio"] = Relationship(back_populates="turnos")
@@ -85,11 +120,148 @@ class TurnoCreate(TurnoBase):
     user_id: Optional[int] = None
     sucursal_id: Optional[int] = None
 
+    @root_validator(pre=True)
+    def _fecha_hora_de_inicio(cls, values):
+        # alcanza con mandar inicio: fecha y hora salen de ahí
+        if values.get("inicio") and values.get("fecha") is None and values.get("hora") is None:
+            try:
+                inicio = parse_datetime(values["inicio"])
+            except (TypeError, ValueError):
+                return values  # el error lo informa la validación del campo
+            values = {**values, "fecha": inicio.date(), "hora": inicio.strftime("%H:%M")}
+        return values
+
+    @root_validator(skip_on_failure=True)
+    def _inicio(cls, values):
+        inicio = turno_inicio(values.get("fecha"), values.get("hora"))
+        if values.get("inicio") is not None and values["inicio"].replace(tzinfo=None) != inicio:
+            raise ValueError("inicio no coincide con fecha y hora")
+        values["inicio"] = inicio
+        return values
+
 class TurnoRead(TurnoBase):
     id: int
     servicio_id: Optional[int] = None
     user_id: Optional[int] = None
     sucursal_id: Optional[int] = None
+    version: int = 1
     class Config:
         orm_mode = True
 
+class TurnoReadWithRelations(TurnoRead):
+    """TurnoRead con las relaciones pedidas en ?include= (las no pedidas no aparecen)."""
+    servicio: Optional[ServicioRead] = None
+    sucursal: Optional[SucursalRead] = None
+    user: Optional[UserRead] = None
+
+# -------- Archivo de turnos (app.core.archivo) --------
+# Turnos ya pasados que salen de turno para que las consultas diarias recorran
+# solo los vigentes. Mismas columnas y sin FKs: el histórico no depende de que
+# sigan existiendo la sucursal, el servicio o el usuario. Clave propia: turno no
+# es AUTOINCREMENT y SQLite vuelve a dar el id más alto una vez archivado, así
+# que el id original (turno_id) puede repetirse en el archivo.
+class TurnoArchivado(TurnoBase, table=True):
+    __tablename__ = "turno_archivo"
+    __table_args__ = (
+        Index("ix_turno_archivo_sucursal_fecha", "sucursal_id", "fecha"),
+        Index("ix_turno_archivo_fecha", "fecha"),
+    )
+    id: Optional[int] = Field(default=None, primary_key=True)
+    turno_id: int = Field(index=True, description="id que tenía en turno")
+    version: int = Field(default=1)
+    servicio_id: Optional[int] = None
+    user_id: Optional[int] = None
+    sucursal_id: Optional[int] = None
+    archivado_at: datetime = Field(default_factory=datetime.utcnow)
+
+class TurnoArchivadoRead(TurnoRead):
+    turno_id: int
+    archivado_at: datetime
+
+# -------- Idempotencia --------
+class IdempotencyKey(SQLModel, table=True):
+    __tablename__ = "idempotency_key"
+    key: str = Field(primary_key=True, description="Valor de la cabecera Idempotency-Key")
+    fingerprint: str = Field(description="Hash del cuerpo de la solicitud original")
+    turno_id: Optional[int] = Field(default=None, foreign_key="turno.id")
+    turno: Optional[Turno] = Relationship()
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+# -------- Tokens revocados --------
+# jti de tokens invalidados antes de su exp (logout, refresh ya usado).
+# app.core.revocation los carga en un filtro de Bloom en memoria.
+class RevokedToken(SQLModel, table=True):
+    __tablename__ = "revoked_token"
+    id: Optional[int] = Field(default=None, primary_key=True)
+    jti: str = Field(index=True, unique=True)
+    expires_at: datetime = Field(index=True, description="exp del token: después ya no hace falta guardarlo")
+
+
+# -------- Coordinación entre workers (app.core.cluster) --------
+# Una sola fila: cada lote del escritor de turnos la incrementa. Si un proceso
+# ve un salto, otro escribió turnos y su índice de disponibilidad ya no vale.
+class WriteEpoch(SQLModel, table=True):
+    __tablename__ = "write_epoch"
+    id: int = Field(default=1, primary_key=True)
+    n: int = Field(default=0)
+
+# Eventos de turno que cada worker deja para las pantallas conectadas a los demás
+class TurnoEvento(SQLModel, table=True):
+    __tablename__ = "turno_evento"
+    id: Optional[int] = Field(default=None, primary_key=True)
+    origen: str = Field(description="Proceso que lo publicó")
+    evento: str
+    sucursales: str = Field(description="Ids separados por coma")
+    fecha: Optional[date] = None
+    data: str = Field(description="TurnoRead en JSON")
+    created_at: float = Field(index=True, description="time.time() al guardarlo, para purgar")
+
+
+# -------- Trabajos en segundo plano (app.core.jobs) --------
+class BackgroundJob(SQLModel, table=True):
+    __tablename__ = "background_job"
+    __table_args__ = (Index("ix_background_job_cola", "estado", "run_at"),)
+    id: Optional[int] = Field(default=None, primary_key=True)
+    tarea: str = Field(description="Nombre registrado con jobs.tarea")
+    payload: str = Field(default="{}", description="Argumentos en JSON")
+    clave: Optional[str] = Field(default=None, unique=True, description="Evita encolar dos veces lo mismo")
+    estado: str = Field(default="pendiente", description="pendiente | en_curso | hecho | fallido")
+    intentos: int = Field(default=0)
+    max_intentos: int
+    run_at: float = Field(description="time.time() desde el que puede correr")
+    locked_by: Optional[str] = Field(default=None, description="Reserva del proceso que lo está corriendo")
+    locked_until: Optional[float] = Field(default=None, description="Vencida, otro proceso puede retomarlo")
+    error: Optional[str] = None
+    created_at: float
+    finished_at: Optional[float] = None
+
+
+# -------- Ocupación (resumen materializado) --------
+# Turnos con fecha por día, bloque horario, sucursal y una dimensión
+# (dimension="sucursal": total; "servicio": valor=id; "trabajador": valor=asignadoA).
+# Lo mantiene app.core.ocupacion en la misma transacción que cada escritura de turno.
+class Ocupacion(SQLModel, table=True):
+    __tablename__ = "ocupacion"
+    __table_args__ = (Index("ix_ocupacion_sucursal_fecha", "dimension", "sucursal_id", "fecha"),)
+    dimension: str = Field(primary_key=True)
+    fecha: date = Field(primary_key=True)
+    hora: str = Field(primary_key=True, description="Bloque horario (HH:00)")
+    sucursal_id: int = Field(default=0, primary_key=True, description="0 = sin sucursal")
+    valor: str = Field(default="", primary_key=True, description="'' = sin servicio / sin asignar")
+    cantidad: int = Field(default=0)
+
+class OcupacionRead(SQLModel):
+    fecha: Optional[date] = None
+    hora: Optional[str] = None
+    sucursal_id: Optional[int] = None
+    servicio_id: Optional[int] = None
+    asignadoA: Optional[str] = None
+    cantidad: int
+
+# -------- Búsqueda --------
+class SearchResult(SQLModel):
+    tipo: str = Field(description="turno, servicio, sucursal o user")
+    id: int
+    titulo: str = Field(description="Cliente, nombre o email")
+    detalle: Optional[str] = Field(default=None, description="Descripción, ciudad o nombre completo")
+    puntaje: float = Field(description="bm25: menor es más relevante")
@@ -0,0 +1,59 @@
+# app/serve.py
+"""Arranque de producción, con uno o varios workers.
+
+    python -m app.serve [--workers N] [--host 0.0.0.0] [--port 8000]
+
+Workers: --workers, o WEB_CONCURRENCY, o la cantidad de CPUs. Cada worker es
+un proceso uvicorn sobre el mismo socket; lo que debe ser común a todos se
+coordina por la base (ver app.core.cluster). Con SIGTERM cada worker deja de
+aceptar conexiones, cierra los streams de las pantallas (que si no nunca
+terminan), espera las solicitudes en curso hasta SHUTDOWN_TIMEOUT_SECONDS y
+vacía la cola del escritor antes de salir.
+"""
+import argparse
+import os
+from types import FrameType
+from typing import Optional
+
+import uvicorn
+from uvicorn.supervisors import Multiprocess
+
+
+class DrainingServer(uvicorn.Server):
+    def handle_exit(self, sig: int, frame: Optional[FrameType]) -> None:
+        from app.core.events import turno_events
+        turno_events.close()
+        super().handle_exit(sig, frame)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=0)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", 8000)))
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    workers = args.workers or int(os.environ.get("WEB_CONCURRENCY") or 0) or os.cpu_count() or 1
+    # cada worker lee WEB_CONCURRENCY al importar la configuración: así sabe que no está solo
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+    from app.core.config import settings
+
+    config = uvicorn.Config(
+        "app.main:app",
+        host=args.host,
+        port=args.port,
+        workers=workers,
+        log_level=args.log_level,
+        proxy_headers=True,
+        timeout_graceful_shutdown=settings.SHUTDOWN_TIMEOUT_SECONDS,
+    )
+    server = DrainingServer(config)
+    if workers > 1:
+        Multiprocess(config, target=server.run, sockets=[config.bind_socket()]).run()
+    else:
+        server.run()
+
+
+if __name__ == "__main__":
+    main()
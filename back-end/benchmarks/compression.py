@@ -0,0 +1,91 @@
+"""Bytes en el cable y latencia de los listados antes y después de la
+compresión y el GET condicional.
+
+    python -m benchmarks.compression --turnos 20000 --repeat 200
+
+"antes" es un servidor con COMPRESSION_ENABLED=false y sin If-None-Match;
+"después" repite cada GET con Accept-Encoding gzip (y br si está instalado)
+y revalidando con el ETag de la primera respuesta (304 sin cuerpo).
+"""
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.load import _token, percentile  # noqa: E402
+from benchmarks.seed import SEED_PASSWORD, seed, user_email  # noqa: E402
+from benchmarks.server import Client, running_server  # noqa: E402
+
+ENDPOINTS = [
+    "/turnos/?limit=500",
+    "/turnos/?limit=50",
+    "/users?limit=100",
+    "/servicios/servicios?limit=100",
+    "/turnos/export?format=ndjson",
+]
+
+
+def measure(client: Client, path: str, headers: Dict[str, str], repeat: int) -> Optional[dict]:
+    status, resp_headers, raw = client.request("GET", path, headers=headers)
+    if status not in (200, 304):
+        return None
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        client.request("GET", path, headers=headers)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return {
+        "status": status,
+        "bytes": len(raw),
+        "encoding": resp_headers.get("content-encoding", "identity"),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+    }
+
+
+def run(url: str, modes: Dict[str, Dict[str, str]], repeat: int, conditional: bool) -> Dict[str, dict]:
+    client = Client(url)
+    auth = {"Authorization": f"Bearer {_token(*client.json('POST', '/auth/auth/login', {'email': user_email(0), 'password': SEED_PASSWORD}))}"}
+    results = {}
+    for path in ENDPOINTS:
+        row = {}
+        for name, headers in modes.items():
+            row[name] = measure(client, path, {**auth, **headers}, repeat)
+        if conditional:
+            etag = client.request("GET", path, headers=auth)[1].get("etag")
+            row["revalidado_304"] = etag and measure(client, path, {**auth, "If-None-Match": etag}, repeat)
+        results[path] = row
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turnos", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    from app.core.compression import brotli
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / "compression.db")
+        seed(db_path, users=args.users, turnos=args.turnos)
+        with running_server(db_path=db_path, extra_env={"COMPRESSION_ENABLED": "false"}) as url:
+            antes = run(url, {"identity": {}}, args.repeat, conditional=False)
+        modes = {"identity": {}, "gzip": {"Accept-Encoding": "gzip"}}
+        if brotli is not None:
+            modes["br"] = {"Accept-Encoding": "br"}
+        with running_server(db_path=db_path) as url:
+            despues = run(url, modes, args.repeat, conditional=True)
+
+    print(json.dumps({path: {"antes": antes[path], "despues": despues[path]} for path in ENDPOINTS}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Asignadores concurrentes sobre los mismos turnos: comprueba que no hay
+actualizaciones perdidas (cada asignación aceptada incrementa la versión).
+
+    python -m benchmarks.concurrent_assign --workers 16 --turnos 4 --seconds 10
+"""
+import argparse
+import json
+import threading
+import time
+from collections import Counter
+
+from benchmarks.server import Client, running_server
+
+
+def assigner(url: str, turno_ids, worker: int, deadline: float, blind: bool, stats: Counter, per_turno: Counter,
+             lock: threading.Lock):
+    client = Client(url)
+    n = 0
+    while time.time() < deadline:
+        turno_id = turno_ids[(worker + n) % len(turno_ids)]
+        n += 1
+        status, turno = client.json("GET", f"/turnos/{turno_id}")
+        body = {"trabajador": f"w{worker}-{n}"}
+        if not blind:
+            body["version"] = turno["version"]
+        status, _ = client.json("PUT", f"/turnos/{turno_id}/asignar", body)
+        with lock:
+            if status == 200:
+                stats["ok"] += 1
+                per_turno[turno_id] += 1
+            elif status == 409:
+                stats["conflict"] += 1
+            else:
+                stats[f"http_{status}"] += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", help="API ya levantada (por defecto se arranca una temporal)")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--turnos", type=int, default=4, help="turnos disputados")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--blind", action="store_true", help="no enviar la versión leída")
+    args = parser.parse_args()
+
+    with running_server(args.url) as url:
+        client = Client(url)
+        turno_ids = []
+        for i in range(args.turnos):
+            _, turno = client.json("POST", "/turnos/", {"cliente": f"bench{i}", "tipo": "bench", "hora": "10:00"})
+            turno_ids.append(turno["id"])
+        initial = {tid: client.json("GET", f"/turnos/{tid}")[1]["version"] for tid in turno_ids}
+
+        stats, per_turno, lock = Counter(), Counter(), threading.Lock()
+        deadline = time.time() + args.seconds
+        threads = [
+            threading.Thread(target=assigner, args=(url, turno_ids, w, deadline, args.blind, stats, per_turno, lock))
+            for w in range(args.workers)
+        ]
+        start = time.time()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.time() - start
+
+        # cada 200 debe corresponder a exactamente un incremento de versión
+        lost = 0
+        for tid in turno_ids:
+            final = client.json("GET", f"/turnos/{tid}")[1]["version"]
+            lost += per_turno[tid] - (final - initial[tid])
+
+        print(json.dumps({
+            "workers": args.workers,
+            "turnos": args.turnos,
+            "seconds": round(elapsed, 2),
+            "accepted": stats["ok"],
+            "conflicts": stats["conflict"],
+            "other": {k: v for k, v in stats.items() if k.startswith("http_")},
+            "accepted_per_s": round(stats["ok"] / elapsed, 1),
+            "lost_updates": lost,
+        }, indent=2))
+        if lost:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
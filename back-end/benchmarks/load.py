@@ -0,0 +1,290 @@
+"""Carga sobre toda la API: latencia p50/p95/p99, throughput y RSS pico por endpoint.
+
+    python -m benchmarks.load --turnos 1000000 --concurrency 16 --duration 10 --output run.json
+    python -m benchmarks.load --mode inprocess --endpoints turnos_page servicios
+    python -m benchmarks.load --db /tmp/bench.db --baseline run.json   # compara y falla si empeora
+
+--mode uvicorn (por defecto) levanta un servidor real y usa un hilo por cliente
+con keep-alive; --mode inprocess maneja app.main:app por ASGI con httpx (sin red,
+el RSS es el del proceso del benchmark; requiere requirements-dev.txt). Con --db
+existente se reutiliza la base sembrada; si no, se siembra con benchmarks.seed.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.seed import SEED_FIRST_DAY, SEED_PASSWORD, add_arguments, seed, user_email  # noqa: E402
+from benchmarks.server import BACKEND_DIR, BENCH_ENV, Client, running_server  # noqa: E402
+
+Request = Tuple[str, str, Optional[dict]]  # método, ruta, cuerpo
+
+
+# ---------- Escenarios ----------
+# Cada uno arma una solicitud a partir de un Random propio del cliente y del
+# contexto de la base (cantidades sembradas).
+def _fecha(rnd: random.Random, ctx: dict) -> str:
+    return SEED_FIRST_DAY.fromordinal(SEED_FIRST_DAY.toordinal() + rnd.randrange(ctx["days"])).isoformat()
+
+
+SCENARIOS: Dict[str, Callable[[random.Random, dict], Request]] = {
+    "health": lambda r, c: ("GET", "/health", None),
+    "auth_login": lambda r, c: (
+        "POST", "/auth/auth/login", {"email": user_email(r.randrange(c["users"])), "password": SEED_PASSWORD},
+    ),
+    "auth_me": lambda r, c: ("GET", "/auth/auth/me", None),
+    "turnos_page": lambda r, c: ("GET", "/turnos/?limit=50", None),
+    "turnos_page_hora": lambda r, c: ("GET", "/turnos/?limit=50&order_by=hora", None),
+    "turnos_get": lambda r, c: ("GET", f"/turnos/{r.randint(1, c['turnos'])}", None),
+    "turnos_create": lambda r, c: (
+        "POST", "/turnos/", {"cliente": f"load {r.random()}", "tipo": "load", "hora": "10:00"},
+    ),
+    "turnos_asignar": lambda r, c: ("PUT", f"/turnos/{r.randint(1, c['turnos'])}/asignar", {"trabajador": "load"}),
+    "servicios": lambda r, c: ("GET", "/servicios/servicios?limit=20", None),
+    "sucursales": lambda r, c: ("GET", "/sucursales/", None),
+    "disponibilidad": lambda r, c: (
+        "GET", f"/sucursales/{r.randint(1, c['sucursales'])}/disponibilidad?fecha={_fecha(r, c)}", None,
+    ),
+    "reporte_ocupacion": lambda r, c: (
+        "GET", f"/reportes/ocupacion?desde={SEED_FIRST_DAY}&hasta={_fecha(r, c)}&detalle=franja", None,
+    ),
+}
+
+
+def db_context(db_path: str) -> dict:
+    conn = sqlite3.connect(db_path)
+    try:
+        ctx = {
+            table: conn.execute(f'SELECT COALESCE(MAX(id), 0) FROM "{name}"').fetchone()[0]
+            for table, name in (("users", "user"), ("servicios", "servicio"), ("sucursales", "sucursal"),
+                                ("turnos", "turno"))
+        }
+        fechas = conn.execute("SELECT MIN(fecha), MAX(fecha) FROM turno").fetchone()
+    finally:
+        conn.close()
+    ctx["days"] = 1
+    if fechas[0]:
+        ctx["days"] = (SEED_FIRST_DAY.fromisoformat(fechas[1]) - SEED_FIRST_DAY.fromisoformat(fechas[0])).days + 1
+    return ctx
+
+
+# ---------- Memoria ----------
+def reset_peak_rss(pid: int):
+    # Linux: escribir 5 en clear_refs reinicia VmHWM (pico de RSS)
+    try:
+        Path(f"/proc/{pid}/clear_refs").write_text("5")
+    except OSError:
+        pass
+
+
+def peak_rss_mb(pid: int) -> Optional[float]:
+    try:
+        for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+# ---------- Estadísticas ----------
+def percentile(sorted_values: List[float], p: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))]
+
+
+def summarize(latencies: List[float], errors: Dict[str, int], elapsed: float, rss: Optional[float]) -> dict:
+    latencies.sort()
+    ms = lambda v: round(v * 1000, 2)  # noqa: E731
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0,
+        "p50_ms": ms(percentile(latencies, 50)) if latencies else None,
+        "p95_ms": ms(percentile(latencies, 95)) if latencies else None,
+        "p99_ms": ms(percentile(latencies, 99)) if latencies else None,
+        "max_ms": ms(latencies[-1]) if latencies else None,
+        "peak_rss_mb": rss,
+    }
+
+
+# ---------- Conductores ----------
+def _token(status: int, body) -> str:
+    if status != 200:
+        raise SystemExit(f"No se pudo iniciar sesión con el usuario sembrado: HTTP {status} {body}")
+    return body["access_token"]
+
+
+def run_uvicorn(url: str, pid: Optional[int], names: List[str], ctx: dict, args) -> dict:
+    token = _token(*Client(url).json("POST", "/auth/auth/login", {"email": user_email(0), "password": SEED_PASSWORD}))
+    headers = {"Authorization": f"Bearer {token}"}
+    results = {}
+    for name in names:
+        build = SCENARIOS[name]
+        latencies: List[float] = []
+        errors: Dict[str, int] = {}
+        lock = threading.Lock()
+
+        def worker(n: int, deadline: float, record: bool):
+            client, rnd = Client(url), random.Random(args.seed * 1000 + n)
+            local, local_errors = [], {}
+            while time.perf_counter() < deadline:
+                method, path, body = build(rnd, ctx)
+                start = time.perf_counter()
+                status, _, _ = client.request(method, path, body, headers)
+                local.append(time.perf_counter() - start)
+                if status >= 400:
+                    local_errors[str(status)] = local_errors.get(str(status), 0) + 1
+            if record:
+                with lock:
+                    latencies.extend(local)
+                    for k, v in local_errors.items():
+                        errors[k] = errors.get(k, 0) + v
+
+        for seconds, record in ((args.warmup, False), (args.duration, True)):
+            if record and pid:
+                reset_peak_rss(pid)
+            deadline = time.perf_counter() + seconds
+            threads = [threading.Thread(target=worker, args=(n, deadline, record)) for n in range(args.concurrency)]
+            start = time.perf_counter()
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            elapsed = time.perf_counter() - start
+        results[name] = summarize(latencies, errors, elapsed, peak_rss_mb(pid) if pid else None)
+        print(f"{name}: {results[name]}", file=sys.stderr)
+    return results
+
+
+async def run_inprocess(names: List[str], ctx: dict, args) -> dict:
+    import httpx
+
+    from app.main import app
+
+    await app.router.startup()
+    results = {}
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+            login = await client.post("/auth/auth/login", json={"email": user_email(0), "password": SEED_PASSWORD})
+            client.headers["Authorization"] = f"Bearer {_token(login.status_code, login.text and login.json())}"
+            for name in names:
+                build = SCENARIOS[name]
+                latencies: List[float] = []
+                errors: Dict[str, int] = {}
+
+                async def worker(n: int, deadline: float, record: bool):
+                    rnd = random.Random(args.seed * 1000 + n)
+                    while time.perf_counter() < deadline:
+                        method, path, body = build(rnd, ctx)
+                        start = time.perf_counter()
+                        response = await client.request(method, path, json=body)
+                        if record:
+                            latencies.append(time.perf_counter() - start)
+                            if response.status_code >= 400:
+                                key = str(response.status_code)
+                                errors[key] = errors.get(key, 0) + 1
+
+                for seconds, record in ((args.warmup, False), (args.duration, True)):
+                    if record:
+                        reset_peak_rss(os.getpid())
+                    deadline = time.perf_counter() + seconds
+                    start = time.perf_counter()
+                    await asyncio.gather(*(worker(n, deadline, record) for n in range(args.concurrency)))
+                    elapsed = time.perf_counter() - start
+                results[name] = summarize(latencies, errors, elapsed, peak_rss_mb(os.getpid()))
+                print(f"{name}: {results[name]}", file=sys.stderr)
+    finally:
+        await app.router.shutdown()
+    return results
+
+
+# ---------- Comparación con baseline ----------
+def compare(results: dict, baseline: dict, tolerance: float) -> List[str]:
+    regressions = []
+    for name, current in results.items():
+        before = baseline.get("results", {}).get(name)
+        if not before or not current["p95_ms"] or not before.get("p95_ms"):
+            continue
+        p95 = current["p95_ms"] / before["p95_ms"] - 1
+        rps = current["throughput_rps"] / before["throughput_rps"] - 1 if before["throughput_rps"] else 0
+        print(f"{name:18} p95 {before['p95_ms']:>9} -> {current['p95_ms']:>9} ms ({p95:+.0%})  "
+              f"rps {before['throughput_rps']:>8} -> {current['throughput_rps']:>8} ({rps:+.0%})", file=sys.stderr)
+        if p95 > tolerance or rps < -tolerance:
+            regressions.append(name)
+    return regressions
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=("uvicorn", "inprocess"), default="uvicorn")
+    parser.add_argument("--url", help="API ya levantada (modo uvicorn; la base debe ser la de --db)")
+    parser.add_argument("--db", help="base sembrada a reutilizar, o donde sembrar si no existe")
+    parser.add_argument("--endpoints", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=5, help="segundos medidos por endpoint")
+    parser.add_argument("--warmup", type=float, default=1, help="segundos sin medir antes de cada endpoint")
+    parser.add_argument("--output", help="archivo JSON de resultados (por defecto stdout)")
+    parser.add_argument("--baseline", help="JSON de una corrida anterior para comparar")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="empeoramiento admitido de p95/throughput")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    db_path = args.db or str(Path(tmp.name) / "load.db")
+    seeded = None
+    if not Path(db_path).exists():
+        print("Sembrando base...", file=sys.stderr)
+        seeded = seed(db_path, args.users, args.servicios, args.sucursales, args.turnos, args.days, args.seed)
+    ctx = db_context(db_path)
+
+    if args.mode == "inprocess":
+        os.environ.update({**BENCH_ENV, "SQLITE_PATH": db_path})
+        results = asyncio.run(run_inprocess(args.endpoints, ctx, args))
+    else:
+        with running_server(args.url, db_path=db_path) as url:
+            results = run_uvicorn(url, url.pid, args.endpoints, ctx, args)
+
+    report = {
+        "meta": {
+            "mode": args.mode, "concurrency": args.concurrency, "duration": args.duration, "warmup": args.warmup,
+            "data": ctx, "seed_seconds": seeded and seeded["seconds"], "commit": _git_commit(),
+            "python": platform.python_version(), "platform": platform.platform(),
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text)
+    else:
+        print(text)
+
+    if args.baseline:
+        regressions = compare(results, json.loads(Path(args.baseline).read_text()), args.tolerance)
+        if regressions:
+            print(f"Regresiones: {', '.join(regressions)}", file=sys.stderr)
+            raise SystemExit(1)
+    tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
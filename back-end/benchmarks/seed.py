@@ -0,0 +1,125 @@
+"""Llena una base SQLite con volúmenes configurables para los benchmarks.
+
+    python -m benchmarks.seed --db /tmp/bench.db --users 1000 --turnos 1000000
+
+El esquema lo crea la propia app (create_db_and_tables); las filas se insertan
+con sqlite3 en transacciones grandes. Todos los usuarios comparten contraseña
+(SEED_PASSWORD) y un único hash bcrypt calculado al inicio.
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.server import BENCH_ENV  # noqa: E402
+
+SEED_PASSWORD = "bench-pass"
+SEED_FIRST_DAY = date(2030, 1, 1)
+HORAS = [f"{h:02d}:{m:02d}" for h in range(8, 18) for m in (0, 30)]
+
+
+def user_email(i: int) -> str:
+    return f"user{i}@bench.local"
+
+
+def _chunks(rows, size: int):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def seed(db_path: str, users: int = 100, servicios: int = 20, sucursales: int = 10, turnos: int = 100000,
+         days: int = 60, seed_value: int = 42, batch: int = 50000) -> dict:
+    os.environ.update({**BENCH_ENV, "SQLITE_PATH": db_path})
+    from app.core.security import get_password_hash
+    from app.db import create_db_and_tables
+
+    start = time.perf_counter()
+    create_db_and_tables()
+    rnd = random.Random(seed_value)
+    hashed = get_password_hash(SEED_PASSWORD)
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")
+    with conn:
+        conn.executemany(
+            'INSERT INTO "user" (email, full_name, is_active, hashed_password) VALUES (?, ?, 1, ?)',
+            ((user_email(i), f"Usuario {i}", hashed) for i in range(users)),
+        )
+        conn.executemany(
+            "INSERT INTO servicio (nombre, descripcion, duracion_min, capacidad) VALUES (?, ?, ?, NULL)",
+            ((f"Servicio {i}", "seed", rnd.choice((15, 30, 60))) for i in range(servicios)),
+        )
+        # capacidad alta: la disponibilidad sigue teniendo franjas con millones de turnos
+        conn.executemany(
+            "INSERT INTO sucursal (nombre, direccion, ciudad, activa, hora_apertura, hora_cierre, capacidad)"
+            " VALUES (?, ?, ?, 1, '08:00', '18:00', 100000)",
+            ((f"Sucursal {i}", f"Calle {i}", "Bench") for i in range(sucursales)),
+        )
+
+    def turno_rows():
+        for i in range(turnos):
+            yield (
+                f"cliente {i}", "seed", rnd.choice(HORAS),
+                (SEED_FIRST_DAY + timedelta(days=rnd.randrange(days))).isoformat(),
+                f"trabajador {rnd.randrange(50)}" if rnd.random() < 0.5 else None,
+                rnd.randint(1, servicios) if servicios else None,
+                rnd.randint(1, users) if users else None,
+                rnd.randint(1, sucursales) if sucursales else None,
+            )
+
+    for chunk in _chunks(turno_rows(), batch):
+        with conn:
+            conn.executemany(
+                'INSERT INTO turno (cliente, tipo, hora, fecha, "asignadoA", servicio_id, user_id, sucursal_id, version)'
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, 1)",
+                chunk,
+            )
+    conn.close()
+    # las filas entraron por fuera del ORM: el resumen de ocupación se arma de una vez
+    from app.core import ocupacion
+    from app.db import engine
+    with engine.begin() as sa_conn:
+        ocupacion.rebuild(sa_conn)
+        sa_conn.exec_driver_sql("ANALYZE")
+    return {
+        "db": db_path, "users": users, "servicios": servicios, "sucursales": sucursales, "turnos": turnos,
+        "days": days, "seed": seed_value, "seconds": round(time.perf_counter() - start, 2),
+    }
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--servicios", type=int, default=20)
+    parser.add_argument("--sucursales", type=int, default=10)
+    parser.add_argument("--turnos", type=int, default=100000)
+    parser.add_argument("--days", type=int, default=60, help="días sobre los que se reparten los turnos")
+    parser.add_argument("--seed", type=int, default=42, help="semilla del generador (datos reproducibles)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", required=True, help="archivo SQLite a crear (no debe existir)")
+    add_arguments(parser)
+    args = parser.parse_args()
+    if Path(args.db).exists():
+        raise SystemExit(f"{args.db} ya existe")
+    print(json.dumps(seed(args.db, args.users, args.servicios, args.sucursales, args.turnos, args.days, args.seed),
+                     indent=2))
+
+
+if __name__ == "__main__":
+    main()
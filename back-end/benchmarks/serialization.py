@@ -0,0 +1,95 @@
+"""Serialización de listas de turnos: camino ORM + response_model contra el
+camino rápido (tuplas + FastJSONResponse), en proceso y sin HTTP.
+
+    python -m benchmarks.serialization --sizes 100 1000 10000 --repeat 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.server import BENCH_ENV  # noqa: E402
+
+
+async def main_async(sizes: List[int], repeat: int) -> list:
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_response_field
+    from sqlalchemy import insert
+    from sqlmodel import select
+
+    from app.api.routers.turnos import TURNO_READ_COLUMNS, TURNO_READ_KEYS
+    from app.core import fastjson
+    from app.db import AsyncSessionLocal, create_db_and_tables, engine
+    from app.models import Turno, TurnoRead
+
+    create_db_and_tables()
+    with engine.begin() as conn:
+        conn.execute(insert(Turno.__table__), [
+            {"cliente": f"cliente {i}", "tipo": "bench", "hora": f"{8 + i % 10:02d}:00", "asignadoA": f"w{i % 7}",
+             "sucursal_id": 1 + i % 3, "version": 1}
+            for i in range(max(sizes))
+        ])
+    field = create_response_field(name="Response_list_turnos", type_=List[TurnoRead])
+
+    async def legacy(session, n: int) -> bytes:
+        turnos = (await session.exec(select(Turno).order_by(Turno.id).limit(n))).all()
+        content = await serialize_response(field=field, response_content=turnos)
+        return JSONResponse(content).body
+
+    async def fast(session, n: int) -> bytes:
+        rows = (await session.exec(select(*TURNO_READ_COLUMNS).order_by(Turno.id).limit(n))).all()
+        return fastjson.FastJSONResponse(fastjson.rows_to_dicts(TURNO_READ_KEYS, rows)).body
+
+    async def fast_stdlib(session, n: int) -> bytes:
+        orjson, fastjson.orjson = fastjson.orjson, None
+        try:
+            return await fast(session, n)
+        finally:
+            fastjson.orjson = orjson
+
+    paths = {"legacy": legacy, "fast_stdlib": fast_stdlib}
+    if fastjson.orjson is not None:
+        paths["fast_orjson"] = fast
+
+    results = []
+    async with AsyncSessionLocal() as session:
+        for n in sizes:
+            row = {"rows": n}
+            expected = json.loads(await legacy(session, n))
+            for name, fn in paths.items():
+                assert json.loads(await fn(session, n)) == expected, name
+                timings = []
+                for _ in range(repeat):
+                    session.expunge_all()
+                    start = time.perf_counter()
+                    await fn(session, n)
+                    timings.append(time.perf_counter() - start)
+                row[f"{name}_ms"] = round(statistics.median(timings) * 1000, 2)
+            for name in paths:
+                if name != "legacy":
+                    row[f"{name}_speedup"] = round(row["legacy_ms"] / row[f"{name}_ms"], 1)
+            results.append(row)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    os.environ.update({**BENCH_ENV, "SQLITE_PATH": str(Path(tempfile.mkdtemp()) / "serialization.db")})
+    print(json.dumps(asyncio.run(main_async(args.sizes, args.repeat)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
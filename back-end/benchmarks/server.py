@@ -0,0 +1,98 @@
+"""Levanta la API con uvicorn sobre una base temporal para los benchmarks.
+
+Uso desde back-end/:  python -m benchmarks.<script> [--url http://host:port]
+Sin --url se arranca un servidor propio en un puerto libre.
+"""
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional, Tuple
+from urllib.parse import urlparse
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+# límites altos para que el rate limiting no distorsione las mediciones
+BENCH_ENV = {
+    "SECRET_KEY": "bench-secret",
+    "RATE_LIMIT_API_PER_MIN": "1000000000",
+    "RATE_LIMIT_AUTH_PER_MIN": "1000000000",
+}
+
+
+class ServerURL(str):
+    """URL base del servidor; pid solo si lo arrancó running_server."""
+    pid: Optional[int] = None
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_ready(url: str, timeout: float = 30.0):
+    parsed = urlparse(url)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=1)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"El servidor no respondió en {timeout}s: {url}")
+
+
+@contextmanager
+def running_server(url: Optional[str] = None, db_path: Optional[str] = None, extra_env: Optional[dict] = None,
+                   args: Tuple[str, ...] = (), workers: int = 0):
+    """Usa url si se da; si no, arranca uvicorn con una base temporal (o db_path).
+    Con workers arranca el modo de producción (python -m app.serve) con esa cantidad."""
+    if url:
+        yield ServerURL(url)
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        port = free_port()
+        env = {**os.environ, **BENCH_ENV, "SQLITE_PATH": db_path or str(Path(tmp) / "bench.db"), **(extra_env or {})}
+        if workers:
+            cmd = [sys.executable, "-m", "app.serve", "--workers", str(workers), "--host", "127.0.0.1"]
+        else:
+            cmd = [sys.executable, "-m", "uvicorn", "app.main:app"]
+        cmd += ["--port", str(port), "--log-level", "warning", *args]
+        proc = subprocess.Popen(cmd, cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL)
+        base = ServerURL(f"http://127.0.0.1:{port}")
+        base.pid = proc.pid
+        try:
+            wait_ready(base)
+            yield base
+        finally:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+
+class Client:
+    """Cliente HTTP mínimo con keep-alive (stdlib), uno por hilo."""
+
+    def __init__(self, url: str):
+        parsed = urlparse(url)
+        self.conn = http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=30)
+
+    def request(self, method: str, path: str, body=None, headers: Optional[dict] = None):
+        data = json.dumps(body).encode() if body is not None else None
+        hdrs = {"Content-Type": "application/json", **(headers or {})}
+        self.conn.request(method, path, body=data, headers=hdrs)
+        resp = self.conn.getresponse()
+        raw = resp.read()
+        return resp.status, resp.headers, raw
+
+    def json(self, method: str, path: str, body=None, headers: Optional[dict] = None):
+        status, _, raw = self.request(method, path, body, headers)
+        return status, (json.loads(raw) if raw else None)
@@ -0,0 +1,137 @@
+"""Pantallas conectadas a /sucursales/{id}/stream mientras se crean turnos:
+latencia de entrega de cada evento y consultas SQL que cuestan las pantallas,
+comparado con lo que costaría que cada una sondeara GET /turnos.
+
+    python -m benchmarks.stream_fanout --displays 200 --events 100 --poll-seconds 3
+"""
+import argparse
+import http.client
+import json
+import socket
+import statistics
+import threading
+import time
+from urllib.parse import urlparse
+
+from benchmarks.server import Client, running_server
+
+FECHA = "2031-01-01"
+
+
+def display(url: str, sucursal_id: int, ready: threading.Barrier, received: dict, lock: threading.Lock,
+            conns: list):
+    parsed = urlparse(url)
+    conn = http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=60)
+    conn.request("GET", f"/sucursales/{sucursal_id}/stream?fecha={FECHA}")
+    resp = conn.getresponse()
+    with lock:
+        conns.append(conn)
+    event = None
+    try:
+        while True:
+            line = resp.fp.readline()
+            if not line:
+                return
+            line = line.rstrip(b"\n")
+            if line.startswith(b"event: "):
+                event = line[7:].decode()
+            elif line.startswith(b"data: "):
+                if event == "snapshot":
+                    ready.wait()
+                elif event == "created":
+                    now = time.perf_counter()
+                    cliente = json.loads(line[6:])["cliente"]
+                    with lock:
+                        received.setdefault(cliente, []).append(now)
+    except (OSError, ValueError):
+        return  # la conexión se cerró al terminar
+
+
+def db_queries(client: Client, route: str) -> int:
+    _, _, raw = client.request("GET", "/metrics")
+    prefix = f'db_queries_total{{route="{route}"}} '
+    for line in raw.decode().splitlines():
+        if line.startswith(prefix):
+            return int(float(line[len(prefix):]))
+    return 0
+
+
+def percentile(values: list, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="API ya levantada (por defecto se arranca una temporal)")
+    parser.add_argument("--displays", type=int, default=200)
+    parser.add_argument("--events", type=int, default=100, help="turnos creados durante la medición")
+    parser.add_argument("--interval-ms", type=float, default=20, help="pausa entre creaciones")
+    parser.add_argument("--poll-seconds", type=float, default=3, help="intervalo de sondeo con el que se compara")
+    args = parser.parse_args()
+
+    with running_server(args.url) as url:
+        client = Client(url)
+        _, sucursal = client.json("POST", "/sucursales/", {
+            "nombre": "bench", "direccion": "-", "ciudad": "-", "hora_apertura": "08:00", "hora_cierre": "18:00",
+            "capacidad": 100000,
+        })
+        ready = threading.Barrier(args.displays + 1)
+        received, lock, conns = {}, threading.Lock(), []
+        threads = [
+            threading.Thread(target=display, args=(url, sucursal["id"], ready, received, lock, conns), daemon=True)
+            for _ in range(args.displays)
+        ]
+        for t in threads:
+            t.start()
+        ready.wait(timeout=60)
+        stream_route = "/sucursales/{sucursal_id}/stream"
+        queries_before = db_queries(client, stream_route)
+
+        sent = {}
+        start = time.perf_counter()
+        for i in range(args.events):
+            cliente = f"bench{i}"
+            sent[cliente] = time.perf_counter()
+            client.json("POST", "/turnos/", {
+                "cliente": cliente, "tipo": "bench", "hora": "10:00", "fecha": FECHA, "sucursal_id": sucursal["id"],
+            })
+            time.sleep(args.interval_ms / 1000)
+        deadline = time.time() + 10
+        while time.time() < deadline:
+            with lock:
+                if sum(len(v) for v in received.values()) >= args.events * args.displays:
+                    break
+            time.sleep(0.05)
+        elapsed = time.perf_counter() - start
+        queries_during = db_queries(client, stream_route) - queries_before
+        _, streams = client.json("GET", "/health/streams")
+
+        with lock:
+            for conn in conns:
+                conn.sock.shutdown(socket.SHUT_RDWR)  # close() no basta: la respuesta tiene otra referencia
+            latencies = [(t - sent[c]) * 1000 for c, times in received.items() for t in times]
+
+        delivered = len(latencies)
+        print(json.dumps({
+            "displays": args.displays,
+            "events": args.events,
+            "delivered": delivered,
+            "expected": args.events * args.displays,
+            "seconds": round(elapsed, 2),
+            "latency_ms": {
+                "p50": round(statistics.median(latencies), 2) if latencies else None,
+                "p95": round(percentile(latencies, 0.95), 2) if latencies else None,
+                "max": round(max(latencies), 2) if latencies else None,
+            },
+            "stream_db_queries": queries_during,
+            # cada sondeo de GET /turnos son al menos dos consultas (BEGIN y SELECT)
+            "polling_db_queries_estimate": int(args.displays * elapsed / args.poll_seconds * 2),
+            "resyncs": streams["resyncs"],
+        }, indent=2))
+        if delivered < args.events * args.displays:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Escalado con la cantidad de workers (python -m app.serve --workers N).
+
+Para cada N levanta la API en modo de producción sobre la misma base sembrada y
+la carga con procesos cliente (cada uno con varios hilos y keep-alive) durante
+--duration segundos con una mezcla de lecturas y altas. Reporta solicitudes/s,
+p50/p95 y la aceleración respecto del primer N.
+
+    python -m benchmarks.workers --workers 1 2 4 --clients 4 --threads 8 --duration 10
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.server import Client, running_server
+
+FECHA = "2031-01-01"
+MIX = [  # (peso, método, ruta)
+    (4, "GET", "/turnos/?limit=50"),
+    (2, "GET", "/turnos/{turno_id}"),
+    (2, "GET", "/sucursales/{sucursal_id}/disponibilidad?fecha=" + FECHA),
+    (1, "GET", "/servicios/servicios?limit=20"),
+    (1, "POST", "/turnos/"),
+]
+
+
+def _seed(url: str) -> dict:
+    client = Client(url)
+    _, sucursal = client.json("POST", "/sucursales/", {"nombre": "bench", "capacidad": 1000000})
+    client.json("POST", "/servicios/", {"nombre": "bench"})
+    client.json("POST", "/turnos/bulk", [
+        {"cliente": f"seed{i}", "tipo": "bench", "hora": f"{8 + i % 10:02d}:00", "fecha": FECHA,
+         "sucursal_id": sucursal["id"]}
+        for i in range(2000)
+    ])
+    return {"sucursal_id": sucursal["id"], "turnos": 2000}
+
+
+def _client_process(url: str, ctx: dict, threads: int, deadline: float, seed: int, out):
+    import threading
+
+    latencies, errors, lock = [], [0], threading.Lock()
+    weights = [w for w, _, _ in MIX]
+
+    def run(n: int):
+        rnd = random.Random(seed * 1000 + n)
+        client = Client(url)
+        local = []
+        while time.time() < deadline:
+            _, method, path = rnd.choices(MIX, weights)[0]
+            path = path.format(turno_id=rnd.randint(1, ctx["turnos"]), sucursal_id=ctx["sucursal_id"])
+            body = None
+            if method == "POST":
+                body = {"cliente": f"w{rnd.random()}", "tipo": "bench", "hora": "12:00", "fecha": FECHA,
+                        "sucursal_id": ctx["sucursal_id"]}
+            start = time.perf_counter()
+            status, _, _ = client.request(method, path, body)
+            local.append(time.perf_counter() - start)
+            if status >= 400:
+                with lock:
+                    errors[0] += 1
+        with lock:
+            latencies.extend(local)
+
+    pool = [threading.Thread(target=run, args=(n,)) for n in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    out.put((latencies, errors[0]))
+
+
+def measure(url: str, ctx: dict, clients: int, threads: int, duration: float) -> dict:
+    out = multiprocessing.Queue()
+    deadline = time.time() + duration
+    procs = [
+        multiprocessing.Process(target=_client_process, args=(url, ctx, threads, deadline, i, out))
+        for i in range(clients)
+    ]
+    for p in procs:
+        p.start()
+    latencies, errors = [], 0
+    for _ in procs:
+        lat, err = out.get()
+        latencies += lat
+        errors += err
+    for p in procs:
+        p.join()
+    latencies.sort()
+    return {
+        "requests_per_s": round(len(latencies) / duration, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2) if latencies else None,
+        "p95_ms": round(latencies[int(0.95 * (len(latencies) - 1))] * 1000, 2) if latencies else None,
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=4, help="procesos cliente")
+    parser.add_argument("--threads", type=int, default=8, help="hilos por proceso cliente")
+    parser.add_argument("--duration", type=float, default=10)
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / "workers.db")
+        env = {"RATE_LIMIT_SQLITE_PATH": str(Path(tmp) / "ratelimit.db")}
+        ctx = None
+        for n in args.workers:
+            with running_server(db_path=db_path, extra_env=env, workers=n) as url:
+                time.sleep(1)  # que todos los workers terminen de arrancar
+                ctx = ctx or _seed(url)
+                results.append({"workers": n, **measure(url, ctx, args.clients, args.threads, args.duration)})
+
+    base = results[0]["requests_per_s"] or 1
+    for r in results:
+        r["speedup"] = round(r["requests_per_s"] / base, 2)
+    print(json.dumps({"cpus": os.cpu_count(), "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Altas de turnos concurrentes: escrituras/s y tamaño medio del lote del escritor.
+
+    python -m benchmarks.write_throughput --workers 1 4 16 32 --seconds 5
+    python -m benchmarks.write_throughput --batch-max 1   # sin commit agrupado
+"""
+import argparse
+import json
+import threading
+import time
+from collections import Counter
+
+from benchmarks.server import Client, running_server
+
+
+def writer(url: str, worker: int, deadline: float, stats: Counter, lock: threading.Lock):
+    client = Client(url)
+    n = 0
+    while time.time() < deadline:
+        n += 1
+        status, _ = client.json("POST", "/turnos/", {"cliente": f"w{worker}-{n}", "tipo": "bench", "hora": "10:00"})
+        with lock:
+            stats["ok" if status == 200 else f"http_{status}"] += 1
+
+
+def run(url: str, workers: int, seconds: float) -> dict:
+    before = Client(url).json("GET", "/health/writer")[1]
+    stats, lock = Counter(), threading.Lock()
+    deadline = time.time() + seconds
+    threads = [threading.Thread(target=writer, args=(url, w, deadline, stats, lock)) for w in range(workers)]
+    start = time.time()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.time() - start
+    after = Client(url).json("GET", "/health/writer")[1]
+    batches = after["batches"] - before["batches"]
+    return {
+        "workers": workers,
+        "writes_per_s": round(stats["ok"] / elapsed, 1),
+        "errors": {k: v for k, v in stats.items() if k != "ok"},
+        "avg_batch": round((after["jobs"] - before["jobs"]) / batches, 2) if batches else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", help="API ya levantada (por defecto se arranca una temporal)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16, 32])
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--batch-max", type=int, help="WRITE_BATCH_MAX del servidor temporal")
+    args = parser.parse_args()
+
+    extra_env = {"WRITE_BATCH_MAX": str(args.batch_max)} if args.batch_max else None
+    with running_server(args.url, extra_env=extra_env) as url:
+        print(json.dumps([run(url, w, args.seconds) for w in args.workers], indent=2))
+
+
+if __name__ == "__main__":
+    main()
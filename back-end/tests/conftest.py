@@ -0,0 +1,30 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACKEND_DIR))
+
+# La configuración se lee al importar app: base temporal, sin trabajos en
+# segundo plano y límites altos para que el rate limiting no intervenga
+TEST_ENV = {
+    "SECRET_KEY": "test-secret",
+    "SQLITE_PATH": str(Path(tempfile.mkdtemp()) / "test.db"),
+    "JOBS_ENABLED": "false",
+    "RATE_LIMIT_API_PER_MIN": "1000000000",
+    "RATE_LIMIT_AUTH_PER_MIN": "1000000000",
+    "BCRYPT_ROUNDS": "4",
+}
+os.environ.update(TEST_ENV)
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as client:
+        yield client
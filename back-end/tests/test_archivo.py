@@ -0,0 +1,15 @@
+def test_rearchive_reused_turno_id(client):
+    from app.core import archivo
+
+    viejo = {"cliente": "archivo", "tipo": "general", "hora": "09:00", "fecha": "2020-01-06"}
+    primero = client.post("/turnos/", json=viejo).json()
+    assert client.portal.call(archivo.archivar, 90) >= 1
+
+    # turno no es AUTOINCREMENT: el id archivado vuelve a darse
+    segundo = client.post("/turnos/", json={**viejo, "hora": "10:00"}).json()
+    assert segundo["id"] == primero["id"]
+    assert client.portal.call(archivo.archivar, 90) == 1
+
+    rows = client.get("/turnos/archivo?desde=2020-01-06&hasta=2020-01-06").json()
+    assert sorted((r["turno_id"], r["hora"]) for r in rows) == [(primero["id"], "09:00"), (primero["id"], "10:00")]
+    assert len({r["id"] for r in rows}) == 2
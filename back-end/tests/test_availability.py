@@ -0,0 +1,43 @@
+FECHA = "2031-03-03"
+
+
+def _sucursal(client, capacidad: int) -> int:
+    return client.post("/sucursales/", json={"nombre": "Disp", "direccion": "-", "capacidad": capacidad}).json()["id"]
+
+
+def _servicio(client, minutos: int) -> int:
+    return client.post("/servicios/", json={"nombre": f"Disp {minutos}", "duracion_min": minutos}).json()["id"]
+
+
+def _reservar(client, sucursal_id: int, servicio_id: int, hora: str) -> int:
+    return client.post("/turnos/", json={
+        "cliente": "disp", "tipo": "general", "hora": hora, "fecha": FECHA,
+        "sucursal_id": sucursal_id, "servicio_id": servicio_id,
+    }).status_code
+
+
+def _horas(client, sucursal_id: int, servicio_id: int) -> set:
+    slots = client.get(f"/sucursales/{sucursal_id}/disponibilidad?fecha={FECHA}&servicio_id={servicio_id}").json()
+    return {slot["hora"] for slot in slots}
+
+
+def test_capacity_counts_simultaneous_turnos(client):
+    sucursal = _sucursal(client, capacidad=2)
+    corto, largo = _servicio(client, 30), _servicio(client, 60)
+    assert _reservar(client, sucursal, corto, "09:00") < 400
+    assert _reservar(client, sucursal, corto, "09:30") < 400
+    # 09:00-10:00 solapa con los dos, pero en cada momento hay uno solo
+    assert "09:00" in _horas(client, sucursal, largo)
+    assert _reservar(client, sucursal, largo, "09:00") < 400
+    assert _reservar(client, sucursal, largo, "09:00") == 409
+
+
+def test_servicio_duration_change_invalidates_index(client):
+    sucursal = _sucursal(client, capacidad=1)
+    servicio = _servicio(client, 30)
+    assert _reservar(client, sucursal, servicio, "09:00") < 400
+    assert "09:30" in _horas(client, sucursal, servicio)
+
+    assert client.put(f"/servicios/{servicio}", json={"duracion_min": 60}).status_code == 200
+    assert not {"09:00", "09:30"} & _horas(client, sucursal, servicio)
+    assert _reservar(client, sucursal, servicio, "09:30") == 409
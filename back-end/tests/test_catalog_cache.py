@@ -0,0 +1,45 @@
+import asyncio
+from datetime import datetime, timezone
+
+from starlette.requests import Request
+
+from app.core import catalog_cache
+from app.core.catalog_cache import CatalogCache, catalog_response
+
+
+class FakeDatetime(datetime):
+    current = None
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.current
+
+
+def _get(cache, data, **headers):
+    async def loader():
+        return data
+
+    request = Request({"type": "http", "headers": [(k.replace("_", "-").encode(), v.encode()) for k, v in headers.items()]})
+    return asyncio.run(catalog_response(request, cache, "todos", loader))
+
+
+def test_last_modified_moves_only_when_the_body_changes(monkeypatch):
+    monkeypatch.setattr(catalog_cache, "datetime", FakeDatetime)
+    monkeypatch.setattr(FakeDatetime, "current", datetime(2024, 1, 1, 10, 0, tzinfo=timezone.utc))
+    cache = CatalogCache("prueba")
+    primera = _get(cache, [{"id": 1, "nombre": "Corte"}]).headers["last-modified"]
+
+    # vence el TTL sin invalidate() local (el cambio lo hizo otro worker)
+    FakeDatetime.current = datetime(2024, 1, 1, 11, 0, tzinfo=timezone.utc)
+    cache._entries.clear()
+    response = _get(cache, [{"id": 1, "nombre": "Color"}], if_modified_since=primera)
+    assert response.status_code == 200
+    assert response.headers["last-modified"] != primera
+
+    # recarga con el mismo contenido: conserva la fecha y sigue en 304
+    FakeDatetime.current = datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc)
+    segunda = response.headers["last-modified"]
+    cache.invalidate()
+    response = _get(cache, [{"id": 1, "nombre": "Color"}], if_modified_since=segunda)
+    assert response.status_code == 304
+    assert response.headers["last-modified"] == segunda
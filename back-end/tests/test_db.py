@@ -0,0 +1,20 @@
+import os
+import subprocess
+import sys
+
+from conftest import BACKEND_DIR, TEST_ENV
+
+
+def test_engines_use_database_url(tmp_path):
+    db_path = tmp_path / "desde_url.db"
+    env = {**os.environ, **TEST_ENV, "SQLITE_PATH": "", "DATABASE_URL": f"sqlite:///{db_path}"}
+    script = (
+        "from app.db import DB_FILE, async_engine, engine, create_db_and_tables; create_db_and_tables(); "
+        "print(engine.url.database, async_engine.url.drivername, async_engine.url.database, DB_FILE)"
+    )
+    result = subprocess.run([sys.executable, "-c", script], cwd=BACKEND_DIR, env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    sync_db, async_driver, async_db, db_file = result.stdout.split()[-4:]
+    assert sync_db == async_db == db_file == str(db_path)
+    assert async_driver == "sqlite+aiosqlite"
+    assert db_path.exists()
@@ -0,0 +1,40 @@
+def test_turnos_etag_changes_when_id_is_reused(client):
+    # SQLite reutiliza el id más alto tras un borrado y version vuelve a 1
+    creado = client.post("/turnos/", json={"cliente": "Juan", "tipo": "general", "hora": "09:00"}).json()
+    for path in ("/turnos/", "/turnos/?limit=500"):
+        etag = client.get(path).headers["etag"]
+        assert client.get(path, headers={"If-None-Match": etag}).status_code == 304
+
+    etags = {path: client.get(path).headers["etag"] for path in ("/turnos/", "/turnos/?limit=500")}
+    assert client.delete(f"/turnos/{creado['id']}").status_code < 400
+    otro = client.post("/turnos/", json={"cliente": "Juan", "tipo": "control", "hora": "10:30"}).json()
+    assert (otro["id"], otro["version"]) == (creado["id"], creado["version"])
+
+    for path, etag in etags.items():
+        response = client.get(path, headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert any(t["tipo"] == "control" for t in response.json())
+
+
+def test_users_etag_changes_when_a_user_changes(client):
+    from sqlmodel import Session, select
+    from app.db import engine
+    from app.models import User
+
+    email = "etag-user@example.com"
+    assert client.post("/auth/auth/register", json={"email": email, "password": "secreto123"}).status_code < 400
+    path = "/users?limit=100"
+    etag = client.get(path).headers["etag"]
+    assert client.get(path, headers={"If-None-Match": etag}).status_code == 304
+
+    # baja fuera de la API: mismo id más alto, distinto contenido
+    with Session(engine) as session:
+        user = session.exec(select(User).where(User.email == email)).one()
+        user.is_active = False
+        session.add(user)
+        session.commit()
+
+    response = client.get(path, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert [u["is_active"] for u in response.json() if u["email"] == email] == [False]
+    assert "hashed_password" not in response.json()[0]
@@ -0,0 +1,26 @@
+from fastapi.testclient import TestClient
+
+from app.main import create_app
+
+
+def _paths(app):
+    return {route.path for route in app.routes}
+
+
+def test_lazy_routers_load_on_first_request(client):
+    app = create_app()  # la base ya la creó `client`; sin startup
+    assert not {"/search", "/reportes/ocupacion"} & _paths(app)
+
+    response = TestClient(app).get("/reportes/ocupacion", params={"desde": "2020-01-01", "hasta": "2020-01-02"})
+    assert response.status_code == 200
+    assert "/reportes/ocupacion" in _paths(app)
+    assert "/search" not in _paths(app)
+
+
+def test_openapi_lists_lazy_routers():
+    app = create_app()
+    assert {"/search", "/reportes/ocupacion"} <= set(app.openapi()["paths"])
+    assert len([r for r in app.routes if r.path == "/search"]) == 1
+    app.openapi_schema = None
+    app.openapi()  # ya incluidos: no se agregan dos veces
+    assert len([r for r in app.routes if r.path == "/search"]) == 1
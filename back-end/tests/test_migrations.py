@@ -0,0 +1,93 @@
+import os
+import sqlite3
+import subprocess
+import sys
+
+from conftest import BACKEND_DIR, TEST_ENV
+
+# Esquema de la primera versión, antes de app.migrations (como lo creaba create_all)
+BASELINE_SCHEMA = """
+CREATE TABLE user (
+    email VARCHAR NOT NULL, full_name VARCHAR, is_active BOOLEAN NOT NULL,
+    id INTEGER NOT NULL, hashed_password VARCHAR NOT NULL, PRIMARY KEY (id)
+);
+CREATE INDEX ix_user_email ON user (email);
+CREATE TABLE servicio (nombre VARCHAR NOT NULL, descripcion VARCHAR, id INTEGER NOT NULL, PRIMARY KEY (id));
+CREATE TABLE sucursal (
+    nombre VARCHAR NOT NULL, direccion VARCHAR, ciudad VARCHAR, activa BOOLEAN NOT NULL,
+    id INTEGER NOT NULL, PRIMARY KEY (id)
+);
+CREATE INDEX ix_sucursal_nombre ON sucursal (nombre);
+CREATE TABLE turno (
+    cliente VARCHAR NOT NULL, tipo VARCHAR NOT NULL, hora VARCHAR NOT NULL, "asignadoA" VARCHAR,
+    id INTEGER NOT NULL, servicio_id INTEGER, user_id INTEGER, sucursal_id INTEGER,
+    PRIMARY KEY (id),
+    FOREIGN KEY(servicio_id) REFERENCES servicio (id),
+    FOREIGN KEY(user_id) REFERENCES user (id),
+    FOREIGN KEY(sucursal_id) REFERENCES sucursal (id)
+);
+CREATE INDEX ix_turno_cliente ON turno (cliente);
+INSERT INTO user (email, full_name, is_active, id, hashed_password) VALUES ('ana@example.com', 'Ana', 1, 1, 'x');
+INSERT INTO servicio (nombre, descripcion, id) VALUES ('Consulta', NULL, 1);
+INSERT INTO sucursal (nombre, direccion, ciudad, activa, id) VALUES ('Centro', 'Calle 1', 'Lima', 1, 1);
+INSERT INTO turno (cliente, tipo, hora, "asignadoA", id, servicio_id, user_id, sucursal_id)
+VALUES ('Juan', 'general', '09:30', NULL, 1, 1, 1, 1);
+"""
+
+
+# turno_archivo como la creaba la migración 8: el id de turno como clave
+ARCHIVO_M8 = """
+DROP TABLE turno_archivo;
+CREATE TABLE turno_archivo (
+    cliente VARCHAR NOT NULL, tipo VARCHAR NOT NULL, hora VARCHAR NOT NULL, fecha DATE,
+    "asignadoA" VARCHAR, inicio DATETIME, id INTEGER NOT NULL, version INTEGER NOT NULL,
+    servicio_id INTEGER, user_id INTEGER, sucursal_id INTEGER, archivado_at DATETIME NOT NULL,
+    PRIMARY KEY (id)
+);
+CREATE INDEX ix_turno_archivo_fecha ON turno_archivo (fecha);
+INSERT INTO turno_archivo VALUES ('Eva', 'general', '08:00', '2020-01-06', NULL, '2020-01-06 08:00:00.000000',
+                                  7, 2, NULL, NULL, 1, '2020-05-01 00:00:00.000000');
+DELETE FROM schema_version WHERE version > 8;
+"""
+
+
+def _startup(db_path):
+    # arranque real en otro proceso: la app abre la base de SQLITE_PATH al importarse
+    env = {**os.environ, **TEST_ENV, "SQLITE_PATH": str(db_path)}
+    result = subprocess.run(
+        [sys.executable, "-c", "from app.db import create_db_and_tables; create_db_and_tables()"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+    )
+    assert result.returncode == 0, result.stderr
+
+
+def test_upgrade_baseline_database(tmp_path):
+    db_path = tmp_path / "baseline.db"
+    with sqlite3.connect(db_path) as conn:
+        conn.executescript(BASELINE_SCHEMA)
+    _startup(db_path)
+
+    from app.migrations import LATEST_VERSION
+
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT MAX(version) FROM schema_version").fetchone()[0] == LATEST_VERSION
+        columns = {row[1] for row in conn.execute("PRAGMA table_info('turno')")}
+        assert {"sucursal_id", "fecha", "version", "inicio"} <= columns
+        indexes = {row[1] for row in conn.execute("PRAGMA index_list('turno')")}
+        assert {"ix_turno_sucursal_hora", "ix_turno_hora", "ix_turno_inicio"} <= indexes
+        assert conn.execute("SELECT cliente, version FROM turno WHERE id = 1").fetchone() == ("Juan", 1)
+
+
+def test_upgrade_archive_table_to_own_key(tmp_path):
+    db_path = tmp_path / "archivo.db"
+    with sqlite3.connect(db_path) as conn:
+        conn.executescript(BASELINE_SCHEMA)
+    _startup(db_path)
+    with sqlite3.connect(db_path) as conn:
+        conn.executescript(ARCHIVO_M8)
+    _startup(db_path)
+
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT id, turno_id, cliente, version FROM turno_archivo").fetchall() == [(7, 7, "Eva", 2)]
+        indexes = {row[1] for row in conn.execute("PRAGMA index_list('turno_archivo')")}
+        assert {"ix_turno_archivo_turno_id", "ix_turno_archivo_fecha", "ix_turno_archivo_sucursal_fecha"} <= indexes
@@ -0,0 +1,36 @@
+import base64
+import json
+
+import pytest
+
+
+def cursor(data) -> str:
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("path, data", [
+    ("/turnos/?limit=5", {"o": "id", "v": [{"a": 1}]}),
+    ("/turnos/?limit=5", {"o": "id", "v": [[1, 2]]}),
+    ("/turnos/?limit=5", {"o": "id", "v": ["1"]}),
+    ("/turnos/?limit=5", {"o": "id", "v": [True]}),
+    ("/turnos/?limit=5", {"o": "id", "v": {"a": 1}}),
+    ("/turnos/?limit=5", [[1, 2]]),
+    ("/turnos/?limit=5&order_by=hora", {"o": "hora", "v": [9, 1]}),
+    ("/turnos/?limit=5&order_by=hora", {"o": "hora", "v": ["09:00", None]}),
+    ("/turnos/archivo?limit=5", {"o": "archivo", "v": [{"a": 1}, 1]}),
+    ("/turnos/archivo?limit=5", {"o": "archivo", "v": ["2030-01-01", [1]]}),
+])
+def test_invalid_cursor_is_400(client, path, data):
+    response = client.get(f"{path}&cursor={cursor(data)}")
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Cursor inválido"
+
+
+def test_cursor_round_trip(client):
+    for i in range(3):
+        client.post("/turnos/", json={"cliente": f"cursor {i}", "tipo": "general", "hora": f"1{i}:00"})
+    for order_by in ("id", "hora"):
+        first = client.get(f"/turnos/?limit=1&order_by={order_by}")
+        response = client.get(f"/turnos/?limit=1&order_by={order_by}&cursor={first.headers['x-next-cursor']}")
+        assert response.status_code == 200
+        assert response.json()[0]["id"] != first.json()[0]["id"]
@@ -0,0 +1,84 @@
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event, func
+from sqlmodel import Session, select
+
+from app.core.pagination import encode_cursor
+from app.db import async_engine, engine
+from app.models import Turno
+
+TURNOS = 120
+SIZES = (1, 20, TURNOS)
+
+# Sentencias por listado, iguales para cualquier tamaño de página: la página,
+# el total exacto y una consulta IN por relación embebida. {cursor} arranca en
+# los turnos sembrados, que tienen todas las relaciones: los de otros tests no
+# cambian la cuenta.
+LISTADOS = [
+    ("/turnos/?limit={limit}&exact_count=true&cursor={cursor}", 2),
+    ("/turnos/?limit={limit}&exact_count=true&include=servicio&cursor={cursor}", 3),
+    ("/turnos/?limit={limit}&exact_count=true&include=servicio,sucursal,user&cursor={cursor}", 5),
+    ("/turnos/?limit={limit}&order_by=hora&exact_count=true&include=user,sucursal&cursor={cursor_hora}", 4),
+]
+
+
+@pytest.fixture(scope="module")
+def seeded(client):
+    with Session(engine) as session:
+        start = session.exec(select(func.max(Turno.id))).one() or 0
+    sucursales = [
+        client.post("/sucursales/", json={"nombre": f"Conteo S{i}", "direccion": "-", "capacidad": 1000}).json()["id"]
+        for i in range(3)
+    ]
+    servicios = [client.post("/servicios/", json={"nombre": f"Conteo {i}"}).json()["id"] for i in range(3)]
+    users = [
+        client.post("/auth/auth/register", json={"email": f"conteo{i}@example.com", "password": "conteo-pass"}).json()["id"]
+        for i in range(3)
+    ]
+    items = [
+        {"cliente": f"c{i}", "tipo": "conteo", "hora": f"{9 + i % 8:02d}:00", "fecha": "2031-03-03",
+         "sucursal_id": sucursales[i % 3], "servicio_id": servicios[i % 3], "user_id": users[i % 3]}
+        for i in range(TURNOS)
+    ]
+    response = client.post("/turnos/bulk", json=items)
+    assert response.status_code < 400, response.text
+    # los primeros sembrados en cada orden: id > start y (hora, id) > ("09:00", start)
+    return {"id": start + 1, "cursor": encode_cursor("id", [start]), "cursor_hora": encode_cursor("hora", ["09:00", start])}
+
+
+@contextmanager
+def count_statements():
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.strip().upper() != "BEGIN":  # el BEGIN explícito de aiosqlite no es una consulta
+            statements.append(statement)
+
+    targets = (engine, async_engine.sync_engine)
+    for target in targets:
+        event.listen(target, "before_cursor_execute", capture)
+    try:
+        yield statements
+    finally:
+        for target in targets:
+            event.remove(target, "before_cursor_execute", capture)
+
+
+@pytest.mark.parametrize("path, expected", LISTADOS)
+def test_listing_query_count_does_not_grow_with_page_size(client, seeded, path, expected):
+    for size in SIZES:
+        url = path.format(limit=size, **seeded)
+        with count_statements() as statements:
+            response = client.get(url)
+        assert response.status_code == 200, response.text
+        assert len(response.json()) == size
+        assert len(statements) == expected, (size, statements)
+
+
+@pytest.mark.parametrize("include, expected", [("", 1), ("servicio,sucursal,user", 4)])
+def test_turno_by_id_query_count(client, seeded, include, expected):
+    with count_statements() as statements:
+        response = client.get(f"/turnos/{seeded['id']}?include={include}")
+    assert response.status_code == 200, response.text
+    assert len(statements) == expected, statements
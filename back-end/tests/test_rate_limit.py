@@ -0,0 +1,23 @@
+import asyncio
+
+
+def test_blocking_backend_runs_off_event_loop(client, monkeypatch):
+    from app.core.rate_limiter import limiter
+
+    en_loop = []
+    hit = limiter.hit
+
+    def registrar(*args, **kwargs):
+        try:
+            asyncio.get_running_loop()
+            en_loop.append(True)
+        except RuntimeError:
+            en_loop.append(False)
+        return hit(*args, **kwargs)
+
+    monkeypatch.setattr(limiter.backend, "blocking", True)
+    monkeypatch.setattr(limiter, "hit", registrar)
+    client.post("/auth/auth/register", json={"email": "rate@example.com", "password": "rate-pass"})
+    client.post("/auth/auth/login", json={"email": "rate@example.com", "password": "rate-pass"})
+    # middleware + register, middleware + login
+    assert en_loop == [False] * 4
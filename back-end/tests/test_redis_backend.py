@@ -0,0 +1,125 @@
+import socketserver
+import threading
+
+import pytest
+
+from app.core.rate_limiter import RedisBackend, RedisError
+
+
+class FakeRedis(socketserver.ThreadingTCPServer):
+    """Servidor RESP mínimo: AUTH, SELECT, INCR, EXPIRE y GET sobre un dict.
+    INCR de una clave que empieza con "err" responde -ERR."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, password=None):
+        super().__init__(("127.0.0.1", 0), FakeRedisHandler)
+        self.password = password
+        self.data = {}
+        self.commands = []
+        self.connections = 0
+        self.drop_next = False  # corta la conexión al recibir el próximo comando
+
+
+class FakeRedisHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        self.server.connections += 1
+        authed = self.server.password is None
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            args = []
+            for _ in range(int(line[1:])):
+                size = int(self.rfile.readline()[1:])
+                args.append(self.rfile.read(size + 2)[:-2].decode())
+            if self.server.drop_next:
+                self.server.drop_next = False
+                return
+            self.server.commands.append(args)
+            name = args[0].upper()
+            if name == "AUTH":
+                authed = args[1] == self.server.password
+                reply = b"+OK\r\n" if authed else b"-ERR invalid password\r\n"
+            elif not authed:
+                reply = b"-NOAUTH Authentication required.\r\n"
+            elif name in ("SELECT", "EXPIRE"):
+                reply = b"+OK\r\n" if name == "SELECT" else b":1\r\n"
+            elif name == "INCR" and args[1].startswith("err"):
+                reply = b"-ERR value is not an integer or out of range\r\n"
+            elif name == "INCR":
+                self.server.data[args[1]] = self.server.data.get(args[1], 0) + 1
+                reply = f":{self.server.data[args[1]]}\r\n".encode()
+            elif name == "GET" and args[1] in self.server.data:
+                value = str(self.server.data[args[1]]).encode()
+                reply = b"$%d\r\n%s\r\n" % (len(value), value)
+            else:
+                reply = b"$-1\r\n"
+            self.wfile.write(reply)
+
+
+@pytest.fixture
+def fake_redis():
+    servers = []
+
+    def start(password=None):
+        server = FakeRedis(password)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def _url(server, auth: str = "") -> str:
+    return f"redis://{auth}127.0.0.1:{server.server_address[1]}"
+
+
+def test_hit_counts_current_and_previous(fake_redis):
+    server = fake_redis()
+    backend = RedisBackend(_url(server))
+    server.data["k:0"] = 4
+    assert backend.hit("k:1", "k:0", 120) == (1, 4)
+    assert backend.hit("k:1", "k:0", 120) == (2, 4)
+    assert server.commands[:3] == [["INCR", "k:1"], ["EXPIRE", "k:1", "120"], ["GET", "k:0"]]
+    assert server.connections == 1
+
+
+def test_error_reply_keeps_connection_in_sync(fake_redis):
+    server = fake_redis()
+    backend = RedisBackend(_url(server))
+    server.data["ok:0"] = 7
+    with pytest.raises(RedisError):
+        backend.hit("err:1", "ok:0", 120)
+    # las respuestas de EXPIRE y GET del pipeline fallido no se leen en el siguiente
+    assert backend.hit("ok:1", "ok:0", 120) == (1, 7)
+
+
+def test_reconnects_after_dropped_connection(fake_redis):
+    server = fake_redis()
+    backend = RedisBackend(_url(server))
+    assert backend.hit("r:1", "r:0", 120) == (1, 0)
+    server.drop_next = True
+    with pytest.raises(ConnectionError):
+        backend.hit("r:1", "r:0", 120)
+    assert backend.hit("r:1", "r:0", 120) == (2, 0)
+    assert server.connections == 2
+
+
+def test_auth_and_select_on_connect(fake_redis):
+    server = fake_redis(password="secreto")
+    backend = RedisBackend(_url(server, ":secreto@") + "/2")
+    assert backend.hit("a:1", "a:0", 120) == (1, 0)
+    assert server.commands[:2] == [["AUTH", "secreto"], ["SELECT", "2"]]
+
+    wrong = RedisBackend(_url(server, ":otra@"))
+    with pytest.raises(RedisError):
+        wrong.hit("a:1", "a:0", 120)
+    # la conexión sin autenticar se descarta: el siguiente intento se autentica de nuevo
+    with pytest.raises(RedisError):
+        wrong.hit("a:1", "a:0", 120)
+    assert server.connections == 3
@@ -0,0 +1,33 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+from conftest import BACKEND_DIR, TEST_ENV
+
+# En otro proceso: si la sincronización bloquea el event loop, el proceso queda
+# colgado (también el cierre del TestClient) y el timeout lo convierte en falla
+SCRIPT = textwrap.dedent("""
+    from concurrent.futures import ThreadPoolExecutor
+    from fastapi.testclient import TestClient
+    from app.core.revocation import revocations
+    from app.main import app
+
+    with TestClient(app) as client:
+        client.post("/auth/auth/register", json={"email": "revoca@example.com", "password": "revoca-pass"})
+        token = client.post("/auth/auth/login", json={"email": "revoca@example.com", "password": "revoca-pass"}).json()
+        headers = {"Authorization": "Bearer " + token["access_token"]}
+        revocations.sync_seconds = 0  # cada solicitud encuentra la lista vencida
+        with ThreadPoolExecutor(max_workers=20) as pool:
+            for _ in range(5):
+                futures = [pool.submit(client.get, "/me", headers=headers) for _ in range(20)]
+                assert [f.result().status_code for f in futures] == [200] * 20
+""")
+
+
+def test_concurrent_requests_while_revocations_sync(tmp_path):
+    env = {**os.environ, **TEST_ENV, "SQLITE_PATH": str(tmp_path / "revocation.db")}
+    result = subprocess.run(
+        [sys.executable, "-c", SCRIPT], cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,26 @@
+def test_failing_on_commit_does_not_reapply_batch(client):
+    from sqlalchemy import func, select
+
+    from app.core.writer import turno_writer
+    from app.models import Servicio
+
+    aplicados = []
+
+    async def job(batch):
+        aplicados.append(1)
+        batch.session.add(Servicio(nombre="writer on_commit"))
+
+        def falla():
+            raise RuntimeError("callback roto")
+        batch.on_commit(falla)
+        batch.on_commit(lambda: aplicados.append("confirmado"))
+        return "ok"
+
+    async def contar(batch):
+        return (await batch.session.execute(
+            select(func.count()).select_from(Servicio).where(Servicio.nombre == "writer on_commit")
+        )).scalar_one()
+
+    assert client.portal.call(turno_writer.submit, job) == "ok"
+    assert aplicados == [1, "confirmado"]
+    assert client.portal.call(turno_writer.submit, contar) == 1
@@ -0,0 +1,97 @@
+"""Presupuesto de arranque en frío: cuánto tarda un proceso nuevo en responder.
+
+Mide, cada vez en un proceso nuevo:
+  - ready_ms: desde lanzar uvicorn hasta el primer 200 de /health;
+  - import_ms / create_app_ms / startup_ms: desglose en proceso (importar
+    app.main, armar la app con sus routers, eventos de startup).
+
+La primera corrida es sobre una base nueva (crea el esquema); el resto sobre la
+misma base ya migrada, que es el caso de una instancia autoescalada. Termina con
+código 1 si la mediana de ready_ms con base existente supera --budget-ms.
+
+    python -m tools.cold_start [--runs 5] [--budget-ms 800]
+"""
+import argparse
+import http.client
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.server import BACKEND_DIR, BENCH_ENV, free_port  # noqa: E402
+
+BREAKDOWN = """
+import asyncio, json, time
+start = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+application = app.main.create_app()
+created = time.perf_counter()
+asyncio.run(application.router.startup())
+ready = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "create_app_ms": (created - imported) * 1000,
+    "startup_ms": (ready - created) * 1000,
+}))
+"""
+
+
+def ready_ms(env: dict, timeout: float = 30.0) -> float:
+    port = free_port()
+    cmd = [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"]
+    start = time.perf_counter()
+    proc = subprocess.Popen(cmd, cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+                conn.request("GET", "/health")
+                if conn.getresponse().status == 200:
+                    return (time.perf_counter() - start) * 1000
+            except OSError:
+                time.sleep(0.005)
+        raise RuntimeError(f"uvicorn no respondió en {timeout}s")
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def breakdown(env: dict) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", BREAKDOWN], cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="corridas con la base ya migrada")
+    parser.add_argument("--budget-ms", type=float, default=800)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {**os.environ, **BENCH_ENV, "SQLITE_PATH": str(Path(tmp) / "cold.db"), "PYTHONPATH": str(BACKEND_DIR)}
+        new_db = {"ready_ms": ready_ms(env)}
+        runs = [{"ready_ms": ready_ms(env), **breakdown(env)} for _ in range(args.runs)]
+
+    existing = {key: round(statistics.median(r[key] for r in runs), 1) for key in runs[0]}
+    report = {
+        "new_db": {k: round(v, 1) for k, v in new_db.items()},
+        "existing_db_median": existing,
+        "budget_ms": args.budget_ms,
+        "within_budget": existing["ready_ms"] <= args.budget_ms,
+    }
+    print(json.dumps(report, indent=2))
+    if not report["within_budget"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
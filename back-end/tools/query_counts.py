@@ -0,0 +1,115 @@
+"""Cantidad de consultas SQL por solicitud según el tamaño de la página.
+
+Levanta la app en proceso sobre una base temporal, pide cada endpoint de
+SCENARIOS con distintos tamaños de página y cuenta las sentencias que emite.
+Termina con código 1 si la cantidad cambia con el tamaño (consultas N+1, por
+ejemplo al embeber relaciones con ?include=).
+
+    python -m tools.query_counts [--verbose]
+
+tests/test_query_counts.py comprueba las mismas cuentas en proceso, con el
+cliente de los tests y la cantidad esperada por endpoint.
+
+Requiere httpx<0.28 (TestClient), ver requirements-dev.txt.
+"""
+import argparse
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.server import BENCH_ENV  # noqa: E402
+
+TURNOS = 300
+SIZES = (1, 20, TURNOS)
+
+# rutas con {limit}; exact_count para que la caché del total no cambie la cuenta
+SCENARIOS = [
+    "/turnos/?limit={limit}&exact_count=true",
+    "/turnos/?limit={limit}&exact_count=true&include=servicio",
+    "/turnos/?limit={limit}&exact_count=true&include=servicio,sucursal,user",
+    "/turnos/?limit={limit}&order_by=hora&exact_count=true&include=user,sucursal",
+]
+
+
+def _seed(client):
+    sucursales = [
+        client.post("/sucursales/", json={"nombre": f"S{i}", "direccion": "-", "capacidad": 1000}).json()["id"]
+        for i in range(3)
+    ]
+    servicios = [client.post("/servicios/", json={"nombre": f"Serv{i}"}).json()["id"] for i in range(3)]
+    users = []
+    for i in range(3):
+        email = f"count{i}@example.com"
+        client.post("/auth/auth/register", json={"email": email, "password": "count-pass"})
+        token = client.post("/auth/auth/login", json={"email": email, "password": "count-pass"}).json()
+        me = client.get("/auth/auth/me", headers={"Authorization": f"Bearer {token['access_token']}"}).json()
+        users.append(me["id"])
+    items = [
+        {"cliente": f"c{i}", "tipo": "count", "hora": f"{9 + i % 8:02d}:00", "fecha": "2030-01-07",
+         "sucursal_id": sucursales[i % 3], "servicio_id": servicios[i % 3] if (i + 1) % 4 else None,
+         "user_id": users[i % 3] if (i + 1) % 5 else None}
+        for i in range(TURNOS)
+    ]
+    response = client.post("/turnos/bulk", json=items)
+    assert response.status_code < 400, response.text
+    return client.get("/turnos/?limit=1").json()[0]["id"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--verbose", action="store_true", help="muestra las sentencias de cada solicitud")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ.update({**BENCH_ENV, "JOBS_ENABLED": "false", "SQLITE_PATH": str(Path(tmp) / "counts.db")})
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+    from app.db import async_engine, engine
+    from app.main import app
+
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.strip().upper() != "BEGIN":  # el BEGIN explícito de aiosqlite no es una consulta
+            captured.append(statement)
+
+    def count(client, path: str) -> int:
+        captured.clear()
+        response = client.get(path)
+        if response.status_code >= 400:
+            raise SystemExit(f"!! {path}: HTTP {response.status_code} {response.text[:200]}")
+        if args.verbose:
+            print(f"  {path}")
+            for statement in captured:
+                print("    " + " ".join(statement.split())[:160])
+        return len(captured)
+
+    failures = 0
+    with TestClient(app) as client:
+        turno_id = _seed(client)
+        for target in (engine, async_engine.sync_engine):
+            event.listen(target, "before_cursor_execute", capture)
+
+        for scenario in SCENARIOS:
+            counts = [count(client, scenario.format(limit=size)) for size in SIZES]
+            ok = len(set(counts)) == 1
+            failures += not ok
+            print(f"[{'ok' if ok else 'FAIL'}] {scenario}: " + ", ".join(f"{s}→{n}" for s, n in zip(SIZES, counts)))
+
+        # por id: una consulta por el turno más una por relación pedida
+        for include, expected in (("", 1), ("servicio,sucursal,user", 4)):
+            n = count(client, f"/turnos/{turno_id}?include={include}")
+            ok = n == expected
+            failures += not ok
+            print(f"[{'ok' if ok else 'FAIL'}] /turnos/{{id}}?include={include}: {n} consultas (esperadas {expected})")
+
+    print(f"{len(SCENARIOS) + 2} escenarios, {failures} con cantidad de consultas variable")
+    raise SystemExit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
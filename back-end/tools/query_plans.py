@@ -0,0 +1,161 @@
+"""EXPLAIN QUERY PLAN de las consultas reales de los routers.
+
+Levanta la app en proceso sobre una base temporal, recorre los endpoints de
+SCENARIOS, captura el SQL que emite cada uno y lo explica con sus parámetros.
+Termina con código 1 si alguna consulta recorre una tabla entera (SCAN sin
+índice) y no está marcada como permitida.
+
+    python -m tools.query_plans [--verbose]
+
+Un SCAN con LIMIT y sin ordenación temporal se acepta: lee solo las primeras
+filas en orden de rowid/índice (primera página de keyset).
+Requiere httpx<0.28 (TestClient), ver requirements-dev.txt.
+"""
+import argparse
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.server import BENCH_ENV  # noqa: E402
+
+FULL_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$")
+EXPLAINED = ("SELECT", "UPDATE", "DELETE")
+
+# (método, ruta, cuerpo, motivo si se permite recorrer la tabla)
+SCENARIOS = [
+    ("GET", "/turnos/?limit=20", None, None),
+    ("GET", "/turnos/?limit=20&order_by=hora", None, None),
+    ("GET", "/turnos/?limit=20&cursor={cursor_id}", None, None),
+    ("GET", "/turnos/?limit=20&order_by=hora&cursor={cursor_hora}", None, None),
+    ("GET", "/turnos/{turno_id}", None, None),
+    ("GET", "/turnos/?limit=20&include=servicio,sucursal,user", None, None),
+    ("GET", "/turnos/{turno_id}?include=servicio,sucursal", None, None),
+    ("GET", "/turnos/export?sucursal_id={sucursal_id}", None, None),
+    ("GET", "/turnos/export?servicio_id={servicio_id}", None, None),
+    ("GET", "/turnos/export?asignadoA=ana", None, None),
+    ("GET", "/turnos/export?hora_desde=09:00&hora_hasta=10:00", None, None),
+    ("GET", "/turnos/export", None, "exportación completa"),
+    ("GET", "/turnos/", None, "listado completo (compatibilidad)"),
+    ("PUT", "/turnos/{turno_id}/asignar", {"trabajador": "ana"}, None),
+    ("PUT", "/turnos/{turno_id}/sucursal", {"sucursal_id": "{sucursal_id}"}, None),
+    ("GET", "/turnos/archivo?limit=20", None, None),
+    ("GET", "/turnos/archivo?desde=2020-01-01&hasta=2020-12-31&sucursal_id={sucursal_id}", None, None),
+    ("GET", "/sucursales/{sucursal_id}/disponibilidad?fecha=2030-01-07", None, None),
+    ("GET", "/sucursales/{sucursal_id}/disponibilidad?fecha=2030-01-08&servicio_id={servicio_id}", None, None),
+    ("GET", "/sucursales/", None, "catálogo completo"),
+    ("GET", "/reportes/ocupacion?desde=2030-01-01&hasta=2030-01-31", None, None),
+    ("GET", "/reportes/ocupacion?desde=2030-01-01&hasta=2030-01-31&por=trabajador&sucursal_id={sucursal_id}",
+     None, None),
+    ("GET", "/servicios/servicios?limit=10", None, "catálogo paginado por offset"),
+    ("GET", "/users?limit=10", None, "listado paginado por offset"),
+    ("GET", "/users?search=plan", None, None),
+    ("GET", "/users?search=pl", None, "LIKE con comodín inicial (término corto)"),
+    ("GET", "/servicios/servicios?nombre=Plan", None, "catálogo paginado por offset"),
+    ("GET", "/search?q=plan", None, None),
+    ("GET", "/search?q=c1 plan&tipo=turno,servicio&skip=10", None, None),
+    ("POST", "/auth/auth/login", {"email": "plan@example.com", "password": "plan-pass"}, None),
+    ("GET", "/auth/auth/me", None, None),
+    ("GET", "/health/jobs", None, None),
+    ("DELETE", "/turnos/{turno_id}", None, None),
+]
+
+
+def _fill(value, ctx: dict):
+    if isinstance(value, str):
+        filled = value.format(**ctx)
+        return int(filled) if value.startswith("{") and filled.isdigit() else filled
+    if isinstance(value, dict):
+        return {k: _fill(v, ctx) for k, v in value.items()}
+    return value
+
+
+def _seed(client) -> dict:
+    sucursal = client.post("/sucursales/", json={"nombre": "Plan", "direccion": "-", "capacidad": 50}).json()
+    servicio = client.post("/servicios/", json={"nombre": "Plan", "duracion_min": 30}).json()
+    client.post("/auth/auth/register", json={"email": "plan@example.com", "password": "plan-pass"})
+    token = client.post("/auth/auth/login", json={"email": "plan@example.com", "password": "plan-pass"}).json()
+    client.headers["Authorization"] = f"Bearer {token['access_token']}"
+    items = [
+        {"cliente": f"c{i}", "tipo": "plan", "hora": f"{9 + i % 8:02d}:{(i % 2) * 30:02d}",
+         "sucursal_id": sucursal["id"], "servicio_id": servicio["id"], "fecha": "2030-01-07"}
+        for i in range(40)
+    ]
+    client.post("/turnos/bulk", json=items)
+    first = client.get("/turnos/?limit=5")
+    by_hora = client.get("/turnos/?limit=5&order_by=hora")
+    return {
+        "sucursal_id": sucursal["id"],
+        "servicio_id": servicio["id"],
+        "turno_id": first.json()[0]["id"],
+        "cursor_id": first.headers["X-Next-Cursor"],
+        "cursor_hora": by_hora.headers["X-Next-Cursor"],
+    }
+
+
+def _full_scans(plan_rows, statement: str):
+    details = [row[-1] for row in plan_rows]
+    bounded = " LIMIT " in statement.upper() and not any("USE TEMP B-TREE" in d for d in details)
+    scans = [m.group(1) for m in map(FULL_SCAN.match, details) if m]
+    return details, ([] if bounded else scans)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--verbose", action="store_true", help="muestra el plan de todas las consultas")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    db_path = str(Path(tmp) / "plans.db")
+    os.environ.update({**BENCH_ENV, "JOBS_ENABLED": "false", "SQLITE_PATH": db_path})
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+    from app.db import async_engine, engine
+    from app.main import app
+
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(EXPLAINED):
+            captured.append((statement, parameters))
+
+    failures = 0
+    with TestClient(app) as client:
+        ctx = _seed(client)
+        for target in (engine, async_engine.sync_engine):
+            event.listen(target, "before_cursor_execute", capture)
+        plans = sqlite3.connect(db_path)
+
+        for method, path, body, allowed in SCENARIOS:
+            captured.clear()
+            response = client.request(method, _fill(path, ctx), json=_fill(body, ctx))
+            label = f"{method} {path}"
+            if response.status_code >= 400:
+                print(f"!! {label}: HTTP {response.status_code} {response.text[:200]}")
+                failures += 1
+                continue
+            for statement, parameters in captured:
+                rows = plans.execute(f"EXPLAIN QUERY PLAN {statement}", parameters or ()).fetchall()
+                details, scans = _full_scans(rows, statement)
+                bad = scans and not allowed
+                if bad or args.verbose:
+                    mark = "FAIL" if bad else ("ok*" if scans else "ok")
+                    print(f"[{mark}] {label}" + (f"  ({allowed})" if scans and allowed else ""))
+                    print("    " + " ".join(statement.split())[:300])
+                    for detail in details:
+                        print(f"      {detail}")
+                failures += bool(bad)
+
+        plans.close()
+
+    print(f"{len(SCENARIOS)} escenarios, {failures} con recorrido completo de tabla")
+    raise SystemExit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
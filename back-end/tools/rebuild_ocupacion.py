@@ -0,0 +1,40 @@
+"""Recalcula el resumen de ocupación desde turno y turno_archivo.
+
+    python -m tools.rebuild_ocupacion          # reconstruye (una transacción)
+    python -m tools.rebuild_ocupacion --check  # solo compara; código 1 si difiere
+
+El resumen se mantiene solo en cada escritura; esto es para cargas hechas por
+fuera de la API (SQL directo, restauraciones) o para verificar que no derivó.
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--check", action="store_true", help="no modifica nada; informa filas que difieren")
+    args = parser.parse_args()
+
+    from app.core import ocupacion
+    from app.db import create_db_and_tables, engine
+
+    create_db_and_tables()
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        if args.check:
+            report = {"drift_rows": ocupacion.drift(conn)}
+        else:
+            report = {"rows": ocupacion.rebuild(conn)}
+    report["seconds"] = round(time.perf_counter() - start, 3)
+    print(json.dumps(report))
+    if report.get("drift_rows"):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()